@@ -0,0 +1,90 @@
+"""study summary tables
+
+Revision ID: 3a9c6e1d4f02
+Revises: e41f07b2d865
+Create Date: 2026-10-18 15:21:09.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a9c6e1d4f02'
+down_revision: Union[str, None] = 'e41f07b2d865'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'study_summary',
+        sa.Column('config_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('study_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('total_submissions', sa.Integer(), nullable=False),
+        sa.Column('complete_submissions', sa.Integer(), nullable=False),
+        sa.Column('response_count', sa.BigInteger(), nullable=False),
+        sa.Column('response_time_sum', sa.Float(), nullable=False),
+        sa.Column('last_submission_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['config_id'], ['study_config.id'], onupdate='CASCADE', ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['study_id'], ['study.id'], onupdate='CASCADE', ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('config_id'),
+    )
+    op.create_index(op.f('ix_study_summary_study_id'), 'study_summary', ['study_id'], unique=False)
+    op.create_table(
+        'study_answer_count',
+        sa.Column('config_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('answer', sa.Integer(), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['config_id'], ['study_summary.config_id'], onupdate='CASCADE', ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('config_id', 'answer'),
+    )
+
+    # Backfill from existing submissions, afterwards totals are maintained incrementally
+    op.execute(
+        """
+        INSERT INTO study_summary (
+            config_id, study_id, total_submissions, complete_submissions,
+            response_count, response_time_sum, last_submission_at
+        )
+        SELECT r.config_id,
+               min(r.study_id::text)::uuid,
+               count(*),
+               count(*) FILTER (WHERE r.responses >= coalesce(cardinality(f.experiment_image_list), 0)),
+               sum(r.responses),
+               sum(r.time_sum),
+               max(r.submitted)
+        FROM (
+            SELECT sr.id, sr.config_id, sr.study_id, sr.submitted,
+                   count(resp.id) AS responses,
+                   coalesce(sum(resp.response_time), 0) AS time_sum
+            FROM study_results sr
+            LEFT JOIN study_response resp ON resp.study_results_id = sr.id
+            WHERE sr.config_id IS NOT NULL
+            GROUP BY sr.id
+        ) r
+        LEFT JOIN files_config f ON f.study_config_id = r.config_id
+        GROUP BY r.config_id, f.experiment_image_list
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO study_answer_count (config_id, answer, count)
+        SELECT sr.config_id, resp.answer, count(*)
+        FROM study_response resp
+        JOIN study_results sr ON sr.id = resp.study_results_id
+        WHERE sr.config_id IS NOT NULL
+        GROUP BY sr.config_id, resp.answer
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('study_answer_count')
+    op.drop_index(op.f('ix_study_summary_study_id'), table_name='study_summary')
+    op.drop_table('study_summary')
@@ -0,0 +1,36 @@
+"""persisted indexed study code
+
+Revision ID: 5c1e8a9f0b47
+Revises: 781547d82d3f
+Create Date: 2026-10-18 09:12:31.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e8a9f0b47'
+down_revision: Union[str, None] = '781547d82d3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('study_config', sa.Column('study_code', sa.String(length=6), nullable=True))
+    # Backfill existing configurations with the same tail the expression index used
+    op.execute("UPDATE study_config SET study_code = right(replace(CAST(id AS TEXT), '-', ''), 6)")
+    op.alter_column('study_config', 'study_code', nullable=False)
+    op.create_index(op.f('ix_study_config_study_code'), 'study_config', ['study_code'], unique=True)
+    # The unique index on study_code now guards against tail collisions
+    op.drop_index('uq_study_configuration_uuid_tail6', table_name='study_config', postgresql_using='btree')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('uq_study_configuration_uuid_tail6', 'study_config', [sa.literal_column("right(replace(CAST(id AS TEXT), '-', ''), 6)")], unique=True, postgresql_using='btree')
+    op.drop_index(op.f('ix_study_config_study_code'), table_name='study_config')
+    op.drop_column('study_config', 'study_code')
@@ -0,0 +1,47 @@
+"""object inventory
+
+Revision ID: 8b4f2e7a1c93
+Revises: 3a9c6e1d4f02
+Create Date: 2026-10-18 17:02:44.518306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b4f2e7a1c93'
+down_revision: Union[str, None] = '3a9c6e1d4f02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Populated by the first reconciliation after deploy, see object_inventory_service
+    op.create_table(
+        'object_inventory',
+        sa.Column('key', sa.String(length=1024), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('etag', sa.String(length=128), nullable=True),
+        sa.Column('last_modified', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('owner', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('seen_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+    )
+    op.create_index(
+        'ix_object_inventory_key_pattern',
+        'object_inventory',
+        ['key'],
+        unique=False,
+        postgresql_ops={'key': 'text_pattern_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_object_inventory_key_pattern', table_name='object_inventory')
+    op.drop_table('object_inventory')
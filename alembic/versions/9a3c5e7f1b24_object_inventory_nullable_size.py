@@ -0,0 +1,29 @@
+"""object inventory nullable size
+
+Revision ID: 9a3c5e7f1b24
+Revises: f08a3b6c2d57
+Create Date: 2026-10-18 21:40:12.318604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a3c5e7f1b24'
+down_revision: Union[str, None] = 'f08a3b6c2d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('object_inventory', 'size', existing_type=sa.BigInteger(), nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("UPDATE object_inventory SET size = 0 WHERE size IS NULL")
+    op.alter_column('object_inventory', 'size', existing_type=sa.BigInteger(), nullable=False)
@@ -0,0 +1,97 @@
+"""study summary shards
+
+Revision ID: b6e8d0f2a4c7
+Revises: 9a3c5e7f1b24
+Create Date: 2026-10-18 23:05:47.206931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e8d0f2a4c7'
+down_revision: Union[str, None] = '9a3c5e7f1b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing totals become shard 0, new submissions spread over the other shards
+    op.drop_constraint('study_answer_count_config_id_fkey', 'study_answer_count', type_='foreignkey')
+    op.drop_constraint('study_answer_count_pkey', 'study_answer_count', type_='primary')
+    op.drop_constraint('study_summary_pkey', 'study_summary', type_='primary')
+
+    op.add_column('study_summary', sa.Column('shard', sa.SmallInteger(), server_default='0', nullable=False))
+    op.add_column('study_answer_count', sa.Column('shard', sa.SmallInteger(), server_default='0', nullable=False))
+
+    op.create_primary_key('study_summary_pkey', 'study_summary', ['config_id', 'shard'])
+    op.create_primary_key('study_answer_count_pkey', 'study_answer_count', ['config_id', 'shard', 'answer'])
+    op.create_foreign_key(
+        'study_answer_count_config_id_shard_fkey',
+        'study_answer_count',
+        'study_summary',
+        ['config_id', 'shard'],
+        ['config_id', 'shard'],
+        onupdate='CASCADE',
+        ondelete='CASCADE',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('study_answer_count_config_id_shard_fkey', 'study_answer_count', type_='foreignkey')
+    op.drop_constraint('study_answer_count_pkey', 'study_answer_count', type_='primary')
+    op.drop_constraint('study_summary_pkey', 'study_summary', type_='primary')
+
+    # Folds the shards back into one row per configuration
+    op.execute(
+        """
+        CREATE TEMP TABLE folded_answers AS
+        SELECT config_id, answer, sum(count) AS count
+        FROM study_answer_count GROUP BY config_id, answer
+        """
+    )
+    op.execute("DELETE FROM study_answer_count")
+    op.execute(
+        """
+        CREATE TEMP TABLE folded_summary AS
+        SELECT config_id, min(study_id::text)::uuid AS study_id,
+               sum(total_submissions)::int AS total_submissions,
+               sum(complete_submissions)::int AS complete_submissions,
+               sum(response_count)::bigint AS response_count,
+               sum(response_time_sum) AS response_time_sum,
+               max(last_submission_at) AS last_submission_at
+        FROM study_summary GROUP BY config_id
+        """
+    )
+    op.execute("DELETE FROM study_summary")
+    op.drop_column('study_answer_count', 'shard')
+    op.drop_column('study_summary', 'shard')
+    op.execute(
+        """
+        INSERT INTO study_summary (
+            config_id, study_id, total_submissions, complete_submissions,
+            response_count, response_time_sum, last_submission_at
+        )
+        SELECT * FROM folded_summary
+        """
+    )
+    op.execute("INSERT INTO study_answer_count (config_id, answer, count) SELECT * FROM folded_answers")
+    op.execute("DROP TABLE folded_summary")
+    op.execute("DROP TABLE folded_answers")
+
+    op.create_primary_key('study_summary_pkey', 'study_summary', ['config_id'])
+    op.create_primary_key('study_answer_count_pkey', 'study_answer_count', ['config_id', 'answer'])
+    op.create_foreign_key(
+        'study_answer_count_config_id_fkey',
+        'study_answer_count',
+        'study_summary',
+        ['config_id'],
+        ['config_id'],
+        onupdate='CASCADE',
+        ondelete='CASCADE',
+    )
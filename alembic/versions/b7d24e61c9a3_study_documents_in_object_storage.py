@@ -0,0 +1,46 @@
+"""study documents in object storage
+
+Revision ID: b7d24e61c9a3
+Revises: 5c1e8a9f0b47
+Create Date: 2026-10-18 11:40:02.918374
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d24e61c9a3'
+down_revision: Union[str, None] = '5c1e8a9f0b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('files_config', sa.Column('consent_form_key', sa.String(), nullable=True))
+    op.add_column('files_config', sa.Column('study_instructions_key', sa.String(), nullable=True))
+    op.add_column('files_config', sa.Column('study_debrief_key', sa.String(), nullable=True))
+    op.alter_column('files_config', 'consent_form_bytes',
+               existing_type=postgresql.BYTEA(),
+               nullable=True)
+    op.alter_column('files_config', 'study_instructions_bytes',
+               existing_type=postgresql.BYTEA(),
+               nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Documents moved to object storage must be copied back before downgrading
+    op.alter_column('files_config', 'study_instructions_bytes',
+               existing_type=postgresql.BYTEA(),
+               nullable=False)
+    op.alter_column('files_config', 'consent_form_bytes',
+               existing_type=postgresql.BYTEA(),
+               nullable=False)
+    op.drop_column('files_config', 'study_debrief_key')
+    op.drop_column('files_config', 'study_instructions_key')
+    op.drop_column('files_config', 'consent_form_key')
@@ -0,0 +1,28 @@
+"""object inventory sha256
+
+Revision ID: c25d7f0e9a14
+Revises: 8b4f2e7a1c93
+Create Date: 2026-10-18 18:11:05.904127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c25d7f0e9a14'
+down_revision: Union[str, None] = '8b4f2e7a1c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('object_inventory', sa.Column('sha256', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('object_inventory', 'sha256')
@@ -0,0 +1,40 @@
+"""study document hashes
+
+Revision ID: e41f07b2d865
+Revises: b7d24e61c9a3
+Create Date: 2026-10-18 13:05:47.551092
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41f07b2d865'
+down_revision: Union[str, None] = 'b7d24e61c9a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DOCUMENTS = ('consent_form', 'study_instructions', 'study_debrief')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for document in DOCUMENTS:
+        op.add_column('files_config', sa.Column(f'{document}_sha256', sa.String(length=64), nullable=True))
+        # Hash documents still stored inline; moved documents are hashed by the migration tool
+        op.execute(
+            f"UPDATE files_config SET {document}_sha256 = encode(sha256({document}_bytes), 'hex') "
+            f"WHERE {document}_bytes IS NOT NULL"
+        )
+    op.add_column('files_config', sa.Column('uploaded_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE files_config SET uploaded_at = now()")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('files_config', 'uploaded_at')
+    for document in reversed(DOCUMENTS):
+        op.drop_column('files_config', f'{document}_sha256')
@@ -0,0 +1,56 @@
+"""multipart upload
+
+Revision ID: f08a3b6c2d57
+Revises: c25d7f0e9a14
+Create Date: 2026-10-18 19:26:31.740512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f08a3b6c2d57'
+down_revision: Union[str, None] = 'c25d7f0e9a14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'multipart_upload',
+        sa.Column('upload_id', sa.String(length=1024), nullable=False),
+        sa.Column('key', sa.String(length=1024), nullable=False),
+        sa.Column('final_key', sa.String(length=1024), nullable=False),
+        sa.Column('owner', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('session_id', sa.String(length=255), nullable=False),
+        sa.Column('content_type', sa.String(length=255), nullable=True),
+        sa.Column('size', sa.BigInteger(), nullable=True),
+        sa.Column('etag', sa.String(length=128), nullable=True),
+        sa.Column(
+            'status',
+            sa.Enum('PENDING', 'COPYING', 'COMPLETED', 'ABORTED', name='multipart_status', native_enum=False),
+            nullable=False,
+        ),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finalized_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('complete_ms', sa.Float(), nullable=True),
+        sa.Column('copy_attempts', sa.Integer(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['owner'], ['user.id'], onupdate='CASCADE', ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('upload_id'),
+    )
+    op.create_index(op.f('ix_multipart_upload_owner'), 'multipart_upload', ['owner'], unique=False)
+    op.create_index(op.f('ix_multipart_upload_status'), 'multipart_upload', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_multipart_upload_status'), table_name='multipart_upload')
+    op.drop_index(op.f('ix_multipart_upload_owner'), table_name='multipart_upload')
+    op.drop_table('multipart_upload')
@@ -1,18 +1,82 @@
-from fastapi_users import models
+import uuid
+
+import jwt
+from fastapi_users import exceptions, models
 from fastapi_users.authentication import AuthenticationBackend, BearerTransport, JWTStrategy
+from fastapi_users.jwt import decode_jwt
+from fastapi_users.manager import BaseUserManager
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from models.user_model import User
 from settings import get_settings
+from utils.ttl_cache import TTLCache
 
 settings= get_settings()
 SECRET = settings.auth
 
 bearer_transport = BearerTransport(tokenUrl="auth/jwt/login")
 
+# Authenticated users keyed by (user id, token)
+user_cache = TTLCache("auth_users", settings.auth_user_cache_size, ttl=settings.auth_user_cache_ttl)
+
+
+def invalidate_cached_user(user_id: uuid.UUID):
+    """Drops every cached token of the user, called whenever the user row changes"""
+    user_cache.invalidate_where(lambda key: key[0] == user_id)
+
+
+def _detached_copy(user: User) -> User:
+    """Copies the loaded columns into a new instance that no session owns
+
+    Each request gets its own copy, and updates through the user manager still
+    merge into the existing row instead of inserting a new one.
+    """
+    values = {}
+    for attr in inspect(User).column_attrs:
+        value = getattr(user, attr.key)
+        values[attr.key] = list(value) if isinstance(value, list) else value
+    copy = User(**values)
+    make_transient_to_detached(copy)
+    return copy
+
+
+class CachedJWTStrategy(JWTStrategy[models.UP, models.ID]):
+    """JWT strategy that resolves recently seen tokens without loading the user row"""
+
+    async def read_token(
+        self, token: str | None, user_manager: BaseUserManager[models.UP, models.ID]
+    ) -> models.UP | None:
+        if token is None:
+            return None
+
+        # The signature and expiry are still verified on every request
+        try:
+            data = decode_jwt(
+                token, self.decode_key, self.token_audience, algorithms=[self.algorithm]
+            )
+            user_id = user_manager.parse_id(data["sub"])
+        except (jwt.PyJWTError, KeyError, exceptions.InvalidID):
+            return None
+
+        cached = user_cache.get((user_id, token))
+        if cached is not None:
+            return _detached_copy(cached)
+
+        try:
+            user = await user_manager.get(user_id)
+        except exceptions.UserNotExists:
+            return None
+        user_cache.set((user_id, token), _detached_copy(user))
+        return user
+
+
 def get_jwt_strategy() -> JWTStrategy[models.UP, models.ID]:
-    return JWTStrategy(secret=SECRET, lifetime_seconds=3600)
+    return CachedJWTStrategy(secret=SECRET, lifetime_seconds=3600)
 
 
 auth_backend = AuthenticationBackend(
     name="jwt",
     transport=bearer_transport,
     get_strategy=get_jwt_strategy,
-)
\ No newline at end of file
+)
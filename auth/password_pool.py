@@ -0,0 +1,72 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from fastapi_users.password import PasswordHelper
+
+from settings import get_settings
+from utils.metrics import LatencyWindow, register_metrics
+
+settings = get_settings()
+
+
+class PasswordHashPool:
+    """Runs password hashing and verification on a dedicated thread pool
+
+    Argon2 and bcrypt release the GIL while hashing, so a burst of logins
+    occupies the pool's workers instead of stalling the event loop. Calls
+    beyond the pool size wait their turn, that wait is reported separately
+    from the time spent hashing.
+    """
+
+    def __init__(self, max_workers: int, password_helper: Optional[PasswordHelper] = None):
+        self.password_helper = password_helper or PasswordHelper()
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hash"
+        )
+        self.queue_wait = LatencyWindow()
+        self.hash_duration = LatencyWindow()
+        self.pending = 0
+
+    async def run(self, func, *args):
+        """Runs one hashing call on the pool, timing the wait and the work"""
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+
+        def timed():
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self.queue_wait.add((start - submitted) * 1000)
+                self.hash_duration.add((time.perf_counter() - start) * 1000)
+
+        self.pending += 1
+        try:
+            return await loop.run_in_executor(self._executor, timed)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self.run(self.password_helper.hash, password)
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> tuple[bool, Optional[str]]:
+        return await self.run(
+            self.password_helper.verify_and_update, plain_password, hashed_password
+        )
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "pending": self.pending,
+            "queue_wait": self.queue_wait.summary(),
+            "hash": self.hash_duration.summary(),
+        }
+
+
+password_pool = PasswordHashPool(settings.password_hash_workers)
+register_metrics("password_hashing", password_pool.stats)
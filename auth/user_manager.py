@@ -2,12 +2,14 @@ import uuid
 from typing import Optional
 
 from fastapi import Depends, HTTPException, Request
-from fastapi_users import BaseUserManager, FastAPIUsers, UUIDIDMixin
+from fastapi.security import OAuth2PasswordRequestForm
+from fastapi_users import BaseUserManager, FastAPIUsers, UUIDIDMixin, exceptions, schemas
 
 from settings import get_settings
 from models.user_model import User
-from db.client import get_user_db
-from auth.authentication_backend import auth_backend
+from db.client import get_user_db, open_read_session
+from auth.authentication_backend import auth_backend, invalidate_cached_user
+from auth.password_pool import PasswordHashPool, password_pool
 from models.enums import UserRole
 
 settings = get_settings()
@@ -18,6 +20,57 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
     reset_password_token_secret = SECRET
     verification_token_secret = SECRET
 
+    def __init__(self, user_db, pool: PasswordHashPool = password_pool):
+        super().__init__(user_db, pool.password_helper)
+        self.password_pool = pool
+
+    # Hashing runs on the password pool, the rest follows BaseUserManager
+    async def create(
+        self, user_create: schemas.UC, safe: bool = False, request: Optional[Request] = None
+    ) -> User:
+        await self.validate_password(user_create.password, user_create)
+
+        existing_user = await self.user_db.get_by_email(user_create.email)
+        if existing_user is not None:
+            raise exceptions.UserAlreadyExists()
+
+        user_dict = (
+            user_create.create_update_dict()
+            if safe
+            else user_create.create_update_dict_superuser()
+        )
+        password = user_dict.pop("password")
+        user_dict["hashed_password"] = await self.password_pool.hash(password)
+
+        created_user = await self.user_db.create(user_dict)
+        await self.on_after_register(created_user, request)
+        return created_user
+
+    async def authenticate(self, credentials: OAuth2PasswordRequestForm) -> Optional[User]:
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            # Unknown emails still pay for a hash, so response times do not reveal them
+            await self.password_pool.hash(credentials.password)
+            return None
+
+        verified, updated_password_hash = await self.password_pool.verify_and_update(
+            credentials.password, user.hashed_password
+        )
+        if not verified:
+            return None
+        if updated_password_hash is not None:
+            await self.user_db.update(user, {"hashed_password": updated_password_hash})
+        return user
+
+    async def _update(self, user: User, update_dict: dict) -> User:
+        password = update_dict.get("password")
+        if password is not None:
+            await self.validate_password(password, user)
+            update_dict = {k: v for k, v in update_dict.items() if k != "password"}
+            update_dict["hashed_password"] = await self.password_pool.hash(password)
+        return await super()._update(user, update_dict)
+
     async def on_after_register(self, user: User, request: Optional[Request] = None):
         await self.user_db.update(user, {"role": [UserRole.RESEARCHER]})
         print(f"User {user.id} has registered.")
@@ -33,14 +86,35 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
     ):
         print(f"Verification requested for user {user.id}. Verification token: {token}")
 
+    # Cached authentications are dropped whenever the user row changes
+    async def on_after_update(
+        self, user: User, update_dict: dict, request: Optional[Request] = None
+    ):
+        invalidate_cached_user(user.id)
+
+    async def on_after_verify(self, user: User, request: Optional[Request] = None):
+        invalidate_cached_user(user.id)
+
+    async def on_after_reset_password(self, user: User, request: Optional[Request] = None):
+        invalidate_cached_user(user.id)
+
+    async def on_after_delete(self, user: User, request: Optional[Request] = None):
+        invalidate_cached_user(user.id)
+
     async def promote_to_admin(self,user:User, request: Optional[Request] = None):
-        return await self.user_db.update(user,{"role":[UserRole.ADMIN,UserRole.STAFF,UserRole.RESEARCHER]})
+        user = await self.user_db.update(user,{"role":[UserRole.ADMIN,UserRole.STAFF,UserRole.RESEARCHER]})
+        invalidate_cached_user(user.id)
+        return user
     
     async def promote_to_staff(self,user:User, request: Optional[Request] = None):
-        return await self.user_db.update(user,{"role":[UserRole.STAFF,UserRole.RESEARCHER]})
+        user = await self.user_db.update(user,{"role":[UserRole.STAFF,UserRole.RESEARCHER]})
+        invalidate_cached_user(user.id)
+        return user
     
     async def demote_user(self,user:User, request: Optional[Request] = None):
-        return await self.user_db.update(user,{"role":[UserRole.RESEARCHER]})
+        user = await self.user_db.update(user,{"role":[UserRole.RESEARCHER]})
+        invalidate_cached_user(user.id)
+        return user
 
 # DI
 async def get_user_manager(user_db=Depends(get_user_db)):
@@ -63,3 +137,9 @@ def require_role(*allowed_roles: UserRole):
         return user
 
     return checker
+
+
+async def get_user_read_db_session(user: User = Depends(current_active_user)):
+    """Read-only session for the current user, on the primary right after they wrote"""
+    async with open_read_session(user.id) as session:
+        yield session
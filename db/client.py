@@ -1,18 +1,196 @@
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+from uuid import UUID, uuid4
 from fastapi import Depends
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
-from settings import get_settings
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from settings import Settings, get_settings
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from models.user_model import User
+from utils.metrics import register_metrics
+from utils.ttl_cache import TTLCache
 
 settings = get_settings()
-engine=create_async_engine(settings.connection_string,echo=True)
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid4()}__"
+
+
+def engine_options(
+    settings: Settings, url: Optional[str] = None, read_only: bool = False
+) -> dict:
+    """Keyword arguments for create_async_engine from the #DATABASE settings
+
+    In pooler mode, server connections are shared between clients by PgBouncer
+    in transaction mode. Prepared statements are then neither cached nor given
+    per-connection names, and pooling is left to the pooler.
+    """
+    options = {
+        "echo": settings.db_echo,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    if settings.db_pooler_mode and settings.db_pooler_pool_size == 0:
+        # Every checkout is a fresh connection, a ping would only add a round trip
+        options["poolclass"] = NullPool
+        options["pool_pre_ping"] = False
+    elif settings.db_pooler_mode:
+        # A few warm client connections, PgBouncer caps the server connections
+        options.update(
+            pool_size=settings.db_pooler_pool_size,
+            max_overflow=0,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    else:
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+
+    if make_url(url or settings.connection_string).get_driver_name() == "asyncpg":
+        server_settings = {"application_name": settings.db_application_name}
+        # PgBouncer rejects other startup parameters, set them on the role instead
+        if not settings.db_jit and not settings.db_pooler_mode:
+            # JIT compilation costs more than it saves on short OLTP queries
+            server_settings["jit"] = "off"
+        if read_only and not settings.db_pooler_mode:
+            # Writes routed to the replica by mistake fail instead of hitting the primary
+            server_settings["default_transaction_read_only"] = "on"
+        if settings.db_pooler_mode:
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": _unique_statement_name,
+                "server_settings": server_settings,
+            }
+        else:
+            options["connect_args"] = {
+                "statement_cache_size": settings.db_statement_cache_size,
+                "prepared_statement_cache_size": settings.db_statement_cache_size,
+                "server_settings": server_settings,
+            }
+    return options
+
+
+def sample_echo(engine: AsyncEngine, rate: float):
+    """Prints roughly `rate` of the executed statements instead of all of them"""
+    if rate <= 0:
+        return
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _echo(conn, cursor, statement, parameters, context, executemany):
+        if random.random() < rate:
+            print("SQL: ", " ".join(statement.split()))
+
+
+def pool_report(engine: AsyncEngine) -> dict:
+    """Effective engine and pool configuration, printed at startup"""
+    pool = engine.pool
+    connect_args = engine_options(
+        settings, engine.url, read_only=engine is read_engine
+    ).get("connect_args", {})
+    return {
+        "url": engine.url.render_as_string(hide_password=True),
+        "pool": type(pool).__name__,
+        "pool_size": pool.size() if hasattr(pool, "size") else None,
+        "max_overflow": getattr(pool, "_max_overflow", None),
+        "pool_timeout": getattr(pool, "_timeout", None),
+        "pool_recycle": pool._recycle,
+        "pool_pre_ping": pool._pre_ping,
+        "pooler_mode": settings.db_pooler_mode,
+        "statement_cache_size": connect_args.get("statement_cache_size"),
+        "server_settings": connect_args.get("server_settings"),
+        "echo": engine.echo,
+        "echo_sample_rate": settings.db_echo_sample_rate,
+    }
+
+
+engine = create_async_engine(settings.connection_string, **engine_options(settings))
+sample_echo(engine, settings.db_echo_sample_rate)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+register_metrics("db_pool", lambda: {"status": engine.pool.status()})
+
+#READ REPLICA
+read_engine: Optional[AsyncEngine] = None
+ReadSessionLocal = None
+if settings.read_replica_connection_string:
+    read_engine = create_async_engine(
+        settings.read_replica_connection_string,
+        **engine_options(settings, settings.read_replica_connection_string, read_only=True),
+    )
+    sample_echo(read_engine, settings.db_echo_sample_rate)
+    ReadSessionLocal = sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+
+# Users who wrote recently read from the primary until the replica has caught up
+recent_writers = TTLCache(
+    "recent_writers", settings.read_your_writes_cache_size, ttl=settings.read_your_writes_window
+)
+_replica_down_until = 0.0
+_read_stats = {"replica": 0, "primary_fallback": 0, "read_your_writes": 0, "replica_errors": 0}
+register_metrics("read_routing", lambda: dict(_read_stats))
+
+
+def mark_recent_write(user_id: UUID):
+    """Routes the user's reads to the primary for `read_your_writes_window` seconds"""
+    recent_writers.set(user_id, True)
+
+
+def read_session_factory(user_id: Optional[UUID] = None):
+    """Returns the session factory a read should use, the primary unless the replica is usable"""
+    if ReadSessionLocal is None:
+        return AsyncSessionLocal
+    if user_id is not None and recent_writers.get(user_id):
+        _read_stats["read_your_writes"] += 1
+        return AsyncSessionLocal
+    if time.monotonic() < _replica_down_until:
+        _read_stats["primary_fallback"] += 1
+        return AsyncSessionLocal
+    _read_stats["replica"] += 1
+    return ReadSessionLocal
+
+
+@asynccontextmanager
+async def open_read_session(user_id: Optional[UUID] = None):
+    """Opens a read-only session on the replica, falling back to the primary
+
+    A replica that cannot be reached is skipped for `read_replica_retry_interval` seconds.
+    """
+    global _replica_down_until
+    factory = read_session_factory(user_id)
+    session = None
+    if factory is not AsyncSessionLocal:
+        session = factory()
+        try:
+            # Checks out a connection now so an unreachable replica fails before the query
+            await session.connection()
+        except (OSError, SQLAlchemyError) as e:
+            print("Read Replica Error: ", str(e))
+            await session.close()
+            session = None
+            _replica_down_until = time.monotonic() + settings.read_replica_retry_interval
+            _read_stats["replica_errors"] += 1
+    if session is None:
+        session = AsyncSessionLocal()
+    async with session:
+        yield session
 
 async def get_db_session():
     """Create an asynchronous local database session"""
     async with AsyncSessionLocal() as session:
         yield session
 
+async def get_read_db_session():
+    """Create a read-only session on the replica, or the primary when there is none"""
+    async with open_read_session() as session:
+        yield session
+
 async def get_user_db(session: AsyncSession = Depends(get_db_session)):
-    yield SQLAlchemyUserDatabase(session, User)
\ No newline at end of file
+    yield SQLAlchemyUserDatabase(session, User)
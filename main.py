@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from routes.study_config_routes import router as ConfigRouter
 from routes.study_retrieval_routes import router as RetrievalRouter
@@ -11,11 +12,39 @@ from routes.staff_routes import router as StaffRouter
 import uvicorn as uv
 from fastapi.middleware.cors import CORSMiddleware
 from settings import get_settings
+from db.client import AsyncSessionLocal, engine, pool_report, read_engine
+from services.multipart_service import start_multipart_copier
+from services.object_inventory_service import start_inventory_reconciler
+from services.results_spool import start_results_spool
 import models.all_models  # noqa: F401
 
+settings = get_settings()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("Database Pool: ", pool_report(engine))
+    if read_engine is not None:
+        print("Read Replica Pool: ", pool_report(read_engine))
+    # Replays anything left in the spool by a previous run before new submissions
+    drainer = None
+    if settings.results_ingestion_mode == "spool":
+        drainer = start_results_spool(AsyncSessionLocal)
+    reconciler = start_inventory_reconciler(AsyncSessionLocal)
+    # Picks up copies left pending by a previous run
+    copier = start_multipart_copier(AsyncSessionLocal)
+    yield
+    if copier:
+        await copier.stop()
+    if reconciler:
+        reconciler.cancel()
+    if drainer:
+        await drainer.stop()
+
 # Initialize FastAPI App
 app = FastAPI(
     root_path="/api",
+    lifespan=lifespan,
     docs_url=None,
     redoc_url=None,
     openapi_url=None
@@ -25,7 +54,6 @@ app = FastAPI(
 )
 
 app.router.redirect_slashes = False 
-settings = get_settings()
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,5 +14,9 @@ import models.uploaded_files_model
 #RESULTS
 import models.study_result_model
 import models.study_response_model
+import models.study_summary_model
+#STORAGE
+import models.object_inventory_model
+import models.multipart_upload_model
 #USERS
 import models.user_model
\ No newline at end of file
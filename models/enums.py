@@ -17,3 +17,22 @@ class UserRole(str,Enum):
     RESEARCHER = "researcher"
     STAFF = "staff"
     ADMIN = "admin"
+
+class StudyDocument(str,Enum):
+    CONSENT_FORM = "consent_form"
+    STUDY_INSTRUCTIONS = "study_instructions"
+    STUDY_DEBRIEF = "study_debrief"
+
+class ExportFormat(str,Enum):
+    CSV = "csv"
+    PARQUET = "parquet"
+    ARROW = "arrow"
+
+class MultipartStatus(str,Enum):
+    PENDING = "pending"
+    # Completed at a staging key, waiting for the deferred copy to the final key
+    COPYING = "copying"
+    COMPLETED = "completed"
+    ABORTED = "aborted"
+    # The deferred copy used up its attempts, the staged object is left for inspection
+    FAILED = "failed"
@@ -0,0 +1,62 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, Enum as SqlEnum, Float, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+import uuid
+from models.base_model import Base
+from models.enums import MultipartStatus
+
+
+class MultipartUpload(Base):
+    """
+    Ownership and metadata of a multipart upload.
+
+    Looked up by upload id when parts are signed and the upload is completed,
+    so finalizing never has to HEAD the object to re-check its owner.
+    """
+    __tablename__ = "multipart_upload"
+
+    upload_id: Mapped[str] = mapped_column(String(1024), primary_key=True)
+
+    # Key the upload was created at, the final key unless a deferred copy is needed
+    key: Mapped[str] = mapped_column(String(1024), nullable=False)
+
+    final_key: Mapped[str] = mapped_column(String(1024), nullable=False)
+
+    # OWNER ID (FK, 1:MANY)
+    owner: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("user.id", ondelete="CASCADE", onupdate="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+
+    session_id: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    content_type: Mapped[str] = mapped_column(String(255), nullable=True)
+
+    # Declared by the client on create, kept on complete only when an expected size check confirmed it
+    size: Mapped[int] = mapped_column(BigInteger, nullable=True)
+
+    etag: Mapped[str] = mapped_column(String(128), nullable=True)
+
+    status: Mapped[MultipartStatus] = mapped_column(
+        SqlEnum(MultipartStatus, name="multipart_status", native_enum=False),
+        nullable=False,
+        default=MultipartStatus.PENDING,
+        index=True,
+    )
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    completed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # Object available at the final key
+    finalized_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # Time spent handling the complete request
+    complete_ms: Mapped[float] = mapped_column(Float, nullable=True)
+
+    copy_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    error: Mapped[str] = mapped_column(String, nullable=True)
@@ -0,0 +1,43 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, Index, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+import uuid
+from models.base_model import Base
+
+
+class ObjectInventory(Base):
+    """
+    Local index of the objects in the R2 bucket.
+
+    Written on every upload, completion and delete, and periodically
+    reconciled against a full bucket listing, so file listings never call R2.
+    """
+    __tablename__ = "object_inventory"
+    __table_args__ = (
+        # Lets prefix filters (key LIKE 'prefix%') use the index under any collation
+        Index(
+            "ix_object_inventory_key_pattern",
+            "key",
+            postgresql_ops={"key": "text_pattern_ops"},
+        ),
+    )
+
+    # OBJECT KEY (PK, also the keyset pagination cursor)
+    key: Mapped[str] = mapped_column(String(1024), primary_key=True)
+
+    # Unknown until the object is HEADed or listed, never taken from the client
+    size: Mapped[int] = mapped_column(BigInteger, nullable=True)
+
+    etag: Mapped[str] = mapped_column(String(128), nullable=True)
+
+    last_modified: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    # Hex SHA-256 of the object, only set once its stored checksum confirmed a manifest's hash
+    sha256: Mapped[str] = mapped_column(String(64), nullable=True)
+
+    # Uploading user, only known for objects uploaded through the API
+    owner: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=True)
+
+    # Start of the last reconciliation that saw the object in the bucket
+    seen_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, Index, Text, cast, func
+from sqlalchemy import ForeignKey, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import uuid
@@ -33,6 +33,16 @@ class StudyConfiguration(Base):
         ForeignKey("study.id", ondelete="CASCADE", onupdate="CASCADE"),
     )
 
+    # STUDY CODE (UUID TAIL)
+    # Persisted so participant lookups are a single probe on a unique index
+    # The unique index also guards against collisions on the UUID tail
+    study_code: Mapped[str] = mapped_column(
+        String(TAIL_LEN),
+        nullable=False,
+        unique=True,
+        index=True
+    )
+
     learning: Mapped["LearningConfiguration"] = relationship(
         back_populates="study",
         cascade="all, delete-orphan",
@@ -72,16 +82,3 @@ class StudyConfiguration(Base):
     # REFERENCE TO STUDY RESULTS ONE-TO-MANY
     results: Mapped[list["StudyResults"]] = relationship()
 
-    #Constraint that avoids collisions on the UUID tail
-    #Used to verify no duplicate study codes
-    __table_args__ = (
-        Index(
-            f"uq_study_configuration_uuid_tail{TAIL_LEN}",
-            func.right(
-                func.replace(cast(id, Text), "-", ""),
-                TAIL_LEN,
-            ),
-            unique=True,
-            postgresql_using="btree",
-        ),
-    )
@@ -0,0 +1,67 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, Float, ForeignKey, ForeignKeyConstraint, Integer, SmallInteger
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+import uuid
+from models.base_model import Base
+
+
+class StudySummaryStats(Base):
+    """
+    Running totals for a study configuration's submissions.
+
+    Maintained incrementally in the same transaction as each submission and
+    result deletion, so dashboard summaries never aggregate raw responses.
+    Totals are split across shards picked from the subject ID, so concurrent
+    submissions to one configuration rarely wait on the same row lock.
+    Readers sum the shards.
+    """
+    __tablename__ = "study_summary"
+
+    # CONFIG ID (PK, FK 1:MANY)
+    config_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("study_config.id", ondelete="CASCADE", onupdate="CASCADE"),
+        primary_key=True,
+    )
+
+    shard: Mapped[int] = mapped_column(SmallInteger, primary_key=True, default=0)
+
+    # STUDY ID (FK, 1:MANY)
+    study_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("study.id", ondelete="CASCADE", onupdate="CASCADE"),
+        index=True,
+    )
+
+    total_submissions: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # Submissions with a response for every experiment image
+    complete_submissions: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    response_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    response_time_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+
+    last_submission_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+
+
+class StudyAnswerCount(Base):
+    """Answer histogram bucket for one shard of a study configuration"""
+    __tablename__ = "study_answer_count"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["config_id", "shard"],
+            ["study_summary.config_id", "study_summary.shard"],
+            ondelete="CASCADE",
+            onupdate="CASCADE",
+        ),
+    )
+
+    config_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+
+    shard: Mapped[int] = mapped_column(SmallInteger, primary_key=True, default=0)
+
+    answer: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
@@ -1,11 +1,14 @@
 import uuid
+from datetime import datetime
 
-from sqlalchemy import String, ForeignKey, ARRAY
+from sqlalchemy import DateTime, String, ForeignKey, ARRAY
 from sqlalchemy.dialects.postgresql import UUID, BYTEA
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base_model import Base
 from .study_config_model import StudyConfiguration
 
+BLOB_COLUMN = {"deferred": True, "deferred_group": "blobs", "deferred_raiseload": True}
+
 
 class UploadedFiles(Base):
     __tablename__ = "files_config"
@@ -20,7 +23,14 @@ class UploadedFiles(Base):
 
     consent_form: Mapped[str] = mapped_column(String, nullable=False)
 
-    consent_form_bytes: Mapped[BYTEA] = mapped_column(BYTEA, nullable=False)
+    # Legacy storage, NULL once the document lives in object storage
+    # Blob columns are deferred and raise on lazy access so loading the row
+    # never drags document bytes; select the column explicitly to read them
+    consent_form_bytes: Mapped[BYTEA] = mapped_column(BYTEA, nullable=True, **BLOB_COLUMN)
+
+    consent_form_key: Mapped[str] = mapped_column(String, nullable=True)
+
+    consent_form_sha256: Mapped[str] = mapped_column(String(64), nullable=True)
 
     learning_image_list: Mapped[list[str]] = mapped_column(ARRAY(String), nullable=False)
 
@@ -28,11 +38,22 @@ class UploadedFiles(Base):
 
     study_instructions: Mapped[str] = mapped_column(String, nullable=False)
 
-    study_instructions_bytes: Mapped[BYTEA] = mapped_column(BYTEA, nullable=False)
+    study_instructions_bytes: Mapped[BYTEA] = mapped_column(BYTEA, nullable=True, **BLOB_COLUMN)
+
+    study_instructions_key: Mapped[str] = mapped_column(String, nullable=True)
+
+    study_instructions_sha256: Mapped[str] = mapped_column(String(64), nullable=True)
 
     study_debrief: Mapped[str] = mapped_column(String, nullable=True)
 
-    study_debrief_bytes: Mapped[BYTEA] = mapped_column(BYTEA, nullable=True)
+    study_debrief_bytes: Mapped[BYTEA] = mapped_column(BYTEA, nullable=True, **BLOB_COLUMN)
+
+    study_debrief_key: Mapped[str] = mapped_column(String, nullable=True)
+
+    study_debrief_sha256: Mapped[str] = mapped_column(String(64), nullable=True)
+
+    # Used for Last-Modified on document responses
+    uploaded_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
 
     # REFERENCE TO STUDY CONFIG
     study: Mapped[StudyConfiguration] = relationship(back_populates="files")
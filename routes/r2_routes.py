@@ -1,13 +1,14 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import json
 from pathlib import Path
 import re
-from typing import Dict, List, Optional
+from typing import Optional
 from uuid import uuid4
-from botocore.client import BaseClient
 from fastapi import APIRouter, Depends, HTTPException, Response
 from fastapi.params import Query
 from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.client import AsyncSessionLocal, get_db_session
 from auth.user_manager import require_role
 from models.enums import UserRole
 from schemas.r2_schemas import (
@@ -21,15 +22,46 @@ from schemas.r2_schemas import (
     DeleteFileRequest,
     FileInfoList,
     PaginateResponse,
+    R2JobStatus,
     SignPartReq,
     SignPartRes,
 )
-from services.r2_client import get_r2_read_client, get_r2_rw_client
+from services.r2_client import (
+    AsyncR2Client,
+    get_r2_read_client,
+    get_r2_read_signer,
+    get_r2_rw_client,
+)
+from services.document_storage import R2DocumentStorage, migrate_documents_to_storage
+from services.multipart_service import (
+    DEFERRED,
+    abort_upload,
+    complete_upload,
+    create_upload,
+    final_key_is_free,
+    get_multipart_copier,
+    get_owned_upload,
+)
+from services.object_inventory_service import (
+    inventory_entry,
+    list_all_objects,
+    list_objects_page,
+    reconcile_inventory,
+    record_objects,
+)
+from services.r2_jobs import (
+    ABORT_MPUS,
+    ABORT_STALE_MPUS,
+    CLEAR_BUCKET,
+    get_job,
+    resume_job,
+    start_job,
+)
+from services.r2_signer import PresignedUrlSigner
 from services.r2_service import (
     delete_file_from_bucket,
     generate_image_url,
-    get_all_files_from_bucket,
-    get_file_info_page,
+    verify_manifest_items,
 )
 from settings import Settings, get_settings
 
@@ -43,9 +75,9 @@ PRESIGN_TTL = 15 * 60
 async def get_image_url(
     filename: str,
     settings: Settings = Depends(get_settings),
-    client: BaseClient = Depends(get_r2_read_client),
+    signer: PresignedUrlSigner = Depends(get_r2_read_signer),
 ):
-    return generate_image_url(client, settings.r2_bucket_name, filename)
+    return await generate_image_url(signer, settings.r2_bucket_name, filename)
 
 
 @router.delete("/delete_file")
@@ -53,33 +85,41 @@ async def delete_file(
     payload: DeleteFileRequest,
     user=Depends(require_role(UserRole.STAFF)),
     settings: Settings = Depends(get_settings),
-    client: BaseClient = Depends(get_r2_rw_client),
+    client: AsyncR2Client = Depends(get_r2_rw_client),
+    conn: AsyncSession = Depends(get_db_session),
 ):
-    return delete_file_from_bucket(client, settings.r2_bucket_name, payload.filename)
+    return await delete_file_from_bucket(
+        client, settings.r2_bucket_name, payload.filename, conn
+    )
 
 
 @router.get("/get_all_file_info", response_model=FileInfoList)
 async def get_all_file_info(
     user=Depends(require_role(UserRole.STAFF)),
-    settings: Settings = Depends(get_settings),
-    client: BaseClient = Depends(get_r2_read_client),
+    prefix: Optional[str] = Query(None),
+    search: Optional[str] = Query(None, description="Case insensitive substring of the key"),
+    conn: AsyncSession = Depends(get_db_session),
 ) -> FileInfoList:
-    return get_all_files_from_bucket(client, settings.r2_bucket_name)
+    """Lists objects from the local inventory, no R2 calls are made"""
+    return await list_all_objects(conn, prefix=prefix, search=search)
 
 
 @router.get("/get_file_page", response_model=PaginateResponse)
 async def get_file_page(
     user=Depends(require_role(UserRole.STAFF)),
     max_keys: Optional[int] = Query(25, ge=1, le=1000),
-    next_token: Optional[str] = Query(None),
-    settings: Settings = Depends(get_settings),
-    client: BaseClient = Depends(get_r2_read_client),
+    next_token: Optional[str] = Query(None, description="Last key of the previous page"),
+    prefix: Optional[str] = Query(None),
+    search: Optional[str] = Query(None, description="Case insensitive substring of the key"),
+    conn: AsyncSession = Depends(get_db_session),
 ) -> PaginateResponse:
-    return get_file_info_page(
-        client=client,
-        bucket=settings.r2_bucket_name,
-        next_token=next_token,
+    """Lists a page of objects from the local inventory, no R2 calls are made"""
+    return await list_objects_page(
+        conn,
         max_keys=max_keys,
+        next_token=next_token,
+        prefix=prefix,
+        search=search,
     )
 
 
@@ -87,33 +127,32 @@ async def get_file_page(
 async def create_mpu(
     body: CreateReq,
     user=Depends(require_role(UserRole.STAFF)),
-    client: BaseClient = Depends(get_r2_rw_client),
+    client: AsyncR2Client = Depends(get_r2_rw_client),
     settings: Settings = Depends(get_settings),  # or remove if not multi-tenant
+    conn: AsyncSession = Depends(get_db_session),
 ):
     session_id = body.sessionId or "default"
-    prefix = user_prefix(user.id, session_id)
-
-    # Add sanitized filename to metadata
-    safe_name = safe_filename(body.name)
-    metadata = {"owner": str(user.id), "session": session_id, "basename": safe_name}
+    # Uploads are flattened to their sanitized filename
+    final_key = safe_filename(body.name)
 
-    key = make_object_key(prefix, safe_name)
-
-    if body.type and body.type.strip():
-        resp = client.create_multipart_upload(
-            Bucket=settings.r2_bucket_name,
-            Key=key,
-            ContentType=body.type,
-            Metadata=metadata,
-        )
+    if settings.mpu_finalize_mode != DEFERRED and await final_key_is_free(final_key, conn):
+        key = final_key
     else:
-        resp = client.create_multipart_upload(
-            Bucket=settings.r2_bucket_name,
-            Key=key,
-            Metadata=metadata,
-        )
-
-    return {"uploadId": resp["UploadId"], "key": key}
+        # Replacing an existing object goes through a staging key, so it stays intact until the copy
+        key = make_object_key(user_prefix(user.id, session_id), final_key)
+
+    upload = await create_upload(
+        client,
+        settings.r2_bucket_name,
+        user.id,
+        session_id,
+        key,
+        final_key,
+        conn,
+        content_type=body.type.strip() if body.type and body.type.strip() else None,
+        size=body.size,
+    )
+    return {"uploadId": upload.upload_id, "key": upload.key}
 
 
 def safe_filename(name: str) -> str:
@@ -138,23 +177,12 @@ def make_object_key(prefix: str, original_name: str) -> str:
 async def sign_part(
     body: SignPartReq,
     user=Depends(require_role(UserRole.STAFF)),
-    client: BaseClient = Depends(get_r2_rw_client),
+    client: AsyncR2Client = Depends(get_r2_rw_client),
     settings: Settings = Depends(get_settings),
+    conn: AsyncSession = Depends(get_db_session),
 ):
-    # Recompute the allowed prefix from claims and derive the sessionId from the key.
-    # Minimal pattern: sessionId is the 4th segment after the user/org parts in your scheme.
-    # Adjust this parser to your exact key shape.
-    # Example parser (quick and dirty):
-    try:
-        session_id = body.key.split("/")[3]  # [...]/u/<uid>/<session>/files/<uuid>-name
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid key")
-
-    prefix = user_prefix(user.id, session_id)
-    try:
-        assert_key_under_prefix(body.key, prefix)
-    except ValueError:
-        raise HTTPException(status_code=403, detail="Key not owned by caller")
+    # Ownership is recorded when the upload is created
+    await get_owned_upload(body.uploadId, body.key, user.id, conn)
 
     url = client.generate_presigned_url(
         ClientMethod="upload_part",
@@ -170,94 +198,38 @@ async def sign_part(
     return {"url": url, "headers": {}}
 
 
-def assert_key_under_prefix(key: str, prefix: str):
-    if not key.startswith(prefix):
-        raise ValueError("Key outside allowed prefix")
-
-
 @router.post("/s3-multipart/complete", response_model=CompleteRes)
 async def complete_mpu(
     body: CompleteReq,
     user=Depends(require_role(UserRole.STAFF)),
-    client: BaseClient = Depends(get_r2_rw_client),
+    client: AsyncR2Client = Depends(get_r2_rw_client),
     settings: Settings = Depends(get_settings),
+    conn: AsyncSession = Depends(get_db_session),
 ):
-    # Ownership check
-    try:
-        session_id = body.key.split("/")[3]
-        prefix = user_prefix(user.id, session_id)
-        assert_key_under_prefix(body.key, prefix)
-    except Exception:
-        raise HTTPException(status_code=403, detail="Key not owned by caller")
-
-    parts = [p.normalized() for p in body.parts]
-    resp = client.complete_multipart_upload(
-        Bucket=settings.r2_bucket_name,
-        Key=body.key,
-        UploadId=body.uploadId,
-        MultipartUpload={"Parts": parts},
-    )
-
-    # Optional safety: verify owner metadata still matches the caller
-    head = client.head_object(Bucket=settings.r2_bucket_name, Key=body.key)
-    if head.get("Metadata", {}).get("owner") != str(user.id):
-        # Roll back to be safe
-        client.delete_object(Bucket=settings.r2_bucket_name, Key=body.key)
-        raise HTTPException(status_code=403, detail="Ownership metadata mismatch")
-
-    # Optional sanity check with expectedSize (from your hook)
-    if body.expectedSize is not None and head["ContentLength"] != body.expectedSize:
-        client.delete_object(Bucket=settings.r2_bucket_name, Key=body.key)
-        raise HTTPException(status_code=409, detail="Size mismatch after complete")
-
-    # Overwrite and flatten
-    final_key = final_name_from_meta(head, body.key)
-
-    # location = resp.get("Location") or f"s3://{settings.r2_bucket_name}/{body.key}"
-    # return {"location": location, "key": body.key, "etag": resp.get("ETag")}
-
-    client.copy_object(
-        Bucket=settings.r2_bucket_name,
-        CopySource={"Bucket": settings.r2_bucket_name, "Key": body.key},
-        Key=final_key,  # <- filename only
-        Metadata=head.get("Metadata", {}),  # keep owner/session/basename
-        MetadataDirective="REPLACE",
-        ContentType=head.get("ContentType", "application/octet-stream"),
+    """Completes an upload, staged uploads are copied to their final key in the background"""
+    upload = await get_owned_upload(body.uploadId, body.key, user.id, conn)
+    return await complete_upload(
+        client,
+        settings.r2_bucket_name,
+        upload,
+        [p.normalized() for p in body.parts],
+        conn,
+        expected_size=body.expectedSize,
+        copier=get_multipart_copier(),
     )
-    client.delete_object(Bucket=settings.r2_bucket_name, Key=body.key)
-
-    # Return final location + key to the client
-    location = f"s3://{settings.r2_bucket_name}/{final_key}"
-    return {"location": location, "key": final_key, "etag": resp.get("ETag")}
-
-
-def final_name_from_meta(head: dict, staging_key: str) -> str:
-    meta = head.get("Metadata", {})
-    if meta.get("basename"):
-        return meta["basename"]
-    # Fallback: drop leading "<32hex>-"
-    last = staging_key.rsplit("/", 1)[-1]
-    return re.sub(r"^[0-9a-f]{32}-", "", last)
 
 
 @router.delete("/s3-multipart/abort", status_code=204)
 async def abort_mpu(
     body: AbortReq,
     user=Depends(require_role(UserRole.STAFF)),
-    client: BaseClient = Depends(get_r2_rw_client),
+    client: AsyncR2Client = Depends(get_r2_rw_client),
     settings: Settings = Depends(get_settings),
+    conn: AsyncSession = Depends(get_db_session),
 ):
     # Same ownership check pattern as above
-    try:
-        session_id = body.key.split("/")[3]
-        prefix = user_prefix(user.id, session_id)
-        assert_key_under_prefix(body.key, prefix)
-    except Exception:
-        raise HTTPException(status_code=403, detail="Key not owned by caller")
-
-    client.abort_multipart_upload(
-        Bucket=settings.r2_bucket_name, Key=body.key, UploadId=body.uploadId
-    )
+    upload = await get_owned_upload(body.uploadId, body.key, user.id, conn)
+    await abort_upload(client, settings.r2_bucket_name, upload, conn)
     return Response(status_code=204)
 
 
@@ -266,8 +238,9 @@ async def commit_archive(
     sessionId: str,
     body: CommitReq,
     user=Depends(require_role(UserRole.STAFF)),
-    client: BaseClient = Depends(get_r2_rw_client),
+    client: AsyncR2Client = Depends(get_r2_rw_client),
     settings: Settings = Depends(get_settings),
+    conn: AsyncSession = Depends(get_db_session),
 ):
     prefix = user_prefix(user.id, sessionId)
 
@@ -277,29 +250,33 @@ async def commit_archive(
             raise HTTPException(
                 status_code=403, detail=f"Key outside session prefix: {item.key}"
             )
-        head = client.head_object(Bucket=settings.r2_bucket_name, Key=item.key)
-        if head["ContentLength"] != item.size:
-            raise HTTPException(status_code=409, detail=f"Size mismatch for {item.key}")
-        if head.get("Metadata", {}).get("owner") != str(user.id):
-            raise HTTPException(status_code=403, detail=f"Not owner of {item.key}")
+    await verify_manifest_items(
+        client, settings.r2_bucket_name, body.items, str(user.id), conn
+    )
 
     # Write manifest under the *same* scoped area
     manifest_key = prefix.replace("/files/", "/") + "manifest.json"
-    client.put_object(
+    manifest = json.dumps(
+        {
+            "userId": str(user.id),
+            "sessionId": sessionId,
+            "items": [i.model_dump() for i in body.items],
+            "version": 1,
+            "createdAt": datetime.now(timezone.utc).isoformat(),
+        },
+        separators=(",", ":"),
+    ).encode()
+    resp = await client.put_object(
         Bucket=settings.r2_bucket_name,
         Key=manifest_key,
-        Body=json.dumps(
-            {
-                "userId": str(user.id),
-                "sessionId": sessionId,
-                "items": [i.model_dump() for i in body.items],
-                "version": 1,
-                "createdAt": datetime.now(timezone.utc).isoformat(),
-            },
-            separators=(",", ":"),
-        ).encode(),
+        Body=manifest,
         ContentType="application/json",
     )
+    await record_objects(
+        [inventory_entry(manifest_key, len(manifest), resp.get("ETag"), owner=user.id)],
+        conn,
+    )
+    await conn.commit()
 
     # Optional: copy to final/ with same scoping
     # ...
@@ -307,124 +284,122 @@ async def commit_archive(
     return {"ok": True, "manifestKey": manifest_key}
 
 
-@router.post("/admin/r2/abort-staging-mpus")
+@router.post("/admin/r2/abort-staging-mpus", status_code=202, response_model=R2JobStatus)
 async def abort_all_staging_mpus(
     prefix: str = Query("staging/", description="Must start with 'staging/'"),
+    key_marker: Optional[str] = Query(None, description="Resume listing from a reported cursor"),
+    upload_id_marker: Optional[str] = Query(None),
     user=Depends(require_role(UserRole.ADMIN)),  # tighten to ADMIN for safety
-    client: BaseClient = Depends(get_r2_rw_client),
+    client: AsyncR2Client = Depends(get_r2_rw_client),
     settings: Settings = Depends(get_settings),
 ):
+    """Starts a background job aborting every multipart upload under the prefix"""
     if not prefix.startswith("staging/"):
         raise HTTPException(status_code=400, detail="Prefix must start with 'staging/'")
 
-    aborted = 0
-    scanned = 0
-    key_marker = None
-    upload_id_marker = None
-
-    while True:
-        if key_marker and upload_id_marker:
-            resp = (
-                client.list_multipart_uploads(
-                    Bucket=settings.r2_bucket_name,
-                    Prefix=prefix,
-                    KeyMarker=key_marker,
-                    UploadIdMarker=upload_id_marker,
-                )
-                or {}
-            )
-        else:
-            resp = (
-                client.list_multipart_uploads(
-                    Bucket=settings.r2_bucket_name,
-                    Prefix=prefix,
-                )
-                or {}
-            )
+    continuation = None
+    if key_marker and upload_id_marker:
+        continuation = {"key_marker": key_marker, "upload_id_marker": upload_id_marker}
+    return start_job(
+        ABORT_MPUS,
+        client,
+        settings.r2_bucket_name,
+        prefix=prefix,
+        continuation=continuation,
+        session_factory=AsyncSessionLocal,
+    )
 
-        for u in resp.get("Uploads", []):
-            scanned += 1
-            try:
-                client.abort_multipart_upload(
-                    Bucket=settings.r2_bucket_name,
-                    Key=u["Key"],
-                    UploadId=u["UploadId"],
-                )
-                aborted += 1
-            except Exception:
-                # already completed/aborted → ignore for idempotence
-                pass
-
-        if not resp.get("IsTruncated"):
-            break
-        key_marker = resp.get("NextKeyMarker")
-        upload_id_marker = resp.get("NextUploadIdMarker")
-
-    return JSONResponse(
-        {"ok": True, "prefix": prefix, "scanned": scanned, "aborted": aborted}
+
+@router.post("/admin/r2/abort-stale-mpus", status_code=202, response_model=R2JobStatus)
+async def abort_stale_mpus(
+    older_than_hours: float = Query(24, gt=0, description="Age of the oldest upload kept"),
+    prefix: str = Query("", description="Only uploads whose key starts with this"),
+    user=Depends(require_role(UserRole.ADMIN)),
+    client: AsyncR2Client = Depends(get_r2_rw_client),
+    settings: Settings = Depends(get_settings),
+):
+    """Starts a background job aborting recorded uploads left pending, including direct uploads outside staging/"""
+    created_before = datetime.now(timezone.utc) - timedelta(hours=older_than_hours)
+    return start_job(
+        ABORT_STALE_MPUS,
+        client,
+        settings.r2_bucket_name,
+        prefix=prefix,
+        continuation={"created_before": created_before.isoformat()},
+        session_factory=AsyncSessionLocal,
     )
 
 
-@router.delete("/admin/r2/clear_bucket")
-def delete_all_objects(
+@router.delete("/admin/r2/clear_bucket", status_code=202, response_model=R2JobStatus)
+async def delete_all_objects(
+    continuation_token: Optional[str] = Query(None, description="Resume listing from a reported cursor"),
     user=Depends(require_role(UserRole.ADMIN)),
-    client: BaseClient = Depends(get_r2_rw_client),
+    client: AsyncR2Client = Depends(get_r2_rw_client),
     settings: Settings = Depends(get_settings),
 ):
-    bucket = settings.r2_bucket_name
-    total_deleted = 0
-    total_scanned = 0
-    pages = 0
-
-    continuation_token: Optional[str] = None
-
-    while True:
-        if continuation_token:
-            resp = client.list_objects_v2(
-                Bucket=bucket,
-                ContinuationToken=continuation_token,
-                MaxKeys=1000,
-            )
-        else:
-            resp = client.list_objects_v2(
-                Bucket=bucket,
-                MaxKeys=1000,
-            )
+    """Starts a background job deleting every object in the bucket"""
+    continuation = None
+    if continuation_token:
+        continuation = {"continuation_token": continuation_token}
+    return start_job(
+        CLEAR_BUCKET,
+        client,
+        settings.r2_bucket_name,
+        continuation=continuation,
+        session_factory=AsyncSessionLocal,
+    )
 
-        if ("ResponseMetadata" not in resp) or (
-            resp["ResponseMetadata"].get("HTTPStatusCode") != 200
-        ):
-            raise HTTPException(status_code=500, detail="Could not list bucket objects")
-
-        contents: List[Dict] = resp.get("Contents", [])
-        pages += 1
-        total_scanned += len(contents)
-
-        if contents:
-            # Build delete batch (<=1000 per DeleteObjects)
-            to_delete = [{"Key": obj["Key"]} for obj in contents]
-            del_resp = client.delete_objects(
-                Bucket=bucket,
-                Delete={
-                    "Objects": to_delete
-                },
-            )
-            deleted_items = (
-                del_resp.get("Deleted", []) if isinstance(del_resp, dict) else []
-            )
-            total_deleted += len(deleted_items)
-            
 
-        if not resp.get("IsTruncated"):
-            break
-        continuation_token = resp.get("NextContinuationToken")
+@router.get("/admin/r2/jobs/{job_id}", response_model=R2JobStatus)
+async def get_r2_job(
+    job_id: str,
+    user=Depends(require_role(UserRole.ADMIN)),
+):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 
-    return JSONResponse(
-        {
-            "ok": True,
-            "bucket": bucket,
-            "pages_scanned": pages,
-            "objects_scanned": total_scanned,
-            "objects_deleted": total_deleted,
-        }
+@router.post("/admin/r2/jobs/{job_id}/resume", response_model=R2JobStatus)
+async def resume_r2_job(
+    job_id: str,
+    user=Depends(require_role(UserRole.ADMIN)),
+    client: AsyncR2Client = Depends(get_r2_rw_client),
+):
+    """Resumes a failed or cancelled job from its last continuation cursor"""
+    job = resume_job(job_id, client, session_factory=AsyncSessionLocal)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/admin/r2/inventory/reconcile")
+async def reconcile_object_inventory(
+    user=Depends(require_role(UserRole.ADMIN)),
+    client: AsyncR2Client = Depends(get_r2_read_client),
+    settings: Settings = Depends(get_settings),
+    conn: AsyncSession = Depends(get_db_session),
+):
+    """Reconciles the object inventory against a full bucket listing now"""
+    result = await reconcile_inventory(client, settings.r2_bucket_name, conn)
+    return JSONResponse({"ok": True, **result})
+
+
+@router.post("/admin/r2/migrate_documents")
+async def migrate_documents(
+    batch_size: int = Query(10, ge=1, le=100),
+    max_batches: Optional[int] = Query(None, ge=1),
+    user=Depends(require_role(UserRole.ADMIN)),
+    client: AsyncR2Client = Depends(get_r2_rw_client),
+    settings: Settings = Depends(get_settings),
+    conn: AsyncSession = Depends(get_db_session),
+):
+    """Moves consent/instructions/debrief BYTEA blobs into R2 in batches.
+
+    Each batch commits independently; re-run until "remaining" reaches 0."""
+    storage = R2DocumentStorage(client, settings.r2_bucket_name)
+    result = await migrate_documents_to_storage(
+        conn, storage, batch_size=batch_size, max_batches=max_batches
     )
+    return JSONResponse({"ok": True, **result})
@@ -1,31 +1,37 @@
+from functools import partial
 from uuid import UUID
 from fastapi import APIRouter, Depends, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-import io
-import csv
 
-from db.client import get_db_session
+from db.client import get_db_session, mark_recent_write, open_read_session
 from models.user_model import User
-from models.enums import UserRole
-from auth.user_manager import require_role
+from models.enums import ExportFormat, UserRole
+from auth.user_manager import get_user_read_db_session, require_role
 from schemas.const import TAIL_LEN
 from services.researcher_dashboard_service import (
     delete_study_config,
     delete_study_result,
-    get_all_study_responses,
     get_config_id,
-    get_study_response_by_id,
     get_study_codes,
     get_study_results_subject_id,
     get_study_results_study_id,
     get_all_study_results,
+    validate_ownership,
+)
+from services.study_summary_service import get_study_list, get_study_summary
+from services.results_export_service import (
+    export_body,
+    export_rows_stmt,
+    stream_export_rows,
 )
 from schemas.researcher_dashboard_schema import (
     ConfigDeleteRequest,
     ResultDeleteRequest,
     ResultsExportSchema,
+    StudyListResponse,
     StudyResultsSchema,
+    StudySummary,
 )
 
 router = APIRouter(prefix="/researcher", tags=["Researcher"])
@@ -34,17 +40,34 @@ router = APIRouter(prefix="/researcher", tags=["Researcher"])
 @router.get("/configurations")
 async def get_config_list(
     user: User = Depends(require_role(UserRole.RESEARCHER)),
-    conn: AsyncSession = Depends(get_db_session),
+    conn: AsyncSession = Depends(get_user_read_db_session),
 ):
     study_codes = await get_study_codes(conn, user.id)
     return {"study_codes": study_codes}
 
 
+@router.get("/studies", response_model=StudyListResponse)
+async def get_studies(
+    user: User = Depends(require_role(UserRole.RESEARCHER)),
+    conn: AsyncSession = Depends(get_user_read_db_session),
+) -> StudyListResponse:
+    return await get_study_list(user.id, conn)
+
+
+@router.get("/summary/{study_id}", response_model=StudySummary)
+async def get_summary(
+    study_id: UUID,
+    user: User = Depends(require_role(UserRole.RESEARCHER)),
+    conn: AsyncSession = Depends(get_user_read_db_session),
+) -> StudySummary:
+    return await get_study_summary(study_id, user.id, conn)
+
+
 @router.get("/results/{study_id}", response_model=list[StudyResultsSchema])
 async def get_study_results_by_id(
     study_id: UUID,
     user: User = Depends(require_role(UserRole.RESEARCHER)),
-    conn: AsyncSession = Depends(get_db_session),
+    conn: AsyncSession = Depends(get_user_read_db_session),
 ) -> list[StudyResultsSchema]:
     return await get_study_results_study_id(study_id, user.id, conn)
 
@@ -53,7 +76,7 @@ async def get_study_results_by_id(
 async def get_study_results_by_subject(
     subject_id: UUID,
     user: User = Depends(require_role(UserRole.RESEARCHER)),
-    conn: AsyncSession = Depends(get_db_session),
+    conn: AsyncSession = Depends(get_user_read_db_session),
 ) -> StudyResultsSchema:
     return await get_study_results_subject_id(subject_id, user.id, conn)
 
@@ -61,7 +84,7 @@ async def get_study_results_by_subject(
 @router.get("/results", response_model=list[StudyResultsSchema])
 async def get_all(
     user: User = Depends(require_role(UserRole.RESEARCHER)),
-    conn: AsyncSession = Depends(get_db_session),
+    conn: AsyncSession = Depends(get_user_read_db_session),
 ) -> list[StudyResultsSchema]:
     return await get_all_study_results(user.id, conn)
 
@@ -73,6 +96,7 @@ async def delete_config(
     conn: AsyncSession = Depends(get_db_session),
 ):
     config_id = await get_config_id(user.id, payload.study_code, conn)
+    mark_recent_write(user.id)
     return await delete_study_config(config_id, user.id, conn)
 
 
@@ -82,102 +106,40 @@ async def delete_result(
     user: User = Depends(require_role(UserRole.RESEARCHER)),
     conn: AsyncSession = Depends(get_db_session),
 ):
+    mark_recent_write(user.id)
     return await delete_study_result(payload.result_id, user.id, conn)
 
 
 @router.get("/export/{study_results_id}", response_model=ResultsExportSchema)
 async def export_study_results_by_id(
     study_results_id: UUID,
+    format: ExportFormat = ExportFormat.CSV,
     user: User = Depends(require_role(UserRole.RESEARCHER)),
-    conn: AsyncSession = Depends(get_db_session),
+    conn: AsyncSession = Depends(get_user_read_db_session),
 ):
-    export_data = await get_study_response_by_id(study_results_id, user.id, conn)
-    buffer = io.StringIO()
-    doc = csv.writer(buffer)
-    doc.writerow(
-        [
-            "Study ID",
-            "Subject ID",
-            "Submission",
-            "CFD Image ID",
-            "Answer",
-            "Response time (ms)",
-            "Age",
-            "Sex",
-            "Race",
-        ]
+    # Ownership is checked up front, the body is streamed after headers are sent
+    study_result = await validate_ownership(study_results_id, user.id, conn)
+    rows = stream_export_rows(
+        export_rows_stmt(user.id, study_results_id), partial(open_read_session, user.id)
     )
-    for response in export_data.responses:
-        row_data = [
-            export_data.results.study_id,
-            export_data.results.subject_id,
-            export_data.results.submitted,
-            response.image_id,
-            response.answer,
-            response.response_time,
-        ]
-        if export_data.demographics:
-            row_data.extend(
-                [
-                    export_data.demographics.age,
-                    export_data.demographics.sex,
-                    export_data.demographics.race,
-                ]
-            )
-        doc.writerow(row_data)
-    buffer.seek(0)
+    body, media_type = export_body(rows, format)
+    filename = f"{str(study_result.study_id)[-TAIL_LEN:]}-results.{format.value}"
     headers = {
-        "Content-Disposition": f"attachment; filename={str(export_data.results.study_id)[-TAIL_LEN:]}-results.csv; filename*=UTF-8''{str(export_data.results.study_id)[-TAIL_LEN:]}-results.csv"
+        "Content-Disposition": f"attachment; filename={filename}; filename*=UTF-8''{filename}"
     }
-    return StreamingResponse(
-        iter([buffer.getvalue()]), media_type="text/csv", headers=headers
-    )
+    return StreamingResponse(body, media_type=media_type, headers=headers)
 
 
 @router.get("/export_all", response_model=list[ResultsExportSchema])
 async def export_all(
+    format: ExportFormat = ExportFormat.CSV,
     user: User = Depends(require_role(UserRole.RESEARCHER)),
-    conn: AsyncSession = Depends(get_db_session),
 ) -> list[ResultsExportSchema]:
-    export_data = await get_all_study_responses(user.id, conn)
-    buffer = io.StringIO()
-    doc = csv.writer(buffer)
-    doc.writerow(
-        [
-            "Study ID",
-            "Subject ID",
-            "Submission",
-            "CFD Image ID",
-            "Answer",
-            "Response time (ms)",
-            "Age",
-            "Sex",
-            "Race",
-        ]
-    )
-    for data in export_data:
-        for response in data.responses:
-            row_data = [
-                data.results.study_id,
-                data.results.subject_id,
-                data.results.submitted,
-                response.image_id,
-                response.answer,
-                response.response_time,
-            ]
-            if data.demographics:
-                row_data.extend(
-                    [
-                        data.demographics.age,
-                        data.demographics.sex,
-                        data.demographics.race,
-                    ]
-                )
-            doc.writerow(row_data)
-    buffer.seek(0)
+    # Falls back to the primary before the first row when the replica is down
+    rows = stream_export_rows(export_rows_stmt(user.id), partial(open_read_session, user.id))
+    body, media_type = export_body(rows, format)
+    filename = f"{str(user.id)}-results.{format.value}"
     headers = {
-        "Content-Disposition": f"attachment; filename={str(user.id)}-results.csv; filename*=UTF-8''{str(user.id)}-results.csv"
+        "Content-Disposition": f"attachment; filename={filename}; filename*=UTF-8''{filename}"
     }
-    return StreamingResponse(
-        iter([buffer.getvalue()]), media_type="text/csv", headers=headers
-    )
+    return StreamingResponse(body, media_type=media_type, headers=headers)
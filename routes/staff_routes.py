@@ -8,6 +8,7 @@ from models.user_model import User
 from schemas.researcher_dashboard_schema import StudyResultsSchema
 from schemas.staff_schemas import SearchRequest
 from services.researcher_dashboard_service import get_all_study_results, get_researcher_id, get_study_codes
+from utils.metrics import collect_metrics
 
 
 router = APIRouter(prefix="/staff", tags=["Staff"])
@@ -46,3 +47,11 @@ async def get_researcher_results(
     if not researcher_id:
         raise HTTPException(500, detail="Unable to find User")
     return await get_all_study_results(researcher_id, conn)
+
+
+@router.get("/metrics")
+async def get_metrics(
+    user: User = Depends(require_role(UserRole.STAFF)),
+) -> dict[str, dict]:
+    """Returns in-process counters (cache hits/misses/evictions, etc.) for this worker"""
+    return collect_metrics()
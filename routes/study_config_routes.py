@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends
-from db.client import get_db_session
+from db.client import get_db_session, mark_recent_write
 from models.enums import UserRole
 from models.user_model import User
 from schemas.study_config_response_schema import StudyCodeReponse
@@ -52,4 +52,6 @@ async def add_configuration(
     )
 
     study_code = await add_study(config=study, conn=conn)
+    # The researcher's dashboard reads from the primary until the replica has the config
+    mark_recent_write(user.id)
     return {"study_code": f"{study_code}"}
@@ -1,20 +1,31 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
 # from fastapi.params import Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from db.client import get_db_session
 from schemas.study_results_schema import StudyResultsPayload
 from services.study_results_service import add_study_result
 from services.study_response_service import store_study_responses
+from services.results_spool import enqueue_study_results
 from schemas.study_config_response_schema import MessageResponse
+from settings import get_settings
+
+settings = get_settings()
 
 router = APIRouter(prefix="/results", tags=["Study Results"])
 
 @router.post("/responses", status_code=status.HTTP_201_CREATED)
 async def submit_study_responses(
     payload: StudyResultsPayload, 
+    response: Response,
     conn: AsyncSession = Depends(get_db_session)
 ) -> MessageResponse:
     # NOTE: Each subject can only have one submission per configuration.
+    if settings.results_ingestion_mode == "spool":
+        # Durable in the local spool, written to Postgres by the background drainer
+        await enqueue_study_results(payload)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return MessageResponse(message="Results Submitted Successfully")
+
     study_result_id = await add_study_result(
         #study_id=payload.identity.study_id,
         config_id=payload.identity.config_id,
@@ -1,20 +1,21 @@
 # ROUTER
 import uuid
-from fastapi import APIRouter, Depends
-from fastapi.responses import StreamingResponse
-from db.client import get_db_session
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import Response
+from db.client import get_read_db_session
 from sqlalchemy.ext.asyncio import AsyncSession
-from models.uploaded_files_model import UploadedFiles
-from services.r2_client import get_r2_read_client
+from models.enums import StudyDocument
+from services.r2_client import AsyncR2Client, get_r2_read_client, get_r2_read_signer
+from services.document_storage import get_document
+from services.r2_signer import PresignedUrlSigner
 from settings import Settings, get_settings
-from botocore.client import BaseClient
-from schemas.study_config_response_schema import StudyConfigResponse
+from schemas.study_config_response_schema import StudyBootstrapResponse, StudyConfigResponse
 from services.study_retrieval_service import (
+    get_study_bootstrap,
     get_config_file,
     get_study_id_from_config,
     get_study_id_list,
     get_study_id,
-    get_file_from_db,
     get_learning_phase_data,
     get_experiment_phase_data, get_waiting_phase_from_db,
 )
@@ -26,7 +27,7 @@ router = APIRouter(prefix="/study", tags=["Study"])
 
 @router.get("/study_ids")
 async def get_all_study_ids(
-    conn: AsyncSession = Depends(get_db_session),
+    conn: AsyncSession = Depends(get_read_db_session),
 ) -> list[uuid.UUID]:
     """Returns a list of all Study ID's from database"""
     return await get_study_id_list(conn=conn)
@@ -34,7 +35,7 @@ async def get_all_study_ids(
 @router.get("/study_id_from_config/{config_id}")
 async def get_study_id_config_id(
     config_id:uuid.UUID,
-    conn: AsyncSession = Depends(get_db_session),
+    conn: AsyncSession = Depends(get_read_db_session),
 ) -> uuid.UUID:
     """Returns a Study ID from a provided config ID"""
     return await get_study_id_from_config(config_id, conn)
@@ -42,52 +43,72 @@ async def get_study_id_config_id(
 @router.get("/study_id/{study_code}")
 async def get_study_id_from_code(
     study_code: str,
-    conn: AsyncSession = Depends(get_db_session),
+    conn: AsyncSession = Depends(get_read_db_session),
 ) -> uuid.UUID:
     """Return the full study UUID from a submitted code."""
     return await get_study_id(study_code, conn=conn)
 
 
+@router.get("/bootstrap/{study_code}", response_model=StudyBootstrapResponse)
+async def bootstrap_study_session(
+    study_code: str,
+    conn: AsyncSession = Depends(get_read_db_session),
+    signer: PresignedUrlSigner = Depends(get_r2_read_signer),
+    settings: Settings = Depends(get_settings)
+) -> StudyBootstrapResponse:
+    """Returns the configuration, every phase and presigned image URLs for a study code."""
+    return await get_study_bootstrap(study_code, conn=conn, signer=signer, settings=settings)
+
+
 @router.get("/consent_form/{study_id}")
 async def get_study_consent_form(
     study_id: uuid.UUID,
-    conn: AsyncSession = Depends(get_db_session),
-) -> StreamingResponse:
-    """Returns Consent form as a streaming response of bytes."""
-    return await get_file_from_db(
-        study_id, UploadedFiles.consent_form, UploadedFiles.consent_form_bytes, conn
+    request: Request,
+    conn: AsyncSession = Depends(get_read_db_session),
+    client: AsyncR2Client = Depends(get_r2_read_client),
+    signer: PresignedUrlSigner = Depends(get_r2_read_signer),
+    settings: Settings = Depends(get_settings)
+) -> Response:
+    """Returns Consent form as a streamed response or a redirect to R2."""
+    return await get_document(
+        study_id, StudyDocument.CONSENT_FORM, conn, client, signer, settings, request.headers
     )
 
 
 @router.get("/study_instructions/{study_id}")
 async def get_study_instructions(
     study_id: uuid.UUID,
-    conn: AsyncSession = Depends(get_db_session),
-) -> StreamingResponse:
-    """Returns Study Instructions as a streaming response of bytes."""
-    return await get_file_from_db(
-        study_id,
-        UploadedFiles.study_instructions,
-        UploadedFiles.study_instructions_bytes,
-        conn,
+    request: Request,
+    conn: AsyncSession = Depends(get_read_db_session),
+    client: AsyncR2Client = Depends(get_r2_read_client),
+    signer: PresignedUrlSigner = Depends(get_r2_read_signer),
+    settings: Settings = Depends(get_settings)
+) -> Response:
+    """Returns Study Instructions as a streamed response or a redirect to R2."""
+    return await get_document(
+        study_id, StudyDocument.STUDY_INSTRUCTIONS, conn, client, signer, settings, request.headers
     )
 
 
 @router.get("/study_debrief/{study_id}")
 async def get_study_debrief(
     study_id: uuid.UUID,
-    conn: AsyncSession = Depends(get_db_session),
-) -> StreamingResponse:
-    """Fetches Study Debrief as a streaming response of bytes."""
-    return await get_file_from_db(
-        study_id, UploadedFiles.study_debrief, UploadedFiles.study_debrief_bytes, conn
+    request: Request,
+    conn: AsyncSession = Depends(get_read_db_session),
+    client: AsyncR2Client = Depends(get_r2_read_client),
+    signer: PresignedUrlSigner = Depends(get_r2_read_signer),
+    settings: Settings = Depends(get_settings)
+) -> Response:
+    """Fetches Study Debrief as a streamed response or a redirect to R2."""
+    return await get_document(
+        study_id, StudyDocument.STUDY_DEBRIEF, conn, client, signer, settings, request.headers
     )
 
 
 @router.get("/export/{study_id}", response_model=StudyConfigResponse)
 async def export_config_file(
     study_id: uuid.UUID,
-    conn: AsyncSession = Depends(get_db_session),
+    conn: AsyncSession = Depends(get_read_db_session),
 ) -> StudyConfigResponse:
     """Returns Full Configuration File as a JSON"""
     return await get_config_file(study_id=study_id, conn=conn)
@@ -96,18 +117,18 @@ async def export_config_file(
 @router.get("/learning_phase/{study_id}")
 async def get_learning_phase(
     study_id: uuid.UUID,
-    conn: AsyncSession = Depends(get_db_session),
-    client: BaseClient = Depends(get_r2_read_client),
+    conn: AsyncSession = Depends(get_read_db_session),
+    signer: PresignedUrlSigner = Depends(get_r2_read_signer),
     settings: Settings = Depends(get_settings)
 ):
     """Returns the Learning Phase configuration for the study."""
-    return await get_learning_phase_data(study_id=study_id, conn=conn, client=client, settings=settings)
+    return await get_learning_phase_data(study_id=study_id, conn=conn, signer=signer, settings=settings)
 
 
 @router.get("/waiting_phase/{study_id}")
 async def get_waiting_phase(
     study_id: uuid.UUID,
-    conn: AsyncSession = Depends(get_db_session),
+    conn: AsyncSession = Depends(get_read_db_session),
 ):
     """Returns the Waiting Phase configuration for the study"""
     return await get_waiting_phase_from_db(study_id=study_id, conn=conn)
@@ -116,18 +137,18 @@ async def get_waiting_phase(
 @router.get("/experiment_phase/{study_id}")
 async def get_experiment_phase(
     study_id: uuid.UUID,
-    conn: AsyncSession = Depends(get_db_session),
-    client: BaseClient = Depends(get_r2_read_client),
+    conn: AsyncSession = Depends(get_read_db_session),
+    signer: PresignedUrlSigner = Depends(get_r2_read_signer),
     settings: Settings = Depends(get_settings)
 ):
     """ Returns the Experiment Phase configuration along with presigned URLs for experiment images. """
-    return await get_experiment_phase_data(study_id, conn, client, settings)
+    return await get_experiment_phase_data(study_id, conn, signer, settings)
 
 
 @router.get("/researchers/{researcher_id}/configs", response_model=ResearcherConfigResponse)
 async def list_researcher_configs(
     researcher_id: uuid.UUID,
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
 ):
     config_ids = await get_config_ids_for_researcher(researcher_id, db)
     return ResearcherConfigResponse(researcher_id=researcher_id, config_ids=config_ids)
\ No newline at end of file
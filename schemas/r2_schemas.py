@@ -5,7 +5,7 @@ from typing import List, Optional
 class FileInfo(BaseModel):
     filename:str
     last_modified:datetime
-    size:int
+    size:Optional[int] = None
 
 class FileInfoList(BaseModel):
     files:list[FileInfo]
@@ -84,4 +84,22 @@ class CommitReq(BaseModel):
 
 class CommitRes(BaseModel):
     ok: bool
-    manifestKey: str
\ No newline at end of file
+    manifestKey: str
+
+#MAINTENANCE JOBS
+
+class R2JobStatus(BaseModel):
+    id: str
+    kind: str
+    bucket: str
+    prefix: str = ""
+    status: str = "running"
+    pages_scanned: int = 0
+    objects_scanned: int = 0
+    objects_processed: int = 0
+    errors: int = 0
+    # Listing position of the first page not yet fully processed, None once finished
+    continuation: Optional[dict] = None
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
@@ -53,6 +53,18 @@ class StudyConfigResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class StudyBootstrapResponse(BaseModel):
+    config_id: UUID
+    study_id: UUID
+    survey_id: Optional[UUID] = None
+    files: FileUploads
+    learning: LearningPhase
+    wait: WaitPhase
+    experiment: ExperimentPhase
+    conclusion: ConclusionPhase
+    model_config = ConfigDict(from_attributes=True)
+
+
 class ResearcherConfigResponse(BaseModel):
     researcher_id: UUID
     config_ids: List[UUID]
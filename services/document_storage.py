@@ -0,0 +1,332 @@
+import hashlib
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterator, Mapping, Optional
+from urllib.parse import quote
+
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.enums import StudyDocument
+from models.uploaded_files_model import UploadedFiles
+from services.r2_client import AsyncR2Client, get_r2_rw_client
+from services.r2_service import generate_image_url
+from services.r2_signer import PresignedUrlSigner
+from settings import Settings, get_settings
+from utils.http_ranges import (
+    etag_matches,
+    format_byte_range,
+    if_range_matches,
+    parse_byte_range,
+    resolve_byte_range,
+)
+
+settings = get_settings()
+
+
+def document_columns(document: StudyDocument):
+    """Returns the (filename, bytes, key, sha256) columns backing a study document"""
+    return (
+        getattr(UploadedFiles, document.value),
+        getattr(UploadedFiles, f"{document.value}_bytes"),
+        getattr(UploadedFiles, f"{document.value}_key"),
+        getattr(UploadedFiles, f"{document.value}_sha256"),
+    )
+
+
+def document_key(config_id: uuid.UUID, document: StudyDocument) -> str:
+    """Object key for a study document, scoped by configuration"""
+    return f"{config_prefix(config_id)}{document.value}"
+
+
+def config_prefix(config_id: uuid.UUID) -> str:
+    return f"{settings.document_prefix}/{config_id}/"
+
+
+class DocumentStorage(ABC):
+    """Storage backend for consent forms, instructions and debriefs"""
+
+    @abstractmethod
+    async def save(
+        self,
+        config_id: uuid.UUID,
+        document: StudyDocument,
+        filename: str,
+        data: bytes,
+        media_type: str = "application/pdf",
+    ) -> dict:
+        """Stores a document and returns the UploadedFiles column values to persist"""
+
+    async def delete(self, config_id: uuid.UUID):
+        """Removes every stored document for a configuration"""
+
+
+class DatabaseDocumentStorage(DocumentStorage):
+    """Keeps documents inline as BYTEA (legacy behaviour)"""
+
+    async def save(self, config_id, document, filename, data, media_type="application/pdf"):
+        return {f"{document.value}_bytes": data}
+
+
+class R2DocumentStorage(DocumentStorage):
+    """Stores documents in the R2 bucket under a config-scoped prefix"""
+
+    def __init__(self, client: AsyncR2Client, bucket: str):
+        self.client = client
+        self.bucket = bucket
+
+    async def save(self, config_id, document, filename, data, media_type="application/pdf"):
+        key = document_key(config_id, document)
+        await self.client.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=data,
+            ContentType=media_type,
+            # Metadata travels as HTTP headers and must be ASCII
+            Metadata={"config": str(config_id), "filename": quote(filename, safe="")},
+        )
+        return {f"{document.value}_key": key}
+
+    async def delete(self, config_id):
+        pages = self.client.paginate(
+            "list_objects_v2", Bucket=self.bucket, Prefix=config_prefix(config_id)
+        )
+        async for page in pages:
+            objects = [{"Key": item["Key"]} for item in page.get("Contents", [])]
+            if objects:
+                await self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": objects})
+
+
+def get_document_storage() -> DocumentStorage:
+    if settings.document_storage == "database":
+        return DatabaseDocumentStorage()
+    return R2DocumentStorage(get_r2_rw_client(), settings.r2_bucket_name)
+
+
+def _iter_bytes(data: bytes, chunk_size: int) -> Iterator[bytes]:
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield bytes(view[start : start + chunk_size])
+
+
+def _iter_body(body, chunk_size: int) -> Iterator[bytes]:
+    try:
+        yield from body.iter_chunks(chunk_size)
+    finally:
+        body.close()
+
+
+def _not_modified(
+    request_headers: Mapping[str, str],
+    etag: Optional[str],
+    uploaded_at: Optional[datetime],
+) -> bool:
+    """Evaluates If-None-Match, falling back to If-Modified-Since"""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and etag_matches(if_none_match, etag)
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since and uploaded_at:
+        try:
+            return uploaded_at.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def get_document(
+    study_id: uuid.UUID,
+    document: StudyDocument,
+    conn: AsyncSession,
+    client: AsyncR2Client,
+    signer: PresignedUrlSigner,
+    settings: Settings,
+    request_headers: Optional[Mapping[str, str]] = None,
+    media_type: str = "application/pdf",
+):
+    """
+    Serves a study document from whichever backend holds it.
+
+    Responses carry the upload-time content hash as ETag along with
+    Last-Modified and Cache-Control. Conditional requests are answered with
+    304 and single-part Range requests with 206, so repeat views and PDF
+    viewers only pull the bytes they need.
+
+    Args:
+        study_id:
+            UUID for the requested study configuration
+        document:
+            Which study document to serve
+        conn:
+            Async connection to the database
+        client:
+            S3 Client used to proxy-stream documents from R2
+        signer:
+            Presigned URL signer used for redirect delivery
+        settings:
+            Application settings, provides bucket and delivery mode
+        request_headers:
+            Incoming request headers (If-None-Match, If-Modified-Since, Range, If-Range)
+        media_type:
+            String value representing mime type. Defaults to "application/pdf"
+
+    Returns:
+        A redirect to a presigned URL when `document_delivery` is "redirect",
+        otherwise a Streaming Response of fixed-size chunks served inline.
+        Documents still stored as BYTEA are always streamed from the row.
+
+    Raises:
+        HTTPException: 404 File not Found
+        HTTPException: 416 Requested Range Not Satisfiable
+    """
+    request_headers = request_headers or {}
+    filename_column, bytes_column, key_column, sha256_column = document_columns(document)
+    stmt = select(
+        filename_column, key_column, sha256_column, UploadedFiles.uploaded_at
+    ).where(UploadedFiles.study_config_id == study_id)
+    result = await conn.execute(stmt)
+    row = result.first()
+    if not row or not row[0]:
+        raise HTTPException(status_code=404, detail="File not found")
+    filename, key, sha256, uploaded_at = row
+
+    headers = {
+        "Content-Disposition": f'inline; filename="{filename}"',
+        "Cache-Control": settings.document_cache_control,
+        "Accept-Ranges": "bytes",
+    }
+    etag = f'"{sha256}"' if sha256 else None
+    if etag:
+        headers["ETag"] = etag
+    if uploaded_at:
+        headers["Last-Modified"] = format_datetime(
+            uploaded_at.astimezone(timezone.utc), usegmt=True
+        )
+
+    if _not_modified(request_headers, etag, uploaded_at):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = parse_byte_range(request_headers.get("range"))
+    if byte_range and not if_range_matches(request_headers.get("if-range"), etag, uploaded_at):
+        byte_range = None
+
+    if key:
+        if settings.document_delivery == "redirect":
+            url = await generate_image_url(signer, settings.r2_bucket_name, key)
+            return RedirectResponse(url, status_code=307)
+
+        params = {"Bucket": settings.r2_bucket_name, "Key": key}
+        if byte_range:
+            params["Range"] = format_byte_range(byte_range)
+        try:
+            obj = await client.get_object(**params)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "InvalidRange":
+                raise HTTPException(status_code=416, detail="Requested Range Not Satisfiable")
+            raise HTTPException(status_code=404, detail="File not found")
+
+        status_code = 200
+        headers["Content-Length"] = str(obj["ContentLength"])
+        if obj.get("ContentRange"):
+            headers["Content-Range"] = obj["ContentRange"]
+            status_code = 206
+        return StreamingResponse(
+            _iter_body(obj["Body"], settings.document_chunk_size),
+            status_code=status_code,
+            media_type=media_type,
+            headers=headers,
+        )
+
+    stmt = select(bytes_column).where(UploadedFiles.study_config_id == study_id)
+    result = await conn.execute(stmt)
+    data = result.scalar_one_or_none()
+    if data is None:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    status_code = 200
+    size = len(data)
+    if byte_range:
+        resolved = resolve_byte_range(byte_range, size)
+        if resolved is None:
+            raise HTTPException(
+                status_code=416,
+                detail="Requested Range Not Satisfiable",
+                headers={"Content-Range": f"bytes */{size}"},
+            )
+        first, last = resolved
+        data = memoryview(data)[first : last + 1]
+        headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+        status_code = 206
+    headers["Content-Length"] = str(len(data))
+    return StreamingResponse(
+        _iter_bytes(data, settings.document_chunk_size),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+async def migrate_documents_to_storage(
+    conn: AsyncSession,
+    storage: R2DocumentStorage,
+    batch_size: int = 10,
+    max_batches: Optional[int] = None,
+) -> dict:
+    """
+    Moves BYTEA documents into the storage backend in batches.
+
+    Each batch is committed on its own, so the migration can be interrupted
+    and re-run. Only one row's documents are held in memory at a time.
+
+    Returns:
+        Number of configurations migrated and how many still hold BYTEA documents
+    """
+    pending = or_(
+        *[
+            document_columns(document)[1].is_not(None)
+            for document in StudyDocument
+        ]
+    )
+    migrated = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        stmt = select(UploadedFiles.study_config_id).where(pending).limit(batch_size)
+        config_ids = (await conn.execute(stmt)).scalars().all()
+        if not config_ids:
+            break
+
+        for config_id in config_ids:
+            values = {}
+            for document in StudyDocument:
+                filename_column, bytes_column, _, _ = document_columns(document)
+                row = (
+                    await conn.execute(
+                        select(filename_column, bytes_column).where(
+                            UploadedFiles.study_config_id == config_id
+                        )
+                    )
+                ).first()
+                if row is None or row[1] is None:
+                    continue
+                values.update(await storage.save(config_id, document, row[0], row[1]))
+                values[f"{document.value}_sha256"] = hashlib.sha256(row[1]).hexdigest()
+                values[bytes_column.key] = None
+            await conn.execute(
+                update(UploadedFiles)
+                .where(UploadedFiles.study_config_id == config_id)
+                .values(**values)
+            )
+            migrated += 1
+
+        await conn.commit()
+        batches += 1
+
+    remaining = (
+        await conn.execute(select(func.count()).select_from(UploadedFiles).where(pending))
+    ).scalar_one()
+    return {"migrated": migrated, "remaining": remaining}
@@ -0,0 +1,370 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import exists, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.enums import MultipartStatus
+from models.multipart_upload_model import MultipartUpload
+from models.object_inventory_model import ObjectInventory
+from services.object_inventory_service import inventory_entry, record_objects
+from services.r2_client import AsyncR2Client, get_r2_rw_client
+from settings import get_settings
+from utils.metrics import LatencyWindow, register_metrics
+
+settings = get_settings()
+
+# Finalize modes
+# "direct" creates the upload at its final key when that key is free, completing it is the only call
+# "deferred" uploads to a staging key and copies to the final key in the background
+DIRECT = "direct"
+DEFERRED = "deferred"
+
+complete_latency = LatencyWindow()
+copy_latency = LatencyWindow()
+_copy_stats = {"copied": 0, "failed": 0, "gave_up": 0}
+
+
+def _stats() -> dict:
+    return {
+        "mode": settings.mpu_finalize_mode,
+        "complete": complete_latency.summary(),
+        "deferred_copy": {**copy_latency.summary(), **_copy_stats},
+    }
+
+
+register_metrics("multipart_uploads", _stats)
+
+
+def object_metadata(upload: MultipartUpload) -> dict:
+    """Object metadata written on create, and again by a deferred copy"""
+    return {
+        "owner": str(upload.owner),
+        "session": upload.session_id,
+        "basename": upload.final_key.rsplit("/", 1)[-1],
+    }
+
+
+async def final_key_is_free(final_key: str, conn: AsyncSession) -> bool:
+    """True when nothing is stored at the key and no other upload is headed for it
+
+    Only such keys are uploaded to directly, so a failed size check never
+    deletes an object that was already there.
+    """
+    taken = await conn.scalar(
+        select(
+            or_(
+                exists().where(ObjectInventory.key == final_key),
+                exists().where(
+                    MultipartUpload.final_key == final_key,
+                    MultipartUpload.status.in_(
+                        [MultipartStatus.PENDING, MultipartStatus.COPYING]
+                    ),
+                ),
+            )
+        )
+    )
+    return not taken
+
+
+async def create_upload(
+    client: AsyncR2Client,
+    bucket: str,
+    owner: UUID,
+    session_id: str,
+    key: str,
+    final_key: str,
+    conn: AsyncSession,
+    content_type: Optional[str] = None,
+    size: Optional[int] = None,
+) -> MultipartUpload:
+    """Starts a multipart upload at `key` and records who owns it"""
+    upload = MultipartUpload(
+        key=key,
+        final_key=final_key,
+        owner=owner,
+        session_id=session_id,
+        content_type=content_type,
+        size=size,
+        status=MultipartStatus.PENDING,
+        created_at=datetime.now(timezone.utc),
+    )
+    params = {"Bucket": bucket, "Key": key, "Metadata": object_metadata(upload)}
+    if content_type:
+        params["ContentType"] = content_type
+    resp = await client.create_multipart_upload(**params)
+
+    upload.upload_id = resp["UploadId"]
+    conn.add(upload)
+    await conn.commit()
+    return upload
+
+
+async def get_owned_upload(
+    upload_id: str, key: str, owner: UUID, conn: AsyncSession
+) -> MultipartUpload:
+    """Returns the pending upload if it belongs to the caller
+
+    Raises:
+        HTTPException: 403 Upload not owned by caller
+    """
+    upload = await conn.get(MultipartUpload, upload_id)
+    if (
+        upload is None
+        or upload.key != key
+        or upload.owner != owner
+        or upload.status != MultipartStatus.PENDING
+    ):
+        raise HTTPException(status_code=403, detail="Key not owned by caller")
+    return upload
+
+
+async def complete_upload(
+    client: AsyncR2Client,
+    bucket: str,
+    upload: MultipartUpload,
+    parts: list[dict],
+    conn: AsyncSession,
+    expected_size: Optional[int] = None,
+    copier: Optional["MultipartCopier"] = None,
+) -> dict:
+    """Completes a multipart upload and makes it available at its final key
+
+    Ownership comes from the upload record, so the object is only HEADed when
+    the client asks for an expected size check. An upload created at a staging
+    key is queued for the copier and acknowledged immediately, or copied
+    before returning when no copier is running. A failed inline copy marks
+    the upload failed and removes the staged object.
+
+    Raises:
+        HTTPException: 409 Size mismatch after complete
+        HTTPException: 502 Unable to move upload to its final key
+    """
+    start = time.perf_counter()
+    resp = await client.complete_multipart_upload(
+        Bucket=bucket,
+        Key=upload.key,
+        UploadId=upload.upload_id,
+        MultipartUpload={"Parts": parts},
+    )
+
+    if expected_size is not None:
+        head = await client.head_object(Bucket=bucket, Key=upload.key)
+        if head["ContentLength"] != expected_size:
+            # Only the object this upload wrote is removed, never one that replaced it since
+            if head.get("ETag") == resp.get("ETag"):
+                await client.delete_object(Bucket=bucket, Key=upload.key)
+            upload.status = MultipartStatus.ABORTED
+            upload.error = "Size mismatch after complete"
+            await conn.commit()
+            raise HTTPException(status_code=409, detail="Size mismatch after complete")
+        upload.size = head["ContentLength"]
+    else:
+        # The declared size was never checked, the next reconciliation records the real one
+        upload.size = None
+
+    now = datetime.now(timezone.utc)
+    upload.etag = resp.get("ETag")
+    upload.completed_at = now
+    if upload.key == upload.final_key:
+        upload.status = MultipartStatus.COMPLETED
+        upload.finalized_at = now
+        entry = inventory_entry(upload.final_key, upload.size, upload.etag, now, upload.owner)
+        await record_objects([entry], conn)
+    elif copier is None:
+        try:
+            await finalize_staged(client, bucket, upload)
+        except Exception as e:
+            # No copier would ever retry it, the client uploads again instead
+            upload.status = MultipartStatus.FAILED
+            upload.copy_attempts += 1
+            upload.error = str(e)
+            _copy_stats["gave_up"] += 1
+            try:
+                await client.delete_object(Bucket=bucket, Key=upload.key)
+            except Exception as cleanup_error:
+                print(f"Multipart Cleanup Error: {upload.key} {cleanup_error}")
+            await conn.commit()
+            raise HTTPException(status_code=502, detail="Unable to move upload to its final key")
+        entry = inventory_entry(
+            upload.final_key, upload.size, upload.etag, upload.finalized_at, upload.owner
+        )
+        await record_objects([entry], conn)
+    else:
+        upload.status = MultipartStatus.COPYING
+
+    upload.complete_ms = (time.perf_counter() - start) * 1000
+    await conn.commit()
+    complete_latency.add(upload.complete_ms)
+    if copier and upload.status == MultipartStatus.COPYING:
+        copier.notify()
+
+    return {
+        "location": f"s3://{bucket}/{upload.final_key}",
+        "key": upload.final_key,
+        "etag": upload.etag,
+    }
+
+
+async def abort_upload(
+    client: AsyncR2Client, bucket: str, upload: MultipartUpload, conn: AsyncSession
+):
+    await client.abort_multipart_upload(
+        Bucket=bucket, Key=upload.key, UploadId=upload.upload_id
+    )
+    upload.status = MultipartStatus.ABORTED
+    await conn.commit()
+
+
+async def finalize_staged(client: AsyncR2Client, bucket: str, upload: MultipartUpload):
+    """Copies a staged upload to its final key and removes the staging object"""
+    start = time.perf_counter()
+    resp = await client.copy_object(
+        Bucket=bucket,
+        CopySource={"Bucket": bucket, "Key": upload.key},
+        Key=upload.final_key,
+        Metadata=object_metadata(upload),
+        MetadataDirective="REPLACE",
+        ContentType=upload.content_type or "application/octet-stream",
+    )
+    await client.delete_object(Bucket=bucket, Key=upload.key)
+
+    upload.etag = (resp or {}).get("CopyObjectResult", {}).get("ETag", upload.etag)
+    upload.status = MultipartStatus.COMPLETED
+    upload.finalized_at = datetime.now(timezone.utc)
+    upload.error = None
+    copy_latency.add((time.perf_counter() - start) * 1000)
+    _copy_stats["copied"] += 1
+
+
+class MultipartCopier:
+    """Background task that copies staged uploads to their final keys
+
+    Uploads waiting for a copy are read from the database, so copies that were
+    pending when the process stopped are picked up again on the next start.
+    Each batch is row locked, so copiers in other workers skip it instead of
+    copying and deleting the same staging objects.
+    """
+
+    def __init__(
+        self,
+        client: AsyncR2Client,
+        bucket: str,
+        session_factory,
+        batch_size: int,
+        poll_interval: float,
+        max_attempts: int,
+    ):
+        self.client = client
+        self.bucket = bucket
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def notify(self):
+        self._wakeup.set()
+
+    async def run(self):
+        while True:
+            try:
+                copied = await self.copy_once()
+            except Exception as e:
+                print("Multipart Copy Error: ", str(e))
+                copied = 0
+            if copied == 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def copy_once(self) -> int:
+        """Copies one batch concurrently, returns the number of uploads finalized"""
+        async with self.session_factory() as conn:
+            result = await conn.execute(
+                select(MultipartUpload)
+                .where(
+                    MultipartUpload.status == MultipartStatus.COPYING,
+                    MultipartUpload.copy_attempts < self.max_attempts,
+                )
+                .order_by(MultipartUpload.completed_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            uploads = result.scalars().all()
+            if not uploads:
+                return 0
+
+            copied = await asyncio.gather(*[self._copy(upload) for upload in uploads])
+            await record_objects(
+                [
+                    inventory_entry(
+                        upload.final_key,
+                        upload.size,
+                        upload.etag,
+                        upload.finalized_at,
+                        upload.owner,
+                    )
+                    for upload, ok in zip(uploads, copied)
+                    if ok
+                ],
+                conn,
+            )
+            await conn.commit()
+        return sum(copied)
+
+    async def _copy(self, upload: MultipartUpload) -> bool:
+        try:
+            await finalize_staged(self.client, self.bucket, upload)
+        except Exception as e:
+            upload.copy_attempts += 1
+            upload.error = str(e)
+            _copy_stats["failed"] += 1
+            if upload.copy_attempts >= self.max_attempts:
+                upload.status = MultipartStatus.FAILED
+                _copy_stats["gave_up"] += 1
+                print(f"Multipart Copy Failed: {upload.upload_id} {upload.key} -> {upload.final_key}")
+            return False
+        return True
+
+
+_copier: Optional[MultipartCopier] = None
+
+
+def get_multipart_copier() -> Optional[MultipartCopier]:
+    return _copier
+
+
+def start_multipart_copier(session_factory) -> Optional[MultipartCopier]:
+    """Starts the deferred copy worker when uploads are finalized in deferred mode"""
+    global _copier
+    if settings.mpu_finalize_mode != DEFERRED or not settings.r2_bucket_name:
+        return None
+    _copier = MultipartCopier(
+        get_r2_rw_client(),
+        settings.r2_bucket_name,
+        session_factory,
+        settings.mpu_copy_batch_size,
+        settings.mpu_copy_poll_interval,
+        settings.mpu_copy_max_attempts,
+    )
+    _copier.start()
+    return _copier
@@ -0,0 +1,245 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, case, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.object_inventory_model import ObjectInventory
+from schemas.r2_schemas import FileInfo, FileInfoList, PaginateResponse
+from services.r2_client import AsyncR2Client, get_r2_read_client
+from settings import get_settings
+from utils.metrics import register_metrics
+
+settings = get_settings()
+
+# Rows per upsert, stays well under the asyncpg bind parameter limit
+UPSERT_BATCH = 1000
+
+_reconcile_stats = {
+    "runs": 0,
+    "failures": 0,
+    "last_started_at": None,
+    "last_finished_at": None,
+    "last_scanned": 0,
+    "last_removed": 0,
+    "last_error": None,
+}
+register_metrics("object_inventory", lambda: dict(_reconcile_stats))
+
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def inventory_entry(
+    key: str,
+    size: Optional[int],
+    etag: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+    owner: Optional[UUID] = None,
+    sha256: Optional[str] = None,
+) -> dict:
+    """Builds an inventory row, last_modified defaults to now for fresh uploads"""
+    return {
+        "key": key,
+        "size": size,
+        "etag": etag.strip('"') if etag else None,
+        "last_modified": last_modified or datetime.now(timezone.utc),
+        "owner": owner,
+        "sha256": sha256,
+    }
+
+
+async def record_objects(
+    entries: list[dict], conn: AsyncSession, seen_at: Optional[datetime] = None
+):
+    '''Upserts inventory rows built by `inventory_entry`.
+    Does not commit. A known owner or hash is kept when the new entry has none,
+    unless the object changed underneath it.'''
+    seen_at = seen_at or datetime.now(timezone.utc)
+    for start in range(0, len(entries), UPSERT_BATCH):
+        stmt = insert(ObjectInventory).values(
+            [{**entry, "seen_at": seen_at} for entry in entries[start : start + UPSERT_BATCH]]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ObjectInventory.key],
+            set_={
+                "size": stmt.excluded.size,
+                "etag": stmt.excluded.etag,
+                "last_modified": stmt.excluded.last_modified,
+                "owner": func.coalesce(stmt.excluded.owner, ObjectInventory.owner),
+                "sha256": case(
+                    (stmt.excluded.sha256.is_not(None), stmt.excluded.sha256),
+                    (
+                        and_(
+                            stmt.excluded.etag.is_not_distinct_from(ObjectInventory.etag),
+                            stmt.excluded.size == ObjectInventory.size,
+                        ),
+                        ObjectInventory.sha256,
+                    ),
+                    else_=None,
+                ),
+                "seen_at": func.greatest(stmt.excluded.seen_at, ObjectInventory.seen_at),
+            },
+        )
+        await conn.execute(stmt)
+
+
+async def remove_objects(keys: Iterable[str], conn: AsyncSession):
+    '''Drops inventory rows for deleted objects. Does not commit.'''
+    keys = list(keys)
+    for start in range(0, len(keys), UPSERT_BATCH):
+        await conn.execute(
+            delete(ObjectInventory).where(
+                ObjectInventory.key.in_(keys[start : start + UPSERT_BATCH])
+            )
+        )
+
+
+async def get_objects(keys: Iterable[str], conn: AsyncSession) -> dict[str, ObjectInventory]:
+    """Returns the inventory rows for the given keys, keyed by object key"""
+    result = await conn.execute(
+        select(ObjectInventory).where(ObjectInventory.key.in_(list(keys)))
+    )
+    return {row.key: row for row in result.scalars()}
+
+
+def _filtered(stmt, prefix: Optional[str], search: Optional[str]):
+    if prefix:
+        stmt = stmt.where(ObjectInventory.key.like(_like_escape(prefix) + "%", escape="\\"))
+    if search:
+        stmt = stmt.where(
+            ObjectInventory.key.ilike("%" + _like_escape(search) + "%", escape="\\")
+        )
+    return stmt
+
+
+def _file_info(row) -> FileInfo:
+    return FileInfo(filename=row.key, last_modified=row.last_modified, size=row.size)
+
+
+async def list_all_objects(
+    conn: AsyncSession, prefix: Optional[str] = None, search: Optional[str] = None
+) -> FileInfoList:
+    """Lists every indexed object in key order"""
+    stmt = select(
+        ObjectInventory.key, ObjectInventory.last_modified, ObjectInventory.size
+    ).order_by(ObjectInventory.key)
+    result = await conn.execute(_filtered(stmt, prefix, search))
+    return FileInfoList(files=[_file_info(row) for row in result])
+
+
+async def list_objects_page(
+    conn: AsyncSession,
+    max_keys: int,
+    next_token: Optional[str] = None,
+    prefix: Optional[str] = None,
+    search: Optional[str] = None,
+) -> PaginateResponse:
+    """Lists a page of indexed objects using keyset pagination
+
+    Args:
+        max_keys:
+            Page size
+        next_token:
+            Key of the last object on the previous page
+        prefix:
+            Only list keys starting with this prefix
+        search:
+            Only list keys containing this text, case insensitive
+    Returns:
+        The page, with next_token set when more objects follow
+    """
+    stmt = select(
+        ObjectInventory.key, ObjectInventory.last_modified, ObjectInventory.size
+    ).order_by(ObjectInventory.key)
+    if next_token:
+        stmt = stmt.where(ObjectInventory.key > next_token)
+    # One extra row tells whether another page follows
+    result = await conn.execute(_filtered(stmt, prefix, search).limit(max_keys + 1))
+    rows = result.all()
+
+    files = [_file_info(row) for row in rows[:max_keys]]
+    if len(rows) > max_keys:
+        return PaginateResponse(files=files, next_token=files[-1].filename)
+    return PaginateResponse(files=files)
+
+
+async def reconcile_inventory(
+    client: AsyncR2Client, bucket: str, conn: AsyncSession
+) -> dict:
+    """Brings the inventory in line with a full listing of the bucket
+
+    Every listed page is upserted and committed as it arrives, then rows the
+    listing did not see are removed. Rows written by uploads during the run
+    carry a later seen_at, so they are never removed by it.
+
+    Returns:
+        Counts of objects scanned and stale rows removed
+    """
+    started = datetime.now(timezone.utc)
+    _reconcile_stats["runs"] += 1
+    _reconcile_stats["last_started_at"] = started.isoformat()
+    scanned = 0
+    try:
+        async for page in client.paginate("list_objects_v2", Bucket=bucket):
+            entries = [
+                inventory_entry(
+                    item["Key"], item["Size"], item.get("ETag"), item["LastModified"]
+                )
+                for item in page.get("Contents", [])
+            ]
+            if entries:
+                await record_objects(entries, conn, seen_at=started)
+                await conn.commit()
+            scanned += len(entries)
+
+        result = await conn.execute(
+            delete(ObjectInventory).where(ObjectInventory.seen_at < started)
+        )
+        await conn.commit()
+    except Exception as e:
+        await conn.rollback()
+        _reconcile_stats["failures"] += 1
+        _reconcile_stats["last_error"] = str(e)
+        raise
+
+    _reconcile_stats.update(
+        last_finished_at=datetime.now(timezone.utc).isoformat(),
+        last_scanned=scanned,
+        last_removed=result.rowcount,
+        last_error=None,
+    )
+    return {"scanned": scanned, "removed": result.rowcount}
+
+
+async def run_inventory_reconciler(
+    client: AsyncR2Client, bucket: str, session_factory, interval: float
+):
+    """Reconciles the inventory on startup and then every `interval` seconds"""
+    while True:
+        try:
+            async with session_factory() as conn:
+                await reconcile_inventory(client, bucket, conn)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print("Inventory Reconcile Error: ", str(e))
+        await asyncio.sleep(interval)
+
+
+def start_inventory_reconciler(session_factory) -> Optional[asyncio.Task]:
+    """Starts the periodic reconciler unless disabled or no bucket is configured"""
+    if settings.inventory_reconcile_interval <= 0 or not settings.r2_bucket_name:
+        return None
+    return asyncio.create_task(
+        run_inventory_reconciler(
+            get_r2_read_client(),
+            settings.r2_bucket_name,
+            session_factory,
+            settings.inventory_reconcile_interval,
+        )
+    )
@@ -1,30 +1,103 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, AsyncIterator
+
 import boto3
 from botocore.client import Config, BaseClient
+from services.r2_signer import PresignedUrlSigner
 from settings import get_settings
-from functools import lru_cache
 
 settings = get_settings()
 
+# Client methods that never touch the network and stay synchronous
+LOCAL_METHODS = {"generate_presigned_url", "generate_presigned_post", "can_paginate"}
+
+
+class AsyncR2Client:
+    """Awaitable facade over a boto3 S3 client.
+
+    Every API call runs on a dedicated thread pool sized to the client's
+    HTTP connection pool, so slow storage round trips never block the event
+    loop and never queue behind unrelated `asyncio.to_thread` work.
+
+    `await client.head_object(Bucket=..., Key=...)` works for any S3
+    operation; presigning stays synchronous since it is purely local.
+    """
+
+    def __init__(self, client: BaseClient, max_workers: int):
+        self.client = client
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="r2"
+        )
+
+    async def run(self, func, *args, **kwargs) -> Any:
+        """Runs a blocking callable on the storage thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    def __getattr__(self, name: str):
+        method = getattr(self.client, name)
+        if name in LOCAL_METHODS or not callable(method):
+            return method
+
+        async def call(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
+
+        call.__name__ = name
+        return call
+
+    async def paginate(self, operation: str, **kwargs) -> AsyncIterator[dict]:
+        """Yields result pages, fetching each one on the storage thread pool"""
+        pages = iter(self.client.get_paginator(operation).paginate(**kwargs))
+        while True:
+            page = await self.run(next, pages, None)
+            if page is None:
+                return
+            yield page
+
+
+def _client_config() -> Config:
+    return Config(
+        signature_version="s3v4",
+        max_pool_connections=settings.r2_max_pool_connections,
+        connect_timeout=settings.r2_connect_timeout,
+        read_timeout=settings.r2_read_timeout,
+        retries={"max_attempts": settings.r2_max_attempts, "mode": "standard"},
+    )
+
 
 @lru_cache()
-def get_r2_read_client() -> BaseClient:
-    return boto3.client(
+def get_r2_read_client() -> AsyncR2Client:
+    client = boto3.client(
         "s3",
         endpoint_url=f"https://{settings.r2_account_id}.r2.cloudflarestorage.com",
         aws_access_key_id=settings.r2_read_access_key_id,
         aws_secret_access_key=settings.r2_read_secret_access_key,
-        config=Config(signature_version="s3v4"),
+        config=_client_config(),
         region_name="auto",
     )
+    return AsyncR2Client(client, settings.r2_max_pool_connections)
 
 
 @lru_cache()
-def get_r2_rw_client() -> BaseClient:
-    return boto3.client(
+def get_r2_rw_client() -> AsyncR2Client:
+    client = boto3.client(
         "s3",
         endpoint_url=f"https://{settings.r2_account_id}.r2.cloudflarestorage.com",
         aws_access_key_id=settings.r2_rw_access_key_id,
         aws_secret_access_key=settings.r2_rw_secret_access_key,
-        config=Config(signature_version="s3v4"),
+        config=_client_config(),
         region_name="auto",
     )
+    return AsyncR2Client(client, settings.r2_max_pool_connections)
+
+
+@lru_cache()
+def get_r2_read_signer() -> PresignedUrlSigner:
+    return PresignedUrlSigner(
+        endpoint_url=f"https://{settings.r2_account_id}.r2.cloudflarestorage.com",
+        access_key_id=settings.r2_read_access_key_id,
+        secret_access_key=settings.r2_read_secret_access_key,
+        region="auto",
+    )
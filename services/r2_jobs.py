@@ -0,0 +1,317 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+from uuid import uuid4
+
+from botocore.exceptions import ClientError
+from sqlalchemy import select, update
+
+from models.enums import MultipartStatus
+from models.multipart_upload_model import MultipartUpload
+from schemas.r2_schemas import R2JobStatus
+from services.object_inventory_service import remove_objects
+from services.r2_client import AsyncR2Client
+from settings import get_settings
+
+settings = get_settings()
+
+CLEAR_BUCKET = "clear_bucket"
+ABORT_MPUS = "abort_mpus"
+ABORT_STALE_MPUS = "abort_stale_mpus"
+
+# Upload records read per page by the stale upload job
+UPLOAD_PAGE_SIZE = 1000
+
+# A listed page plus the cursor that lists the page after it (None on the last page)
+ListPage = Callable[[Optional[dict]], Awaitable[tuple[list[dict], Optional[dict]]]]
+ProcessPage = Callable[[list[dict]], Awaitable[tuple[int, int]]]
+
+# In-process registry, jobs do not survive a restart but report their cursor for resumption
+_jobs: dict[str, R2JobStatus] = {}
+_tasks: dict[str, asyncio.Task] = {}
+
+
+def get_job(job_id: str) -> Optional[R2JobStatus]:
+    return _jobs.get(job_id)
+
+
+async def _run_pipeline(
+    job: R2JobStatus, list_page: ListPage, process_page: ProcessPage, parallelism: int
+):
+    """Lists pages ahead of the workers and processes up to `parallelism` pages at once
+
+    `job.continuation` only advances past a page once it and every page
+    before it are processed, so resuming never skips unprocessed objects.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=parallelism)
+    cursors: dict[int, Optional[dict]] = {0: job.continuation}
+    finished: set[int] = set()
+    checkpoint = 0
+
+    def advance(seq: int):
+        nonlocal checkpoint
+        finished.add(seq)
+        while checkpoint in finished and checkpoint + 1 in cursors:
+            finished.discard(checkpoint)
+            checkpoint += 1
+            job.continuation = cursors[checkpoint]
+
+    async def lister():
+        seq = 0
+        while True:
+            items, next_cursor = await list_page(cursors[seq])
+            job.pages_scanned += 1
+            job.objects_scanned += len(items)
+            cursors[seq + 1] = next_cursor
+            await queue.put((seq, items))
+            if next_cursor is None:
+                break
+            seq += 1
+        for _ in range(parallelism):
+            await queue.put(None)
+
+    async def worker():
+        while (page := await queue.get()) is not None:
+            seq, items = page
+            if items:
+                processed, errors = await process_page(items)
+                job.objects_processed += processed
+                job.errors += errors
+            advance(seq)
+
+    tasks = [asyncio.create_task(lister())]
+    tasks += [asyncio.create_task(worker()) for _ in range(parallelism)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _supervise(job: R2JobStatus, pipeline: Awaitable):
+    try:
+        await pipeline
+        job.status = "completed"
+        job.continuation = None
+    except asyncio.CancelledError:
+        job.status = "cancelled"
+        raise
+    except Exception as e:
+        print("R2 Job Error: ", str(e))
+        job.status = "failed"
+        job.error = str(e)
+    finally:
+        job.finished_at = datetime.now(timezone.utc)
+        _tasks.pop(job.id, None)
+
+
+def _clear_bucket_pipeline(
+    client: AsyncR2Client, job: R2JobStatus, parallelism: int, session_factory=None
+):
+    async def list_page(cursor):
+        params = {"Bucket": job.bucket, "Prefix": job.prefix, "MaxKeys": 1000}
+        if cursor:
+            params["ContinuationToken"] = cursor["continuation_token"]
+        resp = await client.list_objects_v2(**params)
+        next_cursor = None
+        if resp.get("IsTruncated"):
+            next_cursor = {"continuation_token": resp["NextContinuationToken"]}
+        return resp.get("Contents", []), next_cursor
+
+    async def process_page(items):
+        resp = await client.delete_objects(
+            Bucket=job.bucket,
+            Delete={"Objects": [{"Key": item["Key"]} for item in items], "Quiet": False},
+        )
+        deleted = [item["Key"] for item in resp.get("Deleted", [])]
+        if session_factory and deleted:
+            async with session_factory() as conn:
+                await remove_objects(deleted, conn)
+                await conn.commit()
+        return len(resp.get("Deleted", [])), len(resp.get("Errors", []))
+
+    return _run_pipeline(job, list_page, process_page, parallelism)
+
+
+async def _mark_aborted(session_factory, upload_ids: list[str]):
+    """Marks the pending records of aborted uploads, freeing their final keys"""
+    if not session_factory or not upload_ids:
+        return
+    async with session_factory() as conn:
+        await conn.execute(
+            update(MultipartUpload)
+            .where(
+                MultipartUpload.upload_id.in_(upload_ids),
+                MultipartUpload.status == MultipartStatus.PENDING,
+            )
+            .values(status=MultipartStatus.ABORTED)
+        )
+        await conn.commit()
+
+
+def _abort_mpus_pipeline(
+    client: AsyncR2Client, job: R2JobStatus, parallelism: int, session_factory=None
+):
+    # Aborts are one call per upload, bounded across all pages in flight
+    limit = asyncio.Semaphore(parallelism)
+
+    async def list_page(cursor):
+        params = {"Bucket": job.bucket, "Prefix": job.prefix}
+        if cursor:
+            params["KeyMarker"] = cursor["key_marker"]
+            params["UploadIdMarker"] = cursor["upload_id_marker"]
+        resp = await client.list_multipart_uploads(**params) or {}
+        next_cursor = None
+        if resp.get("IsTruncated"):
+            next_cursor = {
+                "key_marker": resp.get("NextKeyMarker"),
+                "upload_id_marker": resp.get("NextUploadIdMarker"),
+            }
+        return resp.get("Uploads", []), next_cursor
+
+    async def abort(upload) -> bool:
+        async with limit:
+            try:
+                await client.abort_multipart_upload(
+                    Bucket=job.bucket, Key=upload["Key"], UploadId=upload["UploadId"]
+                )
+                return True
+            except Exception:
+                # already completed/aborted → ignore for idempotence
+                return False
+
+    async def process_page(items):
+        results = await asyncio.gather(*[abort(upload) for upload in items])
+        await _mark_aborted(
+            session_factory, [upload["UploadId"] for upload, ok in zip(items, results) if ok]
+        )
+        return sum(results), 0
+
+    return _run_pipeline(job, list_page, process_page, parallelism)
+
+
+def _abort_stale_mpus_pipeline(
+    client: AsyncR2Client, job: R2JobStatus, parallelism: int, session_factory=None
+):
+    """Aborts uploads whose records stayed pending since before the cutoff
+
+    Driven by the upload records rather than a bucket listing, so uploads
+    created at their final key outside staging/ are found as well. The
+    cutoff travels in the cursor, so a resumed job keeps it.
+    """
+    if session_factory is None:
+        raise ValueError("Aborting stale uploads needs a database session")
+    limit = asyncio.Semaphore(parallelism)
+
+    async def list_page(cursor):
+        stmt = (
+            select(MultipartUpload.upload_id, MultipartUpload.key)
+            .where(
+                MultipartUpload.status == MultipartStatus.PENDING,
+                MultipartUpload.created_at < datetime.fromisoformat(cursor["created_before"]),
+            )
+            .order_by(MultipartUpload.upload_id)
+            .limit(UPLOAD_PAGE_SIZE)
+        )
+        if job.prefix:
+            stmt = stmt.where(MultipartUpload.key.startswith(job.prefix, autoescape=True))
+        if cursor.get("upload_id"):
+            stmt = stmt.where(MultipartUpload.upload_id > cursor["upload_id"])
+        async with session_factory() as conn:
+            rows = (await conn.execute(stmt)).all()
+        next_cursor = None
+        if len(rows) == UPLOAD_PAGE_SIZE:
+            next_cursor = {**cursor, "upload_id": rows[-1].upload_id}
+        return [{"Key": row.key, "UploadId": row.upload_id} for row in rows], next_cursor
+
+    async def abort(upload) -> bool:
+        async with limit:
+            try:
+                await client.abort_multipart_upload(
+                    Bucket=job.bucket, Key=upload["Key"], UploadId=upload["UploadId"]
+                )
+                return True
+            except ClientError as e:
+                # Already gone from the bucket, only the record is left to close
+                return e.response.get("Error", {}).get("Code") == "NoSuchUpload"
+            except Exception:
+                return False
+
+    async def process_page(items):
+        results = await asyncio.gather(*[abort(upload) for upload in items])
+        await _mark_aborted(
+            session_factory, [upload["UploadId"] for upload, ok in zip(items, results) if ok]
+        )
+        return sum(results), len(results) - sum(results)
+
+    return _run_pipeline(job, list_page, process_page, parallelism)
+
+
+PIPELINES = {
+    CLEAR_BUCKET: _clear_bucket_pipeline,
+    ABORT_MPUS: _abort_mpus_pipeline,
+    ABORT_STALE_MPUS: _abort_stale_mpus_pipeline,
+}
+
+
+def _launch(
+    client: AsyncR2Client, job: R2JobStatus, parallelism: Optional[int], session_factory
+):
+    pipeline = PIPELINES[job.kind](
+        client, job, parallelism or settings.r2_job_parallelism, session_factory
+    )
+    _tasks[job.id] = asyncio.create_task(_supervise(job, pipeline))
+
+
+def start_job(
+    kind: str,
+    client: AsyncR2Client,
+    bucket: str,
+    prefix: str = "",
+    continuation: Optional[dict] = None,
+    parallelism: Optional[int] = None,
+    session_factory=None,
+) -> R2JobStatus:
+    """Starts a maintenance job in the background, optionally from a saved cursor
+
+    With a session factory, deleted objects are also dropped from the object inventory
+    and aborted uploads are marked in their records.
+    """
+    job = R2JobStatus(
+        id=uuid4().hex,
+        kind=kind,
+        bucket=bucket,
+        prefix=prefix,
+        continuation=continuation,
+        started_at=datetime.now(timezone.utc),
+    )
+    _jobs[job.id] = job
+    _launch(client, job, parallelism, session_factory)
+    return job
+
+
+def resume_job(
+    job_id: str,
+    client: AsyncR2Client,
+    parallelism: Optional[int] = None,
+    session_factory=None,
+) -> Optional[R2JobStatus]:
+    """Restarts a failed or cancelled job from its last checkpoint
+
+    Returns None for unknown jobs, running and completed jobs are returned as is.
+    """
+    job = _jobs.get(job_id)
+    if job is None or job.id in _tasks or job.status == "completed":
+        return job
+    job.status = "running"
+    job.error = None
+    job.finished_at = None
+    _launch(client, job, parallelism, session_factory)
+    return job
+
+
+async def wait_for_job(job_id: str):
+    task = _tasks.get(job_id)
+    if task:
+        await asyncio.shield(task)
@@ -1,90 +1,193 @@
+import asyncio
+import base64
+import binascii
 import mimetypes
-from typing import Optional
-from botocore.client import BaseClient
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+from uuid import UUID
 from fastapi import HTTPException, UploadFile
-from botocore.exceptions import ClientError
+from sqlalchemy.ext.asyncio import AsyncSession
 import zipfile
 import pathlib
 
-from schemas.r2_schemas import FileInfo, FileInfoList, PaginateResponse
+from schemas.r2_schemas import ManifestItem
+from services.object_inventory_service import (
+    get_objects,
+    inventory_entry,
+    record_objects,
+    remove_objects,
+)
+from services.r2_client import AsyncR2Client
+from services.r2_signer import PresignedUrlSigner
+from settings import get_settings
+from utils.ttl_cache import TTLCache
 
+# Batches larger than this are signed off the event loop
+OFFLOAD_SIGNING_THRESHOLD = 100
 
-def generate_image_url(
-    client: BaseClient, bucket: str, object_name: str, expiration=3600
+settings = get_settings()
+
+# Presigned URLs keyed by (bucket, key, expiration, signing window start)
+presigned_url_cache = TTLCache("presigned_urls", settings.presign_cache_size, ttl=3600)
+
+
+def _signing_window(expiration: int) -> tuple[int, int]:
+    """Returns the length and start of the current signing window in seconds
+
+    URLs are signed at the start of their window, so every participant gets the
+    same URL until a `presign_rotate_fraction` of its lifetime has passed.
+    """
+    window = max(1, int(expiration * settings.presign_rotate_fraction))
+    now = int(time.time())
+    return window, now - now % window
+
+
+async def generate_image_url(
+    signer: PresignedUrlSigner, bucket: str, object_name: str, expiration=3600
 ):
     """Retrieve a presigned url for an image from the specified R2 Bucket
 
     Args:
-        client:
-            S3 Client, used for connection to r2 via the S3 API
+        signer:
+            Presigned URL signer for the R2 read credentials
         bucket:
             Name of the R2 Bucket
-        key:
+        object_name:
             Name of the file in the bucket
         expiration:
             Time in seconds for the URL to remain valid, defaults to 3600
     Returns:
         Generated presigned image url
-    Raises:
-        404: Image not found error
     """
-    try:
-        response = client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": bucket, "Key": object_name},
-            ExpiresIn=expiration,
-        )
-        return response
-    except ClientError as e:
-        print("Error Fetching: ", str(e))
-        raise HTTPException(404, detail=str(e))
+    urls = await generate_url_list(signer, bucket, [object_name], expiration)
+    return urls[0]
 
 
-def upload_file_to_bucket(
-    client: BaseClient, bucket: str, object_name: str, file: UploadFile
+async def upload_file_to_bucket(
+    client: AsyncR2Client,
+    bucket: str,
+    object_name: str,
+    file: UploadFile,
+    conn: Optional[AsyncSession] = None,
 ):
     try:
         key = f"{object_name}"  # Might insert a custom path here if needed
-        client.upload_fileobj(file.file, bucket, key)
-        return {"status": "ok"}
+        await client.upload_fileobj(file.file, bucket, key)
     except Exception as e:
         print("Error Uploading: ", str(e))
         raise HTTPException(500, detail=str(e))
+    if conn is not None:
+        await record_objects([inventory_entry(key, file.size or 0)], conn)
+        await conn.commit()
+    return {"status": "ok"}
 
 
-def generate_url_list(
-    client: BaseClient, bucket: str, image_list: list[str], expiration=3600
+async def generate_url_list(
+    signer: PresignedUrlSigner, bucket: str, image_list: list[str], expiration=3600
 ) -> list[str]:
-    try:
-        generated_urls = []
-        for image_key in image_list:
-            response = client.generate_presigned_url(
-                "get_object",
-                Params={"Bucket": bucket, "Key": image_key},
-                ExpiresIn=expiration,
-            )
-            if response:
-                generated_urls.append(response)
-        return generated_urls
-    except ClientError as e:
-        print("Error Fetching: ", str(e))
-        raise HTTPException(404, detail=str(e))
-
-
-def upload_zip_file(client: BaseClient, bucket: str, zip_file: UploadFile, prefix: str):
+    """Retrieve presigned urls for a list of images from the specified R2 Bucket
+
+    URLs are served from a shared cache and only re-signed once the signing
+    window rotates, which keeps them stable across participants so browsers
+    and any CDN can cache the image bytes. Cache misses are signed locally in
+    a single batch, on a worker thread for large batches.
+
+    Args:
+        signer:
+            Presigned URL signer for the R2 read credentials
+        bucket:
+            Name of the R2 Bucket
+        image_list:
+            Names of the files in the bucket
+        expiration:
+            Time in seconds for the URLs to remain valid, defaults to 3600
+    Returns:
+        Generated presigned image urls in the same order as image_list
+    """
+    window, window_start = _signing_window(expiration)
+    cached = [
+        presigned_url_cache.get((bucket, key, expiration, window_start))
+        for key in image_list
+    ]
+    missing = list({key: None for key, url in zip(image_list, cached) if url is None})
+    if not missing:
+        return cached
+
+    signed_at = datetime.fromtimestamp(window_start, timezone.utc)
+    if len(missing) > OFFLOAD_SIGNING_THRESHOLD:
+        signed = await signer.apresign_get_many(bucket, missing, expiration, signed_at)
+    else:
+        signed = signer.presign_get_many(bucket, missing, expiration, signed_at)
+
+    signed_urls = dict(zip(missing, signed))
+    ttl = window_start + window - time.time()
+    for key, url in signed_urls.items():
+        presigned_url_cache.set((bucket, key, expiration, window_start), url, ttl=ttl)
+
+    return [url or signed_urls[key] for key, url in zip(image_list, cached)]
+
+
+def _zip_entries(zf: zipfile.ZipFile, prefix: str) -> list[tuple[zipfile.ZipInfo, str]]:
+    """Returns the (entry, object key) pairs to upload, JPEG images only"""
+    entries = []
+    for item in zf.infolist():
+        if item.is_dir() or "DS_Store" in item.filename or "__MACOSX" in item.filename:
+            continue
+        # SANITIZE FILENAME
+        raw_path = pathlib.PurePosixPath(item.filename)
+        safe_parts = [p for p in raw_path.parts if p not in ("", ".", "..")]
+        if not safe_parts:
+            continue
+        content_type, _ = mimetypes.guess_type(safe_parts[-1])
+        # ONLY UPLOAD IMAGES
+        if content_type != "image/jpeg":
+            continue
+        entries.append((item, str(pathlib.PurePosixPath(prefix, safe_parts[-1]))))
+    return entries
+
+
+async def _delete_keys(client: AsyncR2Client, bucket: str, keys: list[str]):
+    """Batch deletes keys, up to 1000 per DeleteObjects call"""
+    for start in range(0, len(keys), 1000):
+        await client.delete_objects(
+            Bucket=bucket,
+            Delete={"Objects": [{"Key": key} for key in keys[start : start + 1000]]},
+        )
+
+
+async def upload_zip_file(
+    client: AsyncR2Client,
+    bucket: str,
+    zip_file: UploadFile,
+    prefix: str,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    conn: Optional[AsyncSession] = None,
+):
     """Upload a Zip File to r2
 
+    Entries are decompressed one at a time into a bounded queue and uploaded
+    concurrently by a pool of workers, so at most a few decompressed images
+    are held in memory while uploads overlap.
+
     Args:
         client:
-            S3 Client, used for connection to r2 via the S3 API
+            Async S3 Client, used for connection to r2 via the S3 API
         bucket:
             Name of the R2 Bucket
         zip_file:
             A fastAPI UploadFile with a .zip extension
         prefix:
             Indicate if you want to upload to a subfolder or specific directory
+        workers:
+            Number of concurrent uploads, defaults to `zip_upload_workers`
+        progress:
+            Called with (uploaded, total) after each file is uploaded
+        conn:
+            Database session, uploaded files are added to the object inventory when given
     Returns:
-        200: details: Uploaded File Name, Bucket Name, and Prefix
+        200: details: Uploaded File Name, Bucket Name, and Prefix, plus file count and throughput
     Raises:
         500: Upload Failed. Performs a rollback on failure, automatically deletes files that were uploaded to prevent partial uploading of folder.
     """
@@ -92,114 +195,201 @@ def upload_zip_file(client: BaseClient, bucket: str, zip_file: UploadFile, prefi
     if not zip_file.filename.lower().endswith(".zip"):
         raise HTTPException(status_code=400, detail="Must upload a .zip file")
     try:
-        zf = zipfile.ZipFile(zip_file.file)
+        zf = await asyncio.to_thread(zipfile.ZipFile, zip_file.file)
     except zipfile.BadZipFile:
         raise HTTPException(status_code=400, detail="Invalid ZIP archive")
 
-    # VALIDATE FILE NAME
-    uploaded = []
-    zf = zipfile.ZipFile(zip_file.file)
-    try:
-        for item in zf.infolist():
-            if (
-                item.is_dir()
-                or "DS_Store" in item.filename
-                or "__MACOSX" in item.filename
-            ):
+    workers = workers or settings.zip_upload_workers
+    entries = _zip_entries(zf, prefix)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+    uploaded: list[str] = []
+    inventory: list[dict] = []
+    uploaded_bytes = 0
+    upload_seconds = 0.0
+    failure: Optional[str] = None
+    start = time.perf_counter()
+
+    async def produce():
+        nonlocal failure
+        for item, key in entries:
+            if failure:
+                break
+            try:
+                data = await asyncio.to_thread(zf.read, item)
+            except Exception as e:
+                failure = f"'{item.filename}': {e}"
+                break
+            # Blocks while the queue is full, which bounds memory use
+            await queue.put((item.filename, key, data))
+        for _ in range(workers):
+            await queue.put(None)
+
+    async def upload():
+        nonlocal failure, uploaded_bytes, upload_seconds
+        while (job := await queue.get()) is not None:
+            filename, key, data = job
+            # After a failure the queue is only drained, in-flight uploads finish first
+            if failure:
                 continue
-            # SANITIZE FILENAME
-            raw_path = pathlib.PurePosixPath(item.filename)
-            safe_parts = [p for p in raw_path.parts if p not in ("", ".", "..")]
-            if not safe_parts:
+            file_start = time.perf_counter()
+            try:
+                resp = await client.put_object(
+                    Bucket=bucket, Key=key, Body=data, ContentType="image/jpeg"
+                )
+            except Exception as e:
+                failure = failure or f"'{filename}': {e}"
                 continue
+            upload_seconds += time.perf_counter() - file_start
+            uploaded.append(key)
+            inventory.append(inventory_entry(key, len(data), (resp or {}).get("ETag")))
+            uploaded_bytes += len(data)
+            if progress:
+                progress(len(uploaded), len(entries))
 
-            safe_key = pathlib.PurePosixPath(prefix, safe_parts[-1])
-
-            # OPEN FILE AND GET TYPE
-            with zf.open(item) as extracted_file:
-                content_type, _ = mimetypes.guess_type(safe_parts[-1])
-                # ONLY UPLOAD IMAGES
-                if content_type != "image/jpeg":
-                    continue
-                extra_args = {}
-                if content_type:
-                    extra_args["ContentType"] = content_type
-                    # UPLOAD FILE
-                    client.upload_fileobj(
-                        Fileobj=extracted_file,
-                        Bucket=bucket,
-                        Key=str(safe_key),
-                        ExtraArgs=extra_args,
-                    )
-                    uploaded.append(safe_key)
-    except Exception as e:
+    try:
+        await asyncio.gather(produce(), *[upload() for _ in range(workers)])
+    finally:
+        zf.close()
+
+    if failure:
         if uploaded:
-            client.delete_objects(
-                Bucket=bucket,
-                Delete={"Objects": [{"Key": k} for k in uploaded]},
-            )
+            await _delete_keys(client, bucket, uploaded)
         raise HTTPException(
             status_code=500,
-            detail=f"Failed uploading, rolled back: '{item.filename}': {e}",
+            detail=f"Failed uploading, rolled back: {failure}",
         )
+
+    if conn is not None:
+        await record_objects(inventory, conn)
+        await conn.commit()
+
+    elapsed = time.perf_counter() - start
     return {
         "detail": (
             f"Uploaded files from {zip_file.filename} "
             f"to bucket '{bucket}' under prefix '{prefix}' "
-        )
+        ),
+        "files": len(uploaded),
+        "bytes": uploaded_bytes,
+        "elapsed_seconds": round(elapsed, 3),
+        "files_per_second": round(len(uploaded) / elapsed, 2) if elapsed else None,
+        "avg_file_seconds": round(upload_seconds / len(uploaded), 4) if uploaded else None,
     }
 
 
-def delete_file_from_bucket(client: BaseClient, bucket: str, key: str):
+async def delete_file_from_bucket(
+    client: AsyncR2Client, bucket: str, key: str, conn: Optional[AsyncSession] = None
+):
     try:
-        client.delete_object(Bucket=bucket, Key=key)
-        return {"status": "success"}
+        await client.delete_object(Bucket=bucket, Key=key)
     except Exception as e:
         print("Error Uploading: ", str(e))
         raise HTTPException(500, detail=str(e))
+    if conn is not None:
+        await remove_objects([key], conn)
+        await conn.commit()
+    return {"status": "success"}
 
 
-def get_all_files_from_bucket(client: BaseClient, bucket: str):
-    paginator = client.get_paginator("list_objects_v2")
-    all_keys = []
-    for page in paginator.paginate(Bucket=bucket):
-        for item in page.get("Contents", []):
-            all_keys.append(
-                FileInfo(
-                    filename=item["Key"],
-                    last_modified=item["LastModified"],
-                    size=item["Size"],
-                )
-            )
+def _verified_sha256(item: ManifestItem, head: dict) -> Optional[str]:
+    """The manifest's sha256 if the object's stored SHA-256 checksum confirms it
 
-    return FileInfoList(files=all_keys)
+    Objects uploaded without a full-object checksum, including multipart
+    composites ("<hash>-<parts>"), cannot confirm the hash and return None.
 
+    Raises:
+        HTTPException: 409 Checksum mismatch
+    """
+    checksum = head.get("ChecksumSHA256")
+    if item.sha256 is None or not checksum or "-" in checksum:
+        return None
+    try:
+        actual = base64.b64decode(checksum, validate=True).hex()
+    except (binascii.Error, ValueError):
+        return None
+    if actual != item.sha256.lower():
+        raise HTTPException(status_code=409, detail=f"Checksum mismatch for {item.key}")
+    return actual
 
-def get_file_info_page(
-    client: BaseClient, bucket: str, next_token: Optional[str], max_keys: Optional[int]
-):
-    parameters = {
-        "Bucket": bucket,
-        "MaxKeys": max_keys,
-    }
-    if next_token:
-        parameters["ContinuationToken"] = next_token
 
-    response = client.list_objects_v2(**parameters)
+async def verify_manifest_items(
+    client: AsyncR2Client,
+    bucket: str,
+    items: list[ManifestItem],
+    owner: str,
+    conn: Optional[AsyncSession] = None,
+    concurrency: Optional[int] = None,
+) -> dict:
+    """Checks that every manifest item exists with the declared size and owner
+
+    Items whose inventory row already matches the owner, size and declared
+    sha256 are trusted without a HEAD. The rest are HEADed concurrently and
+    the first mismatch cancels the remaining checks. A sha256 is only stored
+    in the inventory once the object's own SHA-256 checksum has confirmed it.
+
+    Args:
+        client:
+            Async S3 Client, used for connection to r2 via the S3 API
+        bucket:
+            Name of the R2 Bucket
+        items:
+            Manifest items to verify
+        owner:
+            Id of the user that must own every item
+        conn:
+            Database session, enables the inventory shortcut and records verified items
+        concurrency:
+            Maximum HEAD requests in flight, defaults to `archive_verify_concurrency`
+    Returns:
+        Counts of items trusted from the inventory and items HEADed
+    Raises:
+        409: Size mismatch
+        409: Checksum mismatch
+        403: Not owner
+    """
+    pending = items
+    if conn is not None and settings.archive_verify_from_inventory:
+        known = await get_objects([item.key for item in items], conn)
+        pending = []
+        for item in items:
+            row = known.get(item.key)
+            if (
+                row is None
+                or str(row.owner) != owner
+                or row.size != item.size
+                or (item.sha256 is not None and row.sha256 != item.sha256.lower())
+            ):
+                pending.append(item)
 
-    if (
-        "ResponseMetadata" not in response
-        or response["ResponseMetadata"]["HTTPStatusCode"] != 200
-    ):
-        raise HTTPException(500, "Could not list R2 objects")
+    limit = asyncio.Semaphore(concurrency or settings.archive_verify_concurrency)
 
-    files = [
-        FileInfo(
-            filename=item["Key"], last_modified=item["LastModified"], size=item["Size"]
+    async def verify(item: ManifestItem) -> dict:
+        async with limit:
+            head = await client.head_object(Bucket=bucket, Key=item.key, ChecksumMode="ENABLED")
+        if head["ContentLength"] != item.size:
+            raise HTTPException(status_code=409, detail=f"Size mismatch for {item.key}")
+        if head.get("Metadata", {}).get("owner") != owner:
+            raise HTTPException(status_code=403, detail=f"Not owner of {item.key}")
+        return inventory_entry(
+            item.key,
+            head["ContentLength"],
+            head.get("ETag"),
+            head.get("LastModified"),
+            owner=UUID(owner),
+            sha256=_verified_sha256(item, head),
         )
-        for item in response.get("Contents", [])
-    ]
-    if response.get("IsTruncated"):
-        token = response.get("NextContinuationToken")
-        return PaginateResponse(files=files, next_token=token)
-    return PaginateResponse(files=files)
+
+    tasks = [asyncio.create_task(verify(item)) for item in pending]
+    try:
+        # Fail fast, the first failed check is raised and the others are cancelled
+        for task in asyncio.as_completed(tasks):
+            await task
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    if conn is not None and tasks:
+        await record_objects([task.result() for task in tasks], conn)
+        await conn.commit()
+    return {"trusted": len(items) - len(pending), "headed": len(pending)}
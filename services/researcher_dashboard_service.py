@@ -3,38 +3,42 @@ from fastapi import HTTPException
 from sqlalchemy import delete, exists, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models.conclusion_config_model import ConclusionConfiguration
 from models.study_model import Study
 from models.study_result_model import StudyResults
-from models.study_response_model import StudyResponse
 from models.study_config_model import StudyConfiguration
-from models.survey_answers_model import SurveyAnswer
 from models.user_model import User
-from schemas.const import TAIL_LEN
+from services.document_storage import get_document_storage
+from services.study_retrieval_service import invalidate_study_config
+from services.study_summary_service import retract_submission
 from schemas.researcher_dashboard_schema import (
-    ResultsExportSchema,
     StudyResponseSchema,
     StudyResultsSchema,
-    SurveyAnswerSchema,
 )
 
 async def get_config_id(researcher:UUID, studyCode:str, conn:AsyncSession) -> UUID:
-    stmt = select(StudyConfiguration.id).join(Study).where(Study.researcher == researcher)
+    stmt = (
+        select(StudyConfiguration.id)
+        .join(Study)
+        .where(
+            StudyConfiguration.study_code == studyCode,
+            Study.researcher == researcher,
+        )
+    )
     res = await conn.execute(stmt)
-    configs = res.scalars()
-    config_id = [str(config) for config in configs if str(config)[-TAIL_LEN:] == studyCode]
-    return config_id[0]
+    config_id = res.scalar_one_or_none()
+    if config_id is None:
+        raise HTTPException(404, detail="Study Not Found")
+    return config_id
 
 
 async def get_study_codes(conn: AsyncSession, researcher_id: UUID) -> list[str]:
     stmt = (
-        select(StudyConfiguration.id)
+        select(StudyConfiguration.study_code)
         .join(Study)
         .where(Study.researcher == researcher_id)
     )
     res = await conn.execute(stmt)
-    rows = res.scalars()
-    study_codes = [str(config_id)[-TAIL_LEN:] for config_id in rows]
+    study_codes = list(res.scalars())
     return study_codes
 
 
@@ -106,7 +110,7 @@ async def get_all_study_results(
     return study_results
 
 
-async def _validate_ownership(
+async def validate_ownership(
     study_results_id: UUID, researcher_id: UUID, conn: AsyncSession
 ) -> StudyResultsSchema:
     stmt = (
@@ -128,90 +132,6 @@ async def _validate_ownership(
     )
 
 
-async def _check_for_survey(study_results_id: UUID, conn: AsyncSession):
-    stmt = (
-        select(ConclusionConfiguration.has_survey)
-        .join(StudyConfiguration)
-        .join(Study)
-        .join(StudyResults)
-        .where(StudyResults.id == study_results_id)
-    )
-    res = await conn.execute(stmt)
-    has_survey = res.scalar_one_or_none()
-    if not has_survey:
-        raise HTTPException(500, detail="Unable to Find Conclusion Configuration")
-    return has_survey
-
-
-async def _get_demographics(subject_id: UUID, conn: AsyncSession):
-    stmt = select(SurveyAnswer).where(SurveyAnswer.subject_id == subject_id)
-
-    res = await conn.execute(stmt)
-    demographics = res.scalar_one_or_none()
-    if demographics:
-        return SurveyAnswerSchema(
-            subject_id=demographics.subject_id,
-            age=demographics.age,
-            sex=demographics.sex,
-            race=demographics.race,
-        )
-    return demographics
-
-
-async def get_study_response_by_id(
-    study_results_id: UUID, researcher_id: UUID, conn: AsyncSession
-) -> ResultsExportSchema:
-    study_result = await _validate_ownership(study_results_id, researcher_id, conn)
-    has_survey = _check_for_survey(study_results_id, conn)
-
-    if has_survey:
-        demographics = await _get_demographics(study_result.subject_id, conn)
-
-    if study_result:
-        stmt = select(StudyResponse).where(
-            StudyResponse.study_results_id == study_result.id
-        )
-        res = await conn.execute(stmt)
-        rows = res.scalars()
-        if not rows:
-            raise HTTPException(500, detail="Responses not Found")
-        study_responses: list[StudyResponseSchema] = []
-        for response in rows:
-            study_responses.append(
-                StudyResponseSchema(
-                    image_id=response.image_id,
-                    answer=response.answer,
-                    response_time=response.response_time,
-                )
-            )
-        if has_survey:
-            return ResultsExportSchema(
-                results=study_result,
-                responses=study_responses,
-                demographics=demographics,
-            )
-        return ResultsExportSchema(results=study_result, responses=study_responses)
-
-
-async def get_all_study_responses(
-    researcher_id: UUID, conn: AsyncSession
-) -> list[ResultsExportSchema]:
-    # Fetch List of Study Results
-    stmt = (
-        select(StudyResults)
-        .join(Study)
-        .where(
-            Study.researcher == researcher_id,
-        )
-    )
-    res = await conn.execute(stmt)
-    rows = res.scalars()
-    export_data = []
-    for row in rows:
-        export_data.append(await get_study_response_by_id(row.id, researcher_id, conn))
-    return export_data
-
-
 async def delete_study_config(config_id: UUID, researcher: UUID, conn: AsyncSession):
     try:
         _validate = exists().where(
@@ -222,12 +142,21 @@ async def delete_study_config(config_id: UUID, researcher: UUID, conn: AsyncSess
             delete(StudyConfiguration)
             .where(StudyConfiguration.id == config_id,
                 _validate)
+            .returning(StudyConfiguration.study_code)
         )
-        await conn.execute(stmt)
+        res = await conn.execute(stmt)
+        study_code = res.scalar_one_or_none()
         await conn.commit()
     except Exception as e:
         raise HTTPException(500, detail=str(e))
 
+    if study_code is not None:
+        invalidate_study_config(config_id, study_code)
+        try:
+            await get_document_storage().delete(config_id)
+        except Exception as e:
+            print("Document Cleanup Error: ", str(e))
+
 
     stmt = select(StudyConfiguration).where(StudyConfiguration.id == config_id)
     res = await conn.execute(stmt)
@@ -245,9 +174,15 @@ async def delete_study_result(result_id: UUID, researcher: UUID, conn: AsyncSess
             delete(StudyResults)
             .where(StudyResults.id == result_id,
                 _validate)
+            .returning(StudyResults.id)
         )
-        await conn.execute(stmt)
-        await conn.commit()
+        # Totals are retracted first, responses cascade away with the result
+        await retract_submission(result_id, conn)
+        res = await conn.execute(stmt)
+        if res.scalar_one_or_none() is None:
+            await conn.rollback()
+        else:
+            await conn.commit()
     except Exception as e:
         raise HTTPException(500, detail=str(e))
 
@@ -0,0 +1,209 @@
+import csv
+import io
+from typing import AsyncIterator, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import Select, select
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None  # Columnar exports need the "export" extra
+
+from db.client import AsyncSessionLocal
+from models.enums import ExportFormat
+from models.study_model import Study
+from models.study_response_model import StudyResponse
+from models.study_result_model import StudyResults
+from models.survey_answers_model import SurveyAnswer
+from settings import get_settings
+
+settings = get_settings()
+
+CSV_HEADER = [
+    "Study ID",
+    "Subject ID",
+    "Submission",
+    "CFD Image ID",
+    "Answer",
+    "Response time (ms)",
+    "Age",
+    "Sex",
+    "Race",
+]
+
+
+def export_rows_stmt(researcher_id: UUID, study_results_id: Optional[UUID] = None) -> Select:
+    """One row per response, flattened with its result and the subject's demographics"""
+    stmt = (
+        select(
+            StudyResults.id,
+            StudyResults.study_id,
+            StudyResults.config_id,
+            StudyResults.subject_id,
+            StudyResults.submitted,
+            StudyResponse.image_id,
+            StudyResponse.answer,
+            StudyResponse.response_time,
+            SurveyAnswer.age,
+            SurveyAnswer.sex,
+            SurveyAnswer.race,
+        )
+        .join(StudyResults, StudyResults.id == StudyResponse.study_results_id)
+        .join(Study, Study.id == StudyResults.study_id)
+        .outerjoin(SurveyAnswer, SurveyAnswer.subject_id == StudyResults.subject_id)
+        .where(Study.researcher == researcher_id)
+        .order_by(StudyResults.submitted, StudyResults.id, StudyResponse.id)
+    )
+    if study_results_id is not None:
+        stmt = stmt.where(StudyResults.id == study_results_id)
+    return stmt
+
+
+async def stream_export_rows(
+    stmt: Select,
+    session_factory=AsyncSessionLocal,
+    yield_per: Optional[int] = None,
+) -> AsyncIterator[list[tuple]]:
+    """Yields partitions of export rows from a server-side cursor
+
+    Opens its own session, since the response body is produced after the
+    request's session dependency may already have been closed.
+    """
+    yield_per = yield_per or settings.export_yield_per
+    async with session_factory() as session:
+        result = await session.stream(stmt.execution_options(yield_per=yield_per))
+        async for partition in result.partitions():
+            yield partition
+
+
+async def stream_csv(partitions: AsyncIterator[list[tuple]]) -> AsyncIterator[str]:
+    """Writes CSV one partition at a time, so memory stays bounded by the partition size"""
+    buffer = io.StringIO()
+    doc = csv.writer(buffer)
+    doc.writerow(CSV_HEADER)
+    yield buffer.getvalue()
+
+    async for partition in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in partition:
+            row_data = [
+                row.study_id,
+                row.subject_id,
+                row.submitted,
+                row.image_id,
+                row.answer,
+                row.response_time,
+            ]
+            # Subjects without demographics only get the response columns
+            if row.age is not None:
+                row_data.extend([row.age, row.sex, row.race])
+            doc.writerow(row_data)
+        yield buffer.getvalue()
+
+
+def _arrow_schema():
+    """Flattened ResultsExportSchema fields with typed, dictionary-encoded columns"""
+    category = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [
+            ("id", pa.string()),
+            ("study_id", category),
+            ("config_id", category),
+            ("subject_id", category),
+            ("submitted", pa.timestamp("us")),
+            ("image_id", category),
+            ("answer", pa.int32()),
+            ("response_time", pa.float64()),
+            ("age", pa.int32()),
+            ("sex", category),
+            ("race", category),
+        ]
+    )
+
+
+def _record_batch(partition: list, schema) -> "pa.RecordBatch":
+    columns = list(zip(*partition)) if partition else [[] for _ in schema]
+    arrays = []
+    for field, values in zip(schema, columns):
+        if field.name in ("id", "study_id", "config_id", "subject_id"):
+            values = [str(value) for value in values]
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only sink that hands bytes back out as they are produced.
+
+    Keeps its own position, since the Parquet footer records absolute offsets.
+    """
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+async def stream_columnar(
+    partitions: AsyncIterator[list[tuple]], export_format: ExportFormat
+) -> AsyncIterator[bytes]:
+    """Writes each partition as a Parquet row group or an Arrow IPC record batch"""
+    schema = _arrow_schema()
+    sink = _ChunkSink()
+    if export_format == ExportFormat.PARQUET:
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(
+            sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd")
+        )
+
+    async for partition in partitions:
+        writer.write_batch(_record_batch(partition, schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+    ExportFormat.ARROW: "application/vnd.apache.arrow.stream",
+}
+
+
+def export_body(partitions: AsyncIterator[list[tuple]], export_format: ExportFormat):
+    """Returns the response body and media type for the requested format
+
+    Raises:
+        HTTPException: 501 Columnar export support is not installed
+    """
+    if export_format == ExportFormat.CSV:
+        return stream_csv(partitions), EXPORT_MEDIA_TYPES[export_format]
+    if pa is None:
+        raise HTTPException(
+            status_code=501,
+            detail=f"{export_format.value} export requires the pyarrow package",
+        )
+    return stream_columnar(partitions, export_format), EXPORT_MEDIA_TYPES[export_format]
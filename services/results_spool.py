@@ -0,0 +1,324 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, IntegrityError, InterfaceError, OperationalError
+
+from schemas.study_results_schema import StudyResultsPayload
+from services.study_response_service import insert_study_responses
+from services.study_results_service import create_study_result
+from services.study_summary_service import record_submission
+from settings import get_settings
+from utils.metrics import register_metrics
+
+settings = get_settings()
+
+# Errors that mean the database could not be reached rather than that a submission is bad
+UNAVAILABLE_ERRORS = (OperationalError, InterfaceError, OSError)
+
+
+class DatabaseUnavailable(Exception):
+    """Raised when a drain stops because Postgres is down, no attempts are counted"""
+
+
+def _is_unavailable(error: Exception) -> bool:
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, UNAVAILABLE_ERRORS)
+
+
+class ResultsSpool:
+    """Durable local spool for study result submissions.
+
+    Submissions are appended to a SQLite file (WAL, synchronous=FULL, so each
+    enqueue is fsync'd before it is acknowledged) keyed by
+    (config_id, subject_id), which makes enqueueing idempotent. Rows stay in
+    the spool until they are committed to Postgres, so anything left behind
+    by a crash or restart is replayed by the next drainer.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 5):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS submissions (
+                config_id TEXT NOT NULL,
+                subject_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                enqueued_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                PRIMARY KEY (config_id, subject_id)
+            )
+            """
+        )
+        self.enqueued = 0
+        self.duplicates = 0
+        self.drained = 0
+        self.failed = 0
+        self.batches = 0
+        self.outages = 0
+
+    def enqueue(self, payload: StudyResultsPayload) -> bool:
+        """Appends a submission, returns False if it is already spooled"""
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO submissions (config_id, subject_id, payload, enqueued_at) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    str(payload.identity.config_id),
+                    str(payload.identity.subject_id),
+                    payload.model_dump_json(),
+                    time.time(),
+                ),
+            )
+        if cursor.rowcount == 1:
+            self.enqueued += 1
+            return True
+        self.duplicates += 1
+        return False
+
+    def peek(self, limit: int) -> list[tuple[str, str, StudyResultsPayload]]:
+        """Returns the oldest submissions that have not exhausted their attempts"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT config_id, subject_id, payload FROM submissions "
+                "WHERE attempts < ? ORDER BY rowid LIMIT ?",
+                (self.max_attempts, limit),
+            ).fetchall()
+        return [
+            (config_id, subject_id, StudyResultsPayload.model_validate_json(payload))
+            for config_id, subject_id, payload in rows
+        ]
+
+    def remove(self, keys: list[tuple[str, str]]):
+        with self._lock:
+            self._db.executemany(
+                "DELETE FROM submissions WHERE config_id = ? AND subject_id = ?", keys
+            )
+
+    def mark_failed(self, key: tuple[str, str], error: str):
+        with self._lock:
+            self._db.execute(
+                "UPDATE submissions SET attempts = attempts + 1, last_error = ? "
+                "WHERE config_id = ? AND subject_id = ?",
+                (error, *key),
+            )
+        self.failed += 1
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM submissions").fetchone()[0]
+
+    def dead(self) -> int:
+        """Submissions that exhausted their attempts and need manual attention"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT count(*) FROM submissions WHERE attempts >= ?", (self.max_attempts,)
+            ).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth(),
+            "dead": self.dead(),
+            "enqueued": self.enqueued,
+            "duplicates": self.duplicates,
+            "drained": self.drained,
+            "failed": self.failed,
+            "batches": self.batches,
+            "outages": self.outages,
+        }
+
+
+async def _store_submission(payload: StudyResultsPayload, conn):
+    # Database errors propagate unchanged, so an outage is told apart from a bad submission
+    study_result_id = await create_study_result(
+        config_id=payload.identity.config_id,
+        subject_id=payload.identity.subject_id,
+        conn=conn,
+    )
+    await insert_study_responses(study_result_id, payload.responses, conn)
+    await record_submission(study_result_id, payload.responses, conn)
+
+
+class SpoolDrainer:
+    """Background task that drains the spool into Postgres in batched transactions"""
+
+    def __init__(
+        self,
+        spool: ResultsSpool,
+        session_factory,
+        batch_size: int,
+        poll_interval: float,
+        max_backoff: float = 30,
+    ):
+        self.spool = spool
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self.outage_streak = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def notify(self):
+        self._wakeup.set()
+
+    def backoff(self) -> float:
+        """Seconds to wait before retrying while the database is unavailable"""
+        return min(self.poll_interval * 2 ** self.outage_streak, self.max_backoff)
+
+    async def run(self):
+        while True:
+            try:
+                drained = await self.drain_once()
+                self.outage_streak = 0
+            except DatabaseUnavailable as e:
+                # Submissions stay in the spool untouched until Postgres is back
+                print("Spool Drain Paused: ", str(e))
+                self.outage_streak += 1
+                self.spool.outages += 1
+                await asyncio.sleep(self.backoff())
+                continue
+            except Exception as e:
+                print("Spool Drain Error: ", str(e))
+                drained = 0
+            if drained == 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def drain_once(self) -> int:
+        """Commits one batch, returns the number of submissions removed from the spool
+
+        Raises:
+            DatabaseUnavailable: Postgres could not be reached, after removing what was committed
+        """
+        batch = await asyncio.to_thread(self.spool.peek, self.batch_size)
+        if not batch:
+            return 0
+
+        outage = None
+        async with self.session_factory() as conn:
+            try:
+                for _, _, payload in batch:
+                    await _store_submission(payload, conn)
+                await conn.commit()
+                done = [(config_id, subject_id) for config_id, subject_id, _ in batch]
+            except Exception as e:
+                if _is_unavailable(e):
+                    raise DatabaseUnavailable(str(e)) from e
+                await conn.rollback()
+                done, outage = await self._drain_individually(batch, conn)
+
+        await asyncio.to_thread(self.spool.remove, done)
+        self.spool.drained += len(done)
+        self.spool.batches += 1
+        if outage is not None:
+            raise outage
+        return len(done)
+
+    async def _drain_individually(
+        self, batch, conn
+    ) -> tuple[list[tuple[str, str]], Optional[DatabaseUnavailable]]:
+        """Isolates the submission that broke a batch, one transaction each
+
+        A submission that fails on a healthy connection is charged an attempt.
+        The connection is probed before charging, so failures caused by the
+        database going away are not held against the submission.
+        """
+        done = []
+        for config_id, subject_id, payload in batch:
+            key = (config_id, subject_id)
+            try:
+                await _store_submission(payload, conn)
+                await conn.commit()
+                done.append(key)
+            except IntegrityError:
+                # Already stored, most likely by a replay after a crash
+                await conn.rollback()
+                self.spool.duplicates += 1
+                done.append(key)
+            except Exception as e:
+                if _is_unavailable(e):
+                    return done, DatabaseUnavailable(str(e))
+                outage = await self._probe(conn)
+                if outage is not None:
+                    return done, outage
+                await asyncio.to_thread(self.spool.mark_failed, key, str(e))
+        return done, None
+
+    async def _probe(self, conn) -> Optional[DatabaseUnavailable]:
+        """Rolls back a failed submission and checks the connection still works"""
+        try:
+            await conn.rollback()
+            await conn.execute(text("SELECT 1"))
+        except Exception as e:
+            if _is_unavailable(e):
+                return DatabaseUnavailable(str(e))
+            raise
+        return None
+
+
+@lru_cache
+def get_results_spool() -> ResultsSpool:
+    spool = ResultsSpool(settings.results_spool_path, settings.results_spool_max_attempts)
+    register_metrics("results_spool", spool.stats)
+    return spool
+
+
+_drainer: Optional[SpoolDrainer] = None
+
+
+def start_results_spool(session_factory) -> SpoolDrainer:
+    """Starts draining the spool, replaying anything left from a previous run"""
+    global _drainer
+    _drainer = SpoolDrainer(
+        get_results_spool(),
+        session_factory,
+        settings.results_spool_batch_size,
+        settings.results_spool_poll_interval,
+        settings.results_spool_max_backoff,
+    )
+    _drainer.start()
+    return _drainer
+
+
+async def enqueue_study_results(payload: StudyResultsPayload):
+    """Acknowledges a submission once it is durable in the local spool
+
+    Raises:
+        HTTPException: 409 Duplicate submission
+    """
+    accepted = await asyncio.to_thread(get_results_spool().enqueue, payload)
+    if not accepted:
+        raise HTTPException(status_code=409, detail="Subject cannot have duplicate submissions.")
+    if _drainer is not None:
+        _drainer.notify()
@@ -1,5 +1,7 @@
 import uuid
 import csv
+import hashlib
+from datetime import datetime, timezone
 from fastapi import HTTPException, UploadFile
 from sqlalchemy.exc import IntegrityError
 
@@ -13,7 +15,10 @@ from models.experiment_config_model import ExperimentConfiguration
 from models.learning_config_model import LearningConfiguration
 from models.uploaded_files_model import UploadedFiles
 from models.waiting_config_model import WaitingConfiguration
+from models.enums import StudyDocument
 from schemas.const import TAIL_LEN, MAX_ATTEMPTS
+from services.document_storage import get_document_storage
+from services.study_retrieval_service import cache_study_config
 from schemas.study_config_request_schema import (
     StudyConfigRequest,
     LearningPhaseRequest,
@@ -34,6 +39,7 @@ async def add_study(config: StudyConfigRequest, conn: AsyncSession):
     Raises:
         HTTPException: 500: Exception Details
     """
+    study_config = None
     try:
         study_id = uuid.uuid4()
         # config_id = uuid.uuid4()
@@ -43,9 +49,14 @@ async def add_study(config: StudyConfigRequest, conn: AsyncSession):
 
         for _ in range(MAX_ATTEMPTS):
             try:
-                study_config = StudyConfiguration(study_id=study_id)
+                config_id = uuid.uuid4()
+                study_config = StudyConfiguration(
+                    id=config_id,
+                    study_id=study_id,
+                    study_code=config_id.hex[-TAIL_LEN:],
+                )
                 conn.add(study_config)
-                await conn.flush()  # To get study_config.id
+                await conn.flush()  # Surfaces study code collisions
                 break
             except IntegrityError:
                 await conn.rollback()
@@ -68,14 +79,19 @@ async def add_study(config: StudyConfigRequest, conn: AsyncSession):
             await save_user_survey(survey_id, study_config.id, conn)
 
         await conn.commit()
-        study_code = str(study_config.id)[
-            -TAIL_LEN:
-        ]  # TODO: Change to Study ID and update all calls for a study ID
+        cache_study_config(study_config.study_code, study_config.id, study_id)
+        study_code = study_config.study_code  # TODO: Change to Study ID and update all calls for a study ID
         return study_code
 
     except Exception as e:
         await conn.rollback()
         print("Insertion Error: ", str(e))
+        if study_config is not None:
+            # Remove any documents uploaded before the insert failed
+            try:
+                await get_document_storage().delete(study_config.id)
+            except Exception as cleanup_error:
+                print("Document Cleanup Error: ", str(cleanup_error))
         raise HTTPException(500, detail=str(e))
 
 
@@ -140,20 +156,31 @@ async def save_file_uploads(
 ):
     """Inserts Files into database.
 
-    Saves the filename as well as the raw file bytes as a BYTEA datatype."""
+    Documents are written through the configured storage backend, which either
+    uploads them to R2 under a config-scoped prefix or keeps them as BYTEA.
+    Only filenames, object keys, content hashes and image lists are stored on the row."""
+    storage = get_document_storage()
+    documents = {
+        StudyDocument.CONSENT_FORM: files.consent_form,
+        StudyDocument.STUDY_INSTRUCTIONS: files.study_instructions,
+        StudyDocument.STUDY_DEBRIEF: files.study_debrief,
+    }
+    values = {}
+    for document, upload in documents.items():
+        if upload is None:
+            continue
+        data = await upload.read()
+        values[document.value] = upload.filename
+        values[f"{document.value}_sha256"] = hashlib.sha256(data).hexdigest()
+        values.update(await storage.save(study_id, document, upload.filename, data))
+
     conn.add(
         UploadedFiles(
             study_config_id=study_id,
-            consent_form=files.consent_form.filename,
-            consent_form_bytes=await files.consent_form.read(),
-            study_instructions=files.study_instructions.filename,
-            study_instructions_bytes=await files.study_instructions.read(),
+            uploaded_at=datetime.now(timezone.utc),
             learning_image_list=await extract_from_csv(files.learning_phase_list),
             experiment_image_list=await extract_from_csv(files.experiment_phase_list),
-            study_debrief=files.study_debrief.filename if files.study_debrief else None,
-            study_debrief_bytes=await files.study_debrief.read()
-            if files.study_debrief
-            else None,
+            **values,
         )
     )
 
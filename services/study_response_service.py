@@ -1,27 +1,47 @@
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from uuid import UUID
 from models.study_response_model import StudyResponse
 from schemas.study_results_schema import StudyResponseSchema
+from services.study_summary_service import record_submission
 from fastapi import HTTPException
 
+# Rows per INSERT ... VALUES statement
+# 5 bind parameters per row keeps each batch well under Postgres' 32767 limit
+RESPONSE_BATCH_SIZE = 1000
+
+
+async def insert_study_responses(
+    study_results_id: UUID, responses: list[StudyResponseSchema], conn: AsyncSession
+):
+    '''Inserts a submission's Study Responses as multi-row INSERT ... VALUES batches.
+    Does not commit, so it shares the transaction of the corresponding Study Result.'''
+    # Pending Study Result must reach the database before its responses
+    await conn.flush()
+    rows = [
+        {
+            "id": i + 1,
+            "study_results_id": study_results_id,
+            "image_id": response.image_id,
+            "response_time": response.response_time,
+            "answer": response.answer,
+        }
+        for i, response in enumerate(responses)
+    ]
+    for start in range(0, len(rows), RESPONSE_BATCH_SIZE):
+        await conn.execute(
+            insert(StudyResponse).values(rows[start : start + RESPONSE_BATCH_SIZE])
+        )
 
 
 async def store_study_responses(
     study_results_id: UUID, responses: list[StudyResponseSchema], conn: AsyncSession
 ):
-    '''Iterates through a list of Study Responses to insert into database'''
+    '''Bulk inserts a list of Study Responses and commits them with their Study Result'''
     try:
-        for i, response in enumerate(responses):
-            conn.add(
-                StudyResponse(
-                    id=i + 1,
-                    study_results_id=study_results_id,
-                    image_id=response.image_id,
-                    response_time=response.response_time,
-                    answer=response.answer,
-                )
-            )
+        await insert_study_responses(study_results_id, responses, conn)
+        await record_submission(study_results_id, responses, conn)
         await conn.commit()
         return True
     except IntegrityError:
@@ -5,7 +5,7 @@ from models.study_result_model import StudyResults
 from datetime import datetime
 
 from schemas.study_results_schema import StudyResult
-from services.study_retrieval_service import get_study_id_from_config
+from services.study_retrieval_service import get_study_id_from_config, lookup_study_id
 
 
 async def add_study_result(config_id: UUID, subject_id: UUID, conn: AsyncSession):
@@ -28,6 +28,23 @@ async def add_study_result(config_id: UUID, subject_id: UUID, conn: AsyncSession
         await conn.rollback()
 
 
+async def create_study_result(config_id: UUID, subject_id: UUID, conn: AsyncSession) -> UUID:
+    '''Adds a Study Result to the session without catching errors, for callers that classify them.
+    Raises LookupError for an unknown config.'''
+    study_id = await lookup_study_id(config_id, conn)
+    if study_id is None:
+        raise LookupError(f"Config {config_id} not found")
+    study_result = StudyResults(
+        id=uuid4(),
+        study_id=study_id,
+        config_id=config_id,
+        subject_id=subject_id,
+        submitted=datetime.now(),
+    )
+    conn.add(study_result)
+    return study_result.id
+
+
 async def get_study_results(study_id: UUID, conn: AsyncSession):
     """Retrieves all Study Results for a specific study"""
     stmt = select(StudyResults).where(study_id == study_id)
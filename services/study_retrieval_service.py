@@ -1,21 +1,18 @@
-from io import BytesIO
 import uuid
+from typing import Optional
 
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
 from fastapi import HTTPException
-from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from settings import Settings
-from botocore.client import BaseClient
+from settings import Settings, get_settings
 
 
 from models.study_config_model import StudyConfiguration
 from models.uploaded_files_model import UploadedFiles
 from models.user_survey_config_model import UserSurveyConfig
 from models.enums import ImageListColumn
-from schemas.const import TAIL_LEN
-from schemas.study_config_response_schema import StudyConfigResponse
+from schemas.study_config_response_schema import StudyBootstrapResponse, StudyConfigResponse
 from schemas.study_config_response_schema import (
     FileUploads,
     LearningPhase,
@@ -24,6 +21,42 @@ from schemas.study_config_response_schema import (
     ConclusionPhase,
 )
 from services.r2_service import generate_url_list
+from services.r2_signer import PresignedUrlSigner
+from utils.ttl_cache import TTLCache
+
+settings = get_settings()
+
+# Filenames and image lists only, never the document bytes
+FILE_METADATA_COLUMNS = (
+    UploadedFiles.consent_form,
+    UploadedFiles.study_instructions,
+    UploadedFiles.study_debrief,
+    UploadedFiles.learning_image_list,
+    UploadedFiles.experiment_image_list,
+)
+
+# Study code -> config ID and config ID -> study ID never change once a
+# configuration is committed, so both are cached until the config is deleted.
+# Deletes only clear this worker, other workers expire the entry after the TTL
+study_code_cache = TTLCache(
+    "study_code", settings.study_code_cache_size, settings.study_code_cache_ttl
+)
+config_study_cache = TTLCache(
+    "config_study", settings.study_code_cache_size, settings.study_code_cache_ttl
+)
+
+
+def cache_study_config(study_code: str, config_id: uuid.UUID, study_id: uuid.UUID):
+    """Populates the lookup caches for a newly committed configuration"""
+    study_code_cache.set(study_code, config_id)
+    config_study_cache.set(config_id, study_id)
+
+
+def invalidate_study_config(config_id: uuid.UUID, study_code: str | None = None):
+    """Drops a configuration from the lookup caches"""
+    config_study_cache.invalidate(config_id)
+    if study_code is not None:
+        study_code_cache.invalidate(study_code)
 
 
 async def get_study_id_list(conn: AsyncSession) -> list[uuid.UUID]:
@@ -41,70 +74,33 @@ async def get_study_id_list(conn: AsyncSession) -> list[uuid.UUID]:
 
 
 async def get_study_id(study_code: str, conn: AsyncSession) -> uuid.UUID:
-    """Returns the first matching Study ID from a submitted study code"""
-    try:
-        stmt = select(StudyConfiguration).execution_options(populate_existing=True)
-        result = await conn.execute(stmt)
-        rows = result.scalars().all()
-        for study in rows:
-            if study.id.hex[-TAIL_LEN:] == study_code:
-                return study.id
-    except Exception as e:
-        raise HTTPException(status_code=404, detail=str(e))
-
-
-async def get_file_from_db(
-    study_id: uuid.UUID,
-    filename: str,
-    requested_file: bytes,
-    conn: AsyncSession,
-    media_type: str = "application/pdf",
-) -> StreamingResponse:
-    """
-    Retrieves raw bytes to be served via a streaming repsonse.
+    """Returns the matching Study ID from a submitted study code
 
-    Args:
-        study_id:
-            UUID for the requested study
-        filename:
-            Takes in a string provided by the database model (UploadedFiles.file_name)
-        requested_file:
-            Takes in the file's bytes provided by the database model (UploadedFiles.file_bytes)
-        conn:
-            Asyn Connection to the Database
-        media_type:
-            String value representing mime type. Defaults to "application/pdf"
-
-    Returns:
-        A Streaming Response of bytes that can be served to the frontend as a BLOB.
-
-        The raw file bytes are casted as a Buffered I/O implementation.
-        The media type is dictated by the provided parameter
-        Header consists of: {"Content-Disposition": f'inline; filename="{filename}"'},
+    Served from the study code cache when possible, otherwise resolved
+    with a single probe on the unique study_code index.
 
     Raises:
-        HTTPException: 404 File not Found
+        HTTPException: 404 Study Not Found
     """
+    cached = study_code_cache.get(study_code)
+    if cached is not None:
+        return cached
+
     try:
-        stmt = (
-            select(filename, requested_file)
-            .where(UploadedFiles.study_config_id == study_id)
-            .execution_options(populate_existing=True)
+        stmt = select(StudyConfiguration.id).where(
+            StudyConfiguration.study_code == study_code
         )
         result = await conn.execute(stmt)
-        file = result.first()
-
-        if not file:
-            raise HTTPException(status_code=404, detail="File not found")
-
-        return StreamingResponse(
-            BytesIO(file[1]),
-            media_type=media_type,
-            headers={"Content-Disposition": f'inline; filename="{file[0]}"'},
-        )
+        study_id = result.scalar_one_or_none()
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
+    if study_id is None:
+        raise HTTPException(status_code=404, detail="Study Not Found")
+
+    study_code_cache.set(study_code, study_id)
+    return study_id
+
 
 async def get_image_list(study_id: uuid.UUID, conn: AsyncSession, column: ImageListColumn) -> list[str]:
     image_list_column = getattr(UploadedFiles, column.value)
@@ -154,7 +150,7 @@ async def get_config_file(
             selectinload(StudyConfiguration.wait),
             selectinload(StudyConfiguration.experiment),
             # selectinload(StudyConfiguration.survey),
-            selectinload(StudyConfiguration.files),
+            selectinload(StudyConfiguration.files).load_only(*FILE_METADATA_COLUMNS),
             selectinload(StudyConfiguration.conclusion),
             selectinload(StudyConfiguration.demographics)
         )
@@ -233,10 +229,10 @@ async def get_learning_phase_from_db(
     return study.learning
 
 
-async def get_learning_phase_data(study_id: uuid.UUID, conn: AsyncSession, client: BaseClient, settings: Settings):
+async def get_learning_phase_data(study_id: uuid.UUID, conn: AsyncSession, signer: PresignedUrlSigner, settings: Settings):
     learning = await get_learning_phase_from_db(study_id, conn)
     image_list = await get_image_list(study_id, conn, ImageListColumn.LEARNING)
-    generated_urls = generate_url_list(client, settings.r2_bucket_name, image_list)
+    generated_urls = await generate_url_list(signer, settings.r2_bucket_name, image_list)
     return LearningPhase(
         display_duration=learning.display_duration,
         pause_duration=learning.pause_duration,
@@ -279,10 +275,10 @@ async def get_experiment_phase_from_db(
     return study.experiment
 
 
-async def get_experiment_phase_data(study_id: uuid.UUID, conn: AsyncSession, client: BaseClient, settings: Settings):
+async def get_experiment_phase_data(study_id: uuid.UUID, conn: AsyncSession, signer: PresignedUrlSigner, settings: Settings):
     experiment = await get_experiment_phase_from_db(study_id, conn)
     image_list = await get_image_list(study_id, conn, ImageListColumn.EXPERIMENT)
-    generated_urls = generate_url_list(client, settings.r2_bucket_name, image_list)
+    generated_urls = await generate_url_list(signer, settings.r2_bucket_name, image_list)
     return ExperimentPhase(
         display_duration=experiment.display_duration,
         pause_duration=experiment.pause_duration,
@@ -292,15 +288,117 @@ async def get_experiment_phase_data(study_id: uuid.UUID, conn: AsyncSession, cli
         images=generated_urls
     )
 
+async def lookup_study_id(config_id: uuid.UUID, conn: AsyncSession) -> Optional[uuid.UUID]:
+    """Cached config ID -> study ID lookup, database errors are left to the caller"""
+    cached = config_study_cache.get(config_id)
+    if cached is not None:
+        return cached
+
+    stmt = select(StudyConfiguration.study_id).where(StudyConfiguration.id == config_id)
+    study_id = (await conn.execute(stmt)).scalars().one_or_none()
+    if study_id is not None:
+        config_study_cache.set(config_id, study_id)
+    return study_id
+
+
 async def get_study_id_from_config(config_id:uuid.UUID, conn:AsyncSession) -> uuid.UUID:
     try:
-        stmt=select(StudyConfiguration.study_id).where(StudyConfiguration.id==config_id)
-        results = await conn.execute(stmt)
-        study_id = results.scalars().one_or_none()
+        study_id = await lookup_study_id(config_id, conn)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
     if study_id is None:
-        raise HTTPException(status_code=404, deail="ID Not Found")
+        raise HTTPException(status_code=404, detail="ID Not Found")
     
-    return study_id
\ No newline at end of file
+    return study_id
+
+
+async def get_study_bootstrap(
+    study_code: str, conn: AsyncSession, signer: PresignedUrlSigner, settings: Settings
+) -> StudyBootstrapResponse:
+    """
+    Returns everything a participant needs to run a study in one round trip
+
+    Resolves the study code and loads every phase plus the image lists in a
+    single joined query, skipping the file bytes. Presigned URLs for both
+    image lists are generated in one batch.
+
+    Args:
+        study_code:
+            Code submitted by the participant
+        conn:
+            Async connection to database
+        signer:
+            Presigned URL signer used for the image URLs
+        settings:
+            Application settings, provides the bucket name
+
+    Returns:
+        An instance of StudyBootstrapResponse serialized as a JSON response.
+
+    Raises:
+        HTTPException: 404: Study not found
+        HTTPException: 500: Missing file upload data
+        HTTPException: 500: Missing phase configuration
+    """
+    stmt = (
+        select(StudyConfiguration)
+        .options(
+            joinedload(StudyConfiguration.learning),
+            joinedload(StudyConfiguration.wait),
+            joinedload(StudyConfiguration.experiment),
+            joinedload(StudyConfiguration.conclusion),
+            joinedload(StudyConfiguration.demographics),
+            joinedload(StudyConfiguration.files).load_only(*FILE_METADATA_COLUMNS),
+        )
+        .where(StudyConfiguration.study_code == study_code)
+    )
+    result = await conn.execute(stmt)
+    study = result.unique().scalar_one_or_none()
+
+    if not study:
+        raise HTTPException(status_code=404, detail="Study not found")
+    if not study.files:
+        raise HTTPException(status_code=500, detail="Missing file upload data.")
+    if not study.learning or not study.wait or not study.experiment or not study.conclusion:
+        raise HTTPException(status_code=500, detail="Missing phase configuration.")
+
+    cache_study_config(study.study_code, study.id, study.study_id)
+
+    learning_images = study.files.learning_image_list
+    experiment_images = study.files.experiment_image_list
+    generated_urls = await generate_url_list(
+        signer, settings.r2_bucket_name, learning_images + experiment_images
+    )
+
+    return StudyBootstrapResponse(
+        config_id=study.id,
+        study_id=study.study_id,
+        survey_id=study.demographics.id if study.demographics else None,
+        files=FileUploads(
+            consent_form=study.files.consent_form,
+            study_instruction=study.files.study_instructions,
+            study_debrief=study.files.study_debrief,
+        ),
+        learning=LearningPhase(
+            display_duration=study.learning.display_duration,
+            pause_duration=study.learning.pause_duration,
+            display_method=study.learning.display_method,
+            image_ids=learning_images,
+            images=generated_urls[: len(learning_images)],
+        ),
+        wait=WaitPhase(
+            display_duration=study.wait.display_duration,
+        ),
+        experiment=ExperimentPhase(
+            display_duration=study.experiment.display_duration,
+            pause_duration=study.experiment.pause_duration,
+            display_method=study.experiment.display_method,
+            response_method=study.experiment.response_method,
+            image_ids=experiment_images,
+            images=generated_urls[len(learning_images):],
+        ),
+        conclusion=ConclusionPhase(
+            has_survey=study.conclusion.has_survey
+        ),
+    )
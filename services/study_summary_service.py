@@ -0,0 +1,265 @@
+from collections import Counter
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import String, case, cast, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.study_config_model import StudyConfiguration
+from models.study_model import Study
+from models.study_response_model import StudyResponse
+from models.study_result_model import StudyResults
+from models.study_summary_model import StudyAnswerCount, StudySummaryStats
+from models.uploaded_files_model import UploadedFiles
+from schemas.researcher_dashboard_schema import (
+    StudyListItem,
+    StudyListResponse,
+    StudySummary,
+)
+from schemas.study_results_schema import StudyResponseSchema
+from settings import get_settings
+
+settings = get_settings()
+
+
+def _expected_items(config_id):
+    return (
+        select(func.cardinality(UploadedFiles.experiment_image_list))
+        .where(UploadedFiles.study_config_id == config_id)
+        .scalar_subquery()
+    )
+
+
+def _shard(subject_id):
+    """Summary shard of a submission, spreads one configuration's writes over several rows"""
+    return func.abs(
+        func.mod(func.hashtext(cast(subject_id, String)), settings.study_summary_shards)
+    )
+
+
+async def _add_answer_counts(config_id: UUID, shard: int, histogram: Counter, conn: AsyncSession):
+    if not histogram:
+        return
+    stmt = insert(StudyAnswerCount).values(
+        [
+            {"config_id": config_id, "shard": shard, "answer": answer, "count": count}
+            for answer, count in histogram.items()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StudyAnswerCount.config_id, StudyAnswerCount.shard, StudyAnswerCount.answer],
+        set_={"count": StudyAnswerCount.count + stmt.excluded.count},
+    )
+    await conn.execute(stmt)
+
+
+async def _add_to_summary(
+    source, conn: AsyncSession, last_submission_at: str = "greatest"
+) -> tuple[UUID, int]:
+    """Adds one row of deltas to its summary shard, creating the shard on first use
+
+    `source` selects config_id, shard, study_id, total, complete, response count,
+    response time sum and last submission time, in that order.
+    """
+    stmt = insert(StudySummaryStats).from_select(
+        [
+            StudySummaryStats.config_id,
+            StudySummaryStats.shard,
+            StudySummaryStats.study_id,
+            StudySummaryStats.total_submissions,
+            StudySummaryStats.complete_submissions,
+            StudySummaryStats.response_count,
+            StudySummaryStats.response_time_sum,
+            StudySummaryStats.last_submission_at,
+        ],
+        source,
+    )
+    if last_submission_at == "greatest":
+        last = func.greatest(StudySummaryStats.last_submission_at, stmt.excluded.last_submission_at)
+    else:
+        last = stmt.excluded.last_submission_at
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StudySummaryStats.config_id, StudySummaryStats.shard],
+        set_={
+            "total_submissions": StudySummaryStats.total_submissions
+            + stmt.excluded.total_submissions,
+            "complete_submissions": StudySummaryStats.complete_submissions
+            + stmt.excluded.complete_submissions,
+            "response_count": StudySummaryStats.response_count + stmt.excluded.response_count,
+            "response_time_sum": StudySummaryStats.response_time_sum
+            + stmt.excluded.response_time_sum,
+            "last_submission_at": last,
+        },
+    ).returning(StudySummaryStats.config_id, StudySummaryStats.shard)
+    res = await conn.execute(stmt)
+    return tuple(res.one())
+
+
+async def record_submission(
+    study_results_id: UUID, responses: list[StudyResponseSchema], conn: AsyncSession
+):
+    '''Folds a submission into its configuration's summary.
+    Does not commit, so the totals move in the same transaction as the responses.
+    Only the submission's shard is locked until the transaction commits.'''
+    count = len(responses)
+    complete = case(
+        (literal(count) >= func.coalesce(_expected_items(StudyResults.config_id), 0), 1),
+        else_=0,
+    )
+    source = select(
+        StudyResults.config_id,
+        _shard(StudyResults.subject_id),
+        StudyResults.study_id,
+        literal(1),
+        complete,
+        literal(count),
+        literal(sum(response.response_time for response in responses)),
+        StudyResults.submitted,
+    ).where(StudyResults.id == study_results_id)
+    config_id, shard = await _add_to_summary(source, conn)
+
+    await _add_answer_counts(
+        config_id, shard, Counter(response.answer for response in responses), conn
+    )
+
+
+async def retract_submission(study_results_id: UUID, conn: AsyncSession):
+    '''Removes a submission from its configuration's summary before it is deleted.
+    Does not commit, so it must run in the deleting transaction.
+    Subtracts through the same upsert as recording, so totals stay right
+    even if the submission was recorded under a different shard count.'''
+    res = await conn.execute(
+        select(StudyResults.config_id).where(StudyResults.id == study_results_id)
+    )
+    config_id = res.scalar_one_or_none()
+    if config_id is None:
+        return
+
+    res = await conn.execute(
+        select(StudyResponse.answer, func.count(), func.sum(StudyResponse.response_time))
+        .where(StudyResponse.study_results_id == study_results_id)
+        .group_by(StudyResponse.answer)
+    )
+    histogram = Counter()
+    time_sum = 0.0
+    for answer, count, answer_time_sum in res:
+        histogram[answer] = count
+        time_sum += answer_time_sum or 0.0
+    count = sum(histogram.values())
+
+    complete = case(
+        (literal(count) >= func.coalesce(_expected_items(config_id), 0), 1),
+        else_=0,
+    )
+    last_submission = (
+        select(func.max(StudyResults.submitted))
+        .where(StudyResults.config_id == config_id, StudyResults.id != study_results_id)
+        .scalar_subquery()
+    )
+    source = select(
+        StudyResults.config_id,
+        _shard(StudyResults.subject_id),
+        StudyResults.study_id,
+        literal(-1),
+        -complete,
+        literal(-count),
+        literal(-time_sum),
+        last_submission,
+    ).where(StudyResults.id == study_results_id)
+    config_id, shard = await _add_to_summary(source, conn, last_submission_at="replace")
+
+    await _add_answer_counts(config_id, shard, Counter({a: -c for a, c in histogram.items()}), conn)
+
+
+async def get_study_list(researcher_id: UUID, conn: AsyncSession) -> StudyListResponse:
+    """Lists the researcher's configurations with their running totals"""
+    totals = (
+        select(
+            StudySummaryStats.config_id,
+            func.sum(StudySummaryStats.total_submissions).label("total_submissions"),
+            func.max(StudySummaryStats.last_submission_at).label("last_submission_at"),
+        )
+        .group_by(StudySummaryStats.config_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            StudyConfiguration.study_id,
+            StudyConfiguration.id,
+            func.coalesce(totals.c.total_submissions, 0),
+            func.coalesce(func.cardinality(UploadedFiles.experiment_image_list), 0),
+            totals.c.last_submission_at,
+        )
+        .join(Study, Study.id == StudyConfiguration.study_id)
+        .outerjoin(UploadedFiles, UploadedFiles.study_config_id == StudyConfiguration.id)
+        .outerjoin(totals, totals.c.config_id == StudyConfiguration.id)
+        .where(Study.researcher == researcher_id)
+    )
+    res = await conn.execute(stmt)
+    return StudyListResponse(
+        items=[
+            StudyListItem(
+                id=study_id,
+                configuration_id=config_id,
+                total_submissions=total,
+                expected_items=expected,
+                last_submission_at=last_submission_at,
+            )
+            for study_id, config_id, total, expected, last_submission_at in res
+        ]
+    )
+
+
+async def get_study_summary(
+    study_id: UUID, researcher_id: UUID, conn: AsyncSession
+) -> StudySummary:
+    """Summarises a study from its maintained totals, never from raw responses
+
+    Raises:
+        HTTPException: 404 Study Not Found
+    """
+    stmt = (
+        select(
+            func.coalesce(func.sum(StudySummaryStats.total_submissions), 0),
+            func.coalesce(func.sum(StudySummaryStats.complete_submissions), 0),
+            func.coalesce(func.sum(StudySummaryStats.response_count), 0),
+            func.coalesce(func.sum(StudySummaryStats.response_time_sum), 0.0),
+            func.coalesce(func.max(func.cardinality(UploadedFiles.experiment_image_list)), 0),
+        )
+        .select_from(StudyConfiguration)
+        .join(Study, Study.id == StudyConfiguration.study_id)
+        .outerjoin(UploadedFiles, UploadedFiles.study_config_id == StudyConfiguration.id)
+        .outerjoin(StudySummaryStats, StudySummaryStats.config_id == StudyConfiguration.id)
+        .where(Study.id == study_id, Study.researcher == researcher_id)
+        .group_by(Study.id)
+    )
+    res = await conn.execute(stmt)
+    row = res.first()
+    if row is None:
+        raise HTTPException(404, detail="Study Not Found")
+    total, complete, response_count, response_time_sum, expected = row
+
+    stmt = (
+        select(StudyAnswerCount.answer, func.sum(StudyAnswerCount.count))
+        .join(
+            StudySummaryStats,
+            (StudySummaryStats.config_id == StudyAnswerCount.config_id)
+            & (StudySummaryStats.shard == StudyAnswerCount.shard),
+        )
+        .where(StudySummaryStats.study_id == study_id)
+        .group_by(StudyAnswerCount.answer)
+        .having(func.sum(StudyAnswerCount.count) > 0)
+    )
+    res = await conn.execute(stmt)
+    histogram = {answer: int(count) for answer, count in res}
+
+    return StudySummary(
+        study_id=study_id,
+        total_submissions=total,
+        expected_items=expected,
+        complete_submissions=complete,
+        completion_rate=complete / total if total else 0.0,
+        avg_response_time_ms=response_time_sum / response_count if response_count else None,
+        answer_histogram=histogram,
+    )
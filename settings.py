@@ -1,5 +1,6 @@
 from functools import lru_cache
 from typing import Optional
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,6 +13,34 @@ class Settings(BaseSettings):
     # CONNECTION STRINGS
     connection_string: str
     model_string: str
+    #DATABASE POOL
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    # Seconds to wait for a pooled connection before failing the request
+    db_pool_timeout: float = 30
+    # Connections older than this many seconds are replaced, -1 never recycles
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # Prepared statements cached per connection by asyncpg and SQLAlchemy, 0 disables the caches
+    db_statement_cache_size: int = 100
+    # Set when connecting through PgBouncer in transaction mode
+    db_pooler_mode: bool = False
+    # Local connections kept in pooler mode, 0 opens one per checkout (NullPool)
+    db_pooler_pool_size: int = 0
+    db_jit: bool = False
+    db_application_name: str = "backend"
+    # Logs every statement, prefer db_echo_sample_rate under load
+    db_echo: bool = False
+    # Fraction of statements printed, 0 disables sampling
+    db_echo_sample_rate: float = 0.0
+    #READ REPLICA
+    # Read-only participant and dashboard queries use this DSN when set
+    read_replica_connection_string: Optional[str] = None
+    # Seconds reads stay on the primary after the replica could not be reached
+    read_replica_retry_interval: float = 30
+    # Seconds a researcher reads from the primary after a write, should exceed replica lag
+    read_your_writes_window: float = 10
+    read_your_writes_cache_size: int = 10000
     # R2
     r2_account_id: Optional[str] = None
     r2_bucket_name: Optional[str] = None
@@ -21,12 +50,67 @@ class Settings(BaseSettings):
     #READ-WRITE
     r2_rw_access_key_id: Optional[str] = None
     r2_rw_secret_access_key: Optional[str] = None
+    # HTTP connections per client, also the size of its worker thread pool
+    r2_max_pool_connections: int = 32
+    r2_connect_timeout: float = 5
+    r2_read_timeout: float = 60
+    r2_max_attempts: int = 3
+    # Concurrent uploads when ingesting a ZIP of images
+    zip_upload_workers: int = 8
+    # Concurrent delete/abort batches in bucket maintenance jobs
+    r2_job_parallelism: int = 8
+    # "direct" creates multipart uploads at their final key when it is free, "deferred" always stages them and copies in the background
+    mpu_finalize_mode: str = "direct"
+    mpu_copy_batch_size: int = 16
+    mpu_copy_poll_interval: float = 1.0
+    mpu_copy_max_attempts: int = 5
+    # Concurrent HEAD requests when verifying an archive manifest
+    archive_verify_concurrency: int = 32
+    # Trust inventory rows that already match an archive item instead of re-heading it
+    archive_verify_from_inventory: bool = True
+    # Seconds between object inventory reconciliations against the bucket, 0 disables
+    inventory_reconcile_interval: int = 3600
+    #DOCUMENTS
+    # "r2" stores consent/instructions/debrief PDFs in the bucket, "database" keeps BYTEA
+    document_storage: str = "r2"
+    document_prefix: str = "documents"
+    # "stream" proxies the object in chunks, "redirect" sends a presigned URL
+    document_delivery: str = "stream"
+    document_chunk_size: int = 64 * 1024
+    document_cache_control: str = "public, max-age=3600"
     #AUTH
     auth:Optional[str] = None
+    # Authenticated users cached per token, bounds how long another worker may serve a stale role
+    auth_user_cache_size: int = 10000
+    auth_user_cache_ttl: float = 30
+    # Threads hashing and verifying passwords, each Argon2 hash holds one for ~64 MiB and a few hundred ms
+    password_hash_workers: int = 2
     dev_email:Optional[str] = None
     dev_password:Optional[str] = None
     #CORS
     cors_origin: Optional[str] = None
+    #CACHING
+    study_code_cache_size: int = 4096
+    # Deletes only clear the local worker, bounds how long other workers resolve a deleted config's code
+    study_code_cache_ttl: int = 60
+    presign_cache_size: int = 50000
+    # Fraction of a presigned URL's lifetime after which it is re-signed, below 1 so cached URLs never outlive it
+    presign_rotate_fraction: float = Field(0.5, gt=0, lt=1)
+    #RESULTS INGESTION
+    # "sync" writes submissions in the request, "spool" acknowledges once they are in the local spool
+    results_ingestion_mode: str = "sync"
+    results_spool_path: str = "results_spool.sqlite3"
+    results_spool_batch_size: int = 100
+    results_spool_poll_interval: float = 0.5
+    # Drain attempts before a submission is left in the spool for manual attention
+    results_spool_max_attempts: int = 5
+    # Longest wait between drain retries while Postgres is unreachable, outages do not use up attempts
+    results_spool_max_backoff: float = 30
+    # Rows each configuration's summary is split over, concurrent submissions lock one shard each
+    study_summary_shards: int = Field(16, ge=1, le=1024)
+    #EXPORTS
+    # Rows fetched per round trip from the server-side cursor
+    export_yield_per: int = 2000
 
     # Load ENV File
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
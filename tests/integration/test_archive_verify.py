@@ -0,0 +1,87 @@
+import base64
+import hashlib
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from schemas.r2_schemas import ManifestItem
+from services.r2_client import AsyncR2Client
+from services.r2_service import _verified_sha256, verify_manifest_items
+
+LATENCY = 0.02
+OWNER = "0b6f6c2e-4d1f-4a53-9d7b-3c1e2f9a8b70"
+
+
+class HeadBucket:
+    """In-process S3 stand-in answering HEAD requests with a fixed latency"""
+
+    def __init__(self, count, wrong_size=None):
+        self.sizes = {f"staging/u/1/s/files/{i:04d}.jpg": 100 + i for i in range(count)}
+        if wrong_size:
+            self.sizes[wrong_size] += 1
+        self.heads = 0
+        self.lock = threading.Lock()
+
+    def head_object(self, Bucket, Key, ChecksumMode=None):
+        time.sleep(LATENCY)
+        with self.lock:
+            self.heads += 1
+        return {"ContentLength": self.sizes[Key], "Metadata": {"owner": OWNER}}
+
+
+def _items(count):
+    return [
+        ManifestItem(key=f"staging/u/1/s/files/{i:04d}.jpg", size=100 + i)
+        for i in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_verification_latency_is_bounded_by_concurrency():
+    bucket = HeadBucket(400)
+    start = time.perf_counter()
+    result = await verify_manifest_items(
+        AsyncR2Client(bucket, max_workers=32), "test", _items(400), OWNER, concurrency=32
+    )
+    elapsed = time.perf_counter() - start
+
+    assert result == {"trusted": 0, "headed": 400}
+    assert bucket.heads == 400
+    # 400 serial HEADs would take 8 s
+    assert elapsed < 400 * LATENCY / 8
+    print(f"verified 400 items in {elapsed * 1e3:.0f} ms")
+
+
+@pytest.mark.asyncio
+async def test_first_mismatch_cancels_remaining_heads():
+    bucket = HeadBucket(400, wrong_size="staging/u/1/s/files/0003.jpg")
+    with pytest.raises(HTTPException) as e:
+        await verify_manifest_items(
+            AsyncR2Client(bucket, max_workers=4), "test", _items(400), OWNER, concurrency=4
+        )
+    assert e.value.status_code == 409
+    assert "0003.jpg" in e.value.detail
+    assert bucket.heads < 50
+
+    with pytest.raises(HTTPException) as e:
+        await verify_manifest_items(
+            AsyncR2Client(HeadBucket(10), max_workers=4), "test", _items(10), "someone-else"
+        )
+    assert e.value.status_code == 403
+
+
+def test_only_checked_hashes_are_recorded():
+    digest = hashlib.sha256(b"image").digest()
+    item = ManifestItem(key="a.jpg", size=5, sha256=digest.hex())
+
+    # Without a stored checksum the declared hash is not trusted later
+    assert _verified_sha256(item, {"ContentLength": 5}) is None
+    # Multipart composite checksums cover the parts, not the object
+    assert _verified_sha256(item, {"ChecksumSHA256": base64.b64encode(digest).decode() + "-3"}) is None
+    assert _verified_sha256(item, {"ChecksumSHA256": base64.b64encode(digest).decode()}) == digest.hex()
+
+    with pytest.raises(HTTPException) as e:
+        _verified_sha256(item, {"ChecksumSHA256": base64.b64encode(b"x" * 32).decode()})
+    assert e.value.status_code == 409
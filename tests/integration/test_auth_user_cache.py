@@ -0,0 +1,127 @@
+import uuid
+
+import pytest
+from fastapi_users import exceptions
+
+from auth.authentication_backend import (
+    CachedJWTStrategy,
+    invalidate_cached_user,
+    user_cache,
+)
+from auth.user_manager import UserManager
+from models import all_models
+from models.enums import UserRole
+from models.user_model import User
+
+
+class CountingUserManager:
+    """Stands in for UserManager, counting the user rows it loads"""
+
+    def __init__(self, *users):
+        self.users = {user.id: user for user in users}
+        self.loads = 0
+
+    def parse_id(self, value):
+        try:
+            return uuid.UUID(value)
+        except ValueError as e:
+            raise exceptions.InvalidID() from e
+
+    async def get(self, user_id):
+        self.loads += 1
+        if user_id not in self.users:
+            raise exceptions.UserNotExists()
+        return self.users[user_id]
+
+
+class CountingUserDatabase:
+    """Stands in for SQLAlchemyUserDatabase under a real UserManager"""
+
+    def __init__(self, *users):
+        self.users = {user.id: user for user in users}
+        self.loads = 0
+
+    async def get(self, user_id):
+        self.loads += 1
+        return self.users.get(user_id)
+
+    async def update(self, user, update_dict):
+        for key, value in update_dict.items():
+            setattr(user, key, value)
+        return user
+
+
+def _user(roles):
+    return User(
+        id=uuid.uuid4(),
+        email=f"{uuid.uuid4().hex}@example.com",
+        hashed_password="unused",
+        is_active=True,
+        is_superuser=False,
+        is_verified=True,
+        role=roles,
+    )
+
+
+@pytest.mark.asyncio
+async def test_polling_resolves_users_without_loading_rows():
+    user_cache.clear()
+    strategy = CachedJWTStrategy(secret="test-secret", lifetime_seconds=3600)
+    researcher = _user([UserRole.RESEARCHER])
+    manager = CountingUserManager(researcher)
+    token = await strategy.write_token(researcher)
+
+    users = [await strategy.read_token(token, manager) for _ in range(50)]
+    assert manager.loads == 1
+    assert all(user.id == researcher.id for user in users)
+    # Every request gets its own copy
+    users[1].role.append(UserRole.ADMIN)
+    assert (await strategy.read_token(token, manager)).role == [UserRole.RESEARCHER]
+
+    # A role change is seen on the next request
+    researcher.role = [UserRole.STAFF, UserRole.RESEARCHER]
+    invalidate_cached_user(researcher.id)
+    assert (await strategy.read_token(token, manager)).role == researcher.role
+    assert manager.loads == 2
+
+
+@pytest.mark.asyncio
+async def test_invalid_tokens_are_never_cached():
+    user_cache.clear()
+    strategy = CachedJWTStrategy(secret="test-secret", lifetime_seconds=3600)
+    other = CachedJWTStrategy(secret="other-secret", lifetime_seconds=3600)
+    user = _user([UserRole.RESEARCHER])
+    manager = CountingUserManager()
+
+    assert await strategy.read_token(None, manager) is None
+    assert await strategy.read_token(await other.write_token(user), manager) is None
+    assert manager.loads == 0
+    # Deleted users are looked up again rather than cached
+    token = await strategy.write_token(user)
+    assert await strategy.read_token(token, manager) is None
+    assert await strategy.read_token(token, manager) is None
+    assert manager.loads == 2
+
+
+@pytest.mark.asyncio
+async def test_promotion_and_demotion_reload_the_user():
+    user_cache.clear()
+    strategy = CachedJWTStrategy(secret="test-secret", lifetime_seconds=3600)
+    researcher = _user([UserRole.RESEARCHER])
+    user_db = CountingUserDatabase(researcher)
+    manager = UserManager(user_db)
+    token = await strategy.write_token(researcher)
+
+    await strategy.read_token(token, manager)
+    await strategy.read_token(token, manager)
+    assert user_db.loads == 1
+
+    await manager.promote_to_admin(researcher)
+    promoted = await strategy.read_token(token, manager)
+    assert user_db.loads == 2
+    assert UserRole.ADMIN in promoted.role
+
+    await manager.demote_user(researcher)
+    demoted = await strategy.read_token(token, manager)
+    assert user_db.loads == 3
+    assert demoted.role == [UserRole.RESEARCHER]
@@ -0,0 +1,68 @@
+import io
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+
+from models.enums import ExportFormat
+from services.results_export_service import stream_columnar, stream_csv
+
+ExportRow = namedtuple(
+    "ExportRow",
+    "id study_id config_id subject_id submitted image_id answer response_time age sex race",
+)
+
+
+async def _partitions(subjects=1000, responses=50, size=2000):
+    study_id, config_id = uuid.uuid4(), uuid.uuid4()
+    start = datetime(2025, 1, 1)
+    rows = []
+    for n in range(subjects):
+        result_id, subject_id = uuid.uuid4(), uuid.uuid4()
+        demographics = (20 + n % 40, "F", "Asian") if n % 3 else (None, None, None)
+        for i in range(responses):
+            rows.append(ExportRow(
+                result_id, study_id, config_id, subject_id, start + timedelta(minutes=n),
+                f"CFD-WM-{i:04d}-N.jpg", i % 2, 400.0 + n % 97, *demographics,
+            ))
+            if len(rows) == size:
+                yield rows
+                rows = []
+    if rows:
+        yield rows
+
+
+async def _collect(chunks):
+    parts = [chunk async for chunk in chunks]
+    return parts[0][:0].join(parts)
+
+
+@pytest.mark.asyncio
+async def test_columnar_exports_round_trip_typed():
+    csv_bytes = (await _collect(stream_csv(_partitions()))).encode()
+    parquet_bytes = await _collect(stream_columnar(_partitions(), ExportFormat.PARQUET))
+    arrow_bytes = await _collect(stream_columnar(_partitions(), ExportFormat.ARROW))
+
+    start = time.perf_counter()
+    table = pq.read_table(io.BytesIO(parquet_bytes))
+    parquet_read = time.perf_counter() - start
+    assert table.num_rows == 50000
+    assert pa.types.is_dictionary(table.schema.field("image_id").type)
+    assert pa.types.is_dictionary(table.schema.field("subject_id").type)
+    assert table.schema.field("submitted").type == pa.timestamp("us")
+    assert table.column("age").null_count > 0
+
+    arrow_table = pa.ipc.open_stream(arrow_bytes).read_all()
+    assert arrow_table.num_rows == 50000
+    assert arrow_table.column("response_time").type == pa.float64()
+
+    assert len(parquet_bytes) * 5 <= len(csv_bytes)
+    print(
+        f"csv {len(csv_bytes) / 1e6:.2f} MB, parquet {len(parquet_bytes) / 1e6:.2f} MB, "
+        f"arrow {len(arrow_bytes) / 1e6:.2f} MB, parquet read {parquet_read * 1e3:.2f} ms"
+    )
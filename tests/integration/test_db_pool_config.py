@@ -0,0 +1,65 @@
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool, QueuePool
+
+from db.client import engine_options, pool_report
+from settings import get_settings
+
+
+def test_pool_settings_reach_the_engine():
+    settings = get_settings().model_copy(
+        update={
+            "db_pool_size": 7,
+            "db_max_overflow": 3,
+            "db_pool_timeout": 2.5,
+            "db_pool_recycle": 600,
+            "db_statement_cache_size": 0,
+            "db_application_name": "backend-test",
+        }
+    )
+    options = engine_options(settings)
+    assert options["echo"] is False
+    assert options["connect_args"] == {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "server_settings": {"application_name": "backend-test", "jit": "off"},
+    }
+
+    # Engines do not connect until first use
+    engine = create_async_engine(settings.connection_string, **options)
+    report = pool_report(engine)
+    assert report["pool_size"] == 7
+    assert report["max_overflow"] == 3
+    assert report["pool_timeout"] == 2.5
+    assert report["pool_recycle"] == 600
+    assert "p@" not in report["url"]
+
+
+def test_driver_options_only_for_asyncpg():
+    settings = get_settings().model_copy(
+        update={"connection_string": "sqlite+aiosqlite:///:memory:"}
+    )
+    assert "connect_args" not in engine_options(settings)
+
+
+def test_pooler_mode_disables_prepared_statement_reuse():
+    settings = get_settings().model_copy(update={"db_pooler_mode": True})
+    options = engine_options(settings)
+    connect_args = options["connect_args"]
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    names = {connect_args["prepared_statement_name_func"]() for _ in range(100)}
+    assert len(names) == 100
+    # PgBouncer only forwards the startup parameters it knows
+    assert set(connect_args["server_settings"]) == {"application_name"}
+
+    engine = create_async_engine(settings.connection_string, **options)
+    assert isinstance(engine.pool, NullPool)
+    assert pool_report(engine)["pool"] == "NullPool"
+    assert not engine.pool._pre_ping
+
+    small = settings.model_copy(update={"db_pooler_pool_size": 2})
+    engine = create_async_engine(small.connection_string, **engine_options(small))
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == 2
+    assert engine.pool._max_overflow == 0
+    assert engine.pool._pre_ping == small.db_pool_pre_ping
@@ -0,0 +1,32 @@
+import uuid
+from urllib.parse import unquote
+
+import pytest
+
+from models.enums import StudyDocument
+from services.document_storage import R2DocumentStorage
+from services.r2_client import AsyncR2Client
+
+
+class MetadataBucket:
+    """In-process S3 stand-in that rejects metadata S3 could not send"""
+
+    def __init__(self):
+        self.metadata = {}
+
+    def put_object(self, Bucket, Key, Body, ContentType, Metadata):
+        for value in Metadata.values():
+            value.encode("ascii")
+        self.metadata[Key] = Metadata
+
+
+@pytest.mark.asyncio
+async def test_non_ascii_filenames_are_saved():
+    bucket = MetadataBucket()
+    storage = R2DocumentStorage(AsyncR2Client(bucket, max_workers=1), "test")
+    filename = "Einverständniserklärung – 研究.pdf"
+
+    columns = await storage.save(uuid.uuid4(), StudyDocument.CONSENT_FORM, filename, b"%PDF")
+
+    [key] = columns.values()
+    assert unquote(bucket.metadata[key]["filename"]) == filename
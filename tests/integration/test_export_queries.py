@@ -0,0 +1,148 @@
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import all_models
+from models.study_config_model import StudyConfiguration
+from models.study_model import Study
+from models.study_response_model import StudyResponse
+from models.study_result_model import StudyResults
+from models.user_model import User
+from services.results_export_service import export_rows_stmt, stream_csv, stream_export_rows
+from settings import get_settings
+
+RESPONSES_PER_SUBJECT = 10
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = create_async_engine(get_settings().connection_string)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session(engine):
+    AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with AsyncSessionLocal() as session:
+        yield session
+        # Seeded subjects are never committed
+        await session.rollback()
+
+
+async def _seed_subjects(session, researcher_id, count):
+    study_id, config_id = (await session.execute(
+        select(Study.id, StudyConfiguration.id)
+        .join(StudyConfiguration)
+        .where(Study.researcher == researcher_id)
+        .limit(1)
+    )).one()
+    results = [
+        {
+            "id": uuid.uuid4(),
+            "study_id": study_id,
+            "config_id": config_id,
+            "subject_id": uuid.uuid4(),
+            "submitted": datetime.now(),
+        }
+        for _ in range(count)
+    ]
+    for start in range(0, count, 1000):
+        await session.execute(insert(StudyResults).values(results[start : start + 1000]))
+    responses = [
+        {
+            "id": i + 1,
+            "study_results_id": result["id"],
+            "image_id": f"CFD-WM-{i:04d}-N.jpg",
+            "answer": i % 2,
+            "response_time": 0.5,
+        }
+        for result in results
+        for i in range(RESPONSES_PER_SUBJECT)
+    ]
+    for start in range(0, len(responses), 1000):
+        await session.execute(insert(StudyResponse).values(responses[start : start + 1000]))
+
+
+async def _exported_rows(researcher_id, session) -> int:
+    rows = stream_export_rows(export_rows_stmt(researcher_id), session_factory=lambda: session)
+    return sum([len(partition) async for partition in rows])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("count", [10, 1000, 10000])
+async def test_export_all_query_count_is_flat(engine, session, count):
+    researcher_id = (await session.execute(
+        select(User.id).where(User.email == get_settings().dev_email)
+    )).scalar_one()
+    baseline = await _exported_rows(researcher_id, session)
+    await _seed_subjects(session, researcher_id, count)
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        start = time.perf_counter()
+        exported = await _exported_rows(researcher_id, session)
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    assert exported == baseline + count * RESPONSES_PER_SUBJECT
+    assert len(statements) == 1
+    print(f"{count} subjects: {len(statements)} queries, {elapsed * 1e3:.2f} ms")
+
+
+@pytest.mark.asyncio
+async def test_streamed_csv_export_time_to_first_byte(session):
+    researcher_id = (await session.execute(
+        select(User.id).where(User.email == get_settings().dev_email)
+    )).scalar_one()
+    await _seed_subjects(session, researcher_id, 10000)
+
+    yield_per = 1000
+    # Reuses the seeded transaction instead of opening a new session
+    rows = stream_export_rows(
+        export_rows_stmt(researcher_id), session_factory=lambda: session, yield_per=yield_per
+    )
+
+    # Peak memory of the same export fetched in one go, the bound for streaming
+    tracemalloc.start()
+    materialized = (await session.execute(export_rows_stmt(researcher_id))).all()
+    _, materialized_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del materialized
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    chunks = stream_csv(rows)
+    header = await anext(chunks)
+    first = await anext(chunks)
+    ttfb = time.perf_counter() - start
+    total_rows = first.count("\n")
+    async for chunk in chunks:
+        assert chunk.count("\n") <= yield_per
+        total_rows += chunk.count("\n")
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert header.startswith("Study ID")
+    assert total_rows >= 10000 * RESPONSES_PER_SUBJECT
+    # Only one partition of rows and one CSV chunk are held at a time
+    assert peak < materialized_peak / 5
+    print(
+        f"{total_rows} rows: first byte {ttfb * 1e3:.2f} ms, "
+        f"total {elapsed * 1e3:.2f} ms, peak {peak / 1e6:.1f} MB "
+        f"(materialized {materialized_peak / 1e6:.1f} MB)"
+    )
@@ -4,9 +4,9 @@ import pytest
 import json
 
 import pytest_asyncio
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.orm import selectinload
-from db.client import get_db_session
+from db.client import engine, get_db_session
 from models.study_config_model import StudyConfiguration
 from models.study_model import Study
 from models.study_result_model import StudyResults
@@ -16,7 +16,7 @@ sys.path.append("./")
 from main import app as fastapi_app
 from httpx import ASGITransport, AsyncClient
 from schemas.study_config_response_schema import StudyConfigResponse
-from services.study_retrieval_service import get_study_id_list, get_survey_id
+from services.study_retrieval_service import get_config_file, get_study_id_list, get_survey_id
 
 @pytest.fixture
 def app():
@@ -141,4 +141,66 @@ async def test_get_study_id_from_config_endpoint(client):
     assert response.status_code == 200
     assert response.json() == "423aecc2-70ba-4c02-b99a-79f49f94567a"
  except Exception as e:
-    raise e
\ No newline at end of file
+    raise e
+
+@pytest.mark.asyncio
+async def test_bootstrap_study(client):
+    study_response = await client.get("/study/study_ids")
+    assert study_response.status_code == 200
+    config_id = uuid.UUID(study_response.json()[0])
+
+    response = await client.get(f"/study/bootstrap/{config_id.hex[-6:]}")
+    assert response.status_code == 200
+    json_data = response.json()
+    assert json_data["config_id"] == str(config_id)
+    for phase in ("learning", "experiment"):
+        assert len(json_data[phase]["images"]) == len(json_data[phase]["image_ids"])
+    assert "display_duration" in json_data["wait"]
+    assert "has_survey" in json_data["conclusion"]
+    assert "consent_form" in json_data["files"]
+
+
+@pytest.mark.asyncio
+async def test_consent_form_conditional_and_range(client):
+    study_response = await client.get("/study/study_ids")
+    assert study_response.status_code == 200
+    study_id = study_response.json()[0]
+
+    response = await client.get(f"/study/consent_form/{study_id}")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert "cache-control" in response.headers
+
+    response = await client.get(
+        f"/study/consent_form/{study_id}", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = await client.get(
+        f"/study/consent_form/{study_id}", headers={"Range": "bytes=0-3"}
+    )
+    assert response.status_code == 206
+    assert response.content == b"%PDF"
+    assert response.headers["content-range"].startswith("bytes 0-3/")
+
+
+@pytest.mark.asyncio
+async def test_export_never_selects_blobs(session):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        study_ids = await get_study_id_list(session)
+        config = await get_config_file(study_ids[0], session)
+        assert config.files.consent_form
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+        await session.aclose()
+
+    assert statements
+    for statement in statements:
+        assert "_bytes" not in statement
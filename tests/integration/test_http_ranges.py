@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+
+from utils.http_ranges import (
+    etag_matches,
+    format_byte_range,
+    if_range_matches,
+    parse_byte_range,
+    resolve_byte_range,
+)
+
+
+def test_parse_byte_range():
+    assert parse_byte_range("bytes=0-99") == (0, 99)
+    assert parse_byte_range("bytes=100-") == (100, None)
+    assert parse_byte_range("bytes=-500") == (None, 500)
+    # Malformed and multi-part ranges are served in full
+    assert parse_byte_range("bytes=5-1") is None
+    assert parse_byte_range("bytes=0-1,5-9") is None
+    assert parse_byte_range("items=0-1") is None
+    assert parse_byte_range(None) is None
+
+
+def test_resolve_byte_range():
+    assert resolve_byte_range((0, 99), 1000) == (0, 99)
+    assert resolve_byte_range((900, 2000), 1000) == (900, 999)
+    assert resolve_byte_range((None, 100), 1000) == (900, 999)
+    assert resolve_byte_range((None, 5000), 1000) == (0, 999)
+    assert resolve_byte_range((1000, None), 1000) is None
+    assert format_byte_range((None, 100)) == "bytes=-100"
+
+
+def test_etag_matches():
+    etag = '"abc"'
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('W/"abc", "def"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"def"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_if_range_matches():
+    etag = '"abc"'
+    modified = datetime(2026, 10, 18, 12, 30, 5, 250000, tzinfo=timezone.utc)
+    assert if_range_matches(None, etag, modified)
+    assert if_range_matches('"abc"', etag, modified)
+    # If-Range needs a strong match, weak validators fall back to the full body
+    assert not if_range_matches('W/"abc"', etag, modified)
+    assert not if_range_matches('"abc"', 'W/"abc"', modified)
+    assert not if_range_matches('"def"', etag, modified)
+    assert if_range_matches("Sun, 18 Oct 2026 12:30:05 GMT", etag, modified)
+    assert not if_range_matches("Sun, 18 Oct 2026 12:30:04 GMT", etag, modified)
+    assert not if_range_matches("Sun, 18 Oct 2026 12:30:05 GMT", etag, None)
+    assert not if_range_matches("not a date", etag, modified)
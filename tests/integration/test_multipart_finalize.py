@@ -0,0 +1,280 @@
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from models import all_models
+from models.enums import MultipartStatus, UserRole
+from models.user_model import User
+from services.multipart_service import (
+    MultipartCopier,
+    _copy_stats,
+    complete_latency,
+    complete_upload,
+    create_upload,
+    final_key_is_free,
+    get_owned_upload,
+)
+from services.object_inventory_service import get_objects, inventory_entry, record_objects
+from services.r2_client import AsyncR2Client
+from services.r2_jobs import ABORT_STALE_MPUS, get_job, start_job, wait_for_job
+from settings import get_settings
+
+
+class MultipartBucket:
+    """In-process S3 stand-in that records every call made against it"""
+
+    def __init__(self):
+        self.objects = {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def _record(self, name):
+        with self.lock:
+            self.calls.append(name)
+
+    def create_multipart_upload(self, Bucket, Key, Metadata, ContentType=None):
+        self._record("create_multipart_upload")
+        return {"UploadId": uuid.uuid4().hex}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self._record("complete_multipart_upload")
+        self.objects[Key] = b"x" * 1024
+        return {"ETag": '"etag"'}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self._record("abort_multipart_upload")
+
+    def head_object(self, Bucket, Key):
+        self._record("head_object")
+        return {"ContentLength": len(self.objects[Key]), "ETag": '"etag"'}
+
+    def copy_object(self, Bucket, CopySource, Key, **kwargs):
+        self._record("copy_object")
+        self.objects[Key] = self.objects[CopySource["Key"]]
+        return {"CopyObjectResult": {"ETag": '"etag"'}}
+
+    def delete_object(self, Bucket, Key):
+        self._record("delete_object")
+        self.objects.pop(Key, None)
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = create_async_engine(get_settings().connection_string)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session(engine):
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        # Commits inside the services become savepoints of this outer transaction
+        async with AsyncSession(
+            bind=connection, join_transaction_mode="create_savepoint", expire_on_commit=False
+        ) as session:
+            yield session
+        await transaction.rollback()
+
+
+@pytest_asyncio.fixture
+async def owner(session):
+    user = User(
+        email=f"{uuid.uuid4().hex}@example.com",
+        hashed_password="unused",
+        role=[UserRole.STAFF],
+    )
+    session.add(user)
+    await session.commit()
+    return user.id
+
+
+@pytest.mark.asyncio
+async def test_direct_finalize_is_a_single_call(session, owner):
+    bucket = MultipartBucket()
+    client = AsyncR2Client(bucket, max_workers=2)
+    upload = await create_upload(
+        client, "test", owner, "s1", "CFD-WM-0001-N.jpg", "CFD-WM-0001-N.jpg", session, size=1024
+    )
+    bucket.calls.clear()
+    completed = complete_latency.count
+
+    upload = await get_owned_upload(upload.upload_id, upload.key, owner, session)
+    res = await complete_upload(client, "test", upload, [], session)
+
+    assert res["key"] == "CFD-WM-0001-N.jpg"
+    assert bucket.calls == ["complete_multipart_upload"]
+    assert upload.status == MultipartStatus.COMPLETED
+    assert upload.complete_ms is not None
+    assert complete_latency.count == completed + 1
+    # The size declared on create was never checked, so none is recorded
+    assert upload.size is None
+    assert (await get_objects(["CFD-WM-0001-N.jpg"], session))["CFD-WM-0001-N.jpg"].size is None
+
+    # Completed uploads can no longer be signed, completed or aborted
+    with pytest.raises(HTTPException):
+        await get_owned_upload(upload.upload_id, upload.key, owner, session)
+
+
+@pytest.mark.asyncio
+async def test_deferred_copy_runs_in_background(session, owner):
+    bucket = MultipartBucket()
+    client = AsyncR2Client(bucket, max_workers=2)
+
+    class Factory:
+        """Hands the test session to the copier without closing it"""
+
+        async def __aenter__(self):
+            return session
+
+        async def __aexit__(self, *exc):
+            return False
+
+    copier = MultipartCopier(client, "test", Factory, batch_size=10, poll_interval=0.1, max_attempts=3)
+    upload = await create_upload(
+        client, "test", owner, "s1", "staging/u/x/s1/files/abc-a.jpg", "a.jpg", session
+    )
+    res = await complete_upload(client, "test", upload, [], session, copier=copier)
+    assert res["key"] == "a.jpg"
+    assert upload.status == MultipartStatus.COPYING
+    assert "copy_object" not in bucket.calls
+
+    assert await copier.copy_once() == 1
+    assert set(bucket.objects) == {"a.jpg"}
+    assert upload.status == MultipartStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_size_mismatch_never_deletes_the_existing_object(session, owner):
+    bucket = MultipartBucket()
+    client = AsyncR2Client(bucket, max_workers=2)
+    bucket.objects["a.jpg"] = b"good"
+    await record_objects([inventory_entry("a.jpg", 4)], session)
+    assert not await final_key_is_free("a.jpg", session)
+
+    # An existing key is replaced through a staging key even in direct mode
+    upload = await create_upload(
+        client, "test", owner, "s1", "staging/u/x/s1/files/abc-a.jpg", "a.jpg", session
+    )
+    with pytest.raises(HTTPException) as e:
+        await complete_upload(client, "test", upload, [], session, expected_size=1)
+    assert e.value.status_code == 409
+    assert bucket.objects == {"a.jpg": b"good"}
+    assert upload.status == MultipartStatus.ABORTED
+
+
+@pytest.mark.asyncio
+async def test_staged_upload_is_copied_inline_without_a_copier(session, owner):
+    bucket = MultipartBucket()
+    client = AsyncR2Client(bucket, max_workers=2)
+    upload = await create_upload(
+        client, "test", owner, "s1", "staging/u/x/s1/files/abc-b.jpg", "b.jpg", session
+    )
+    res = await complete_upload(client, "test", upload, [], session)
+    assert res["key"] == "b.jpg"
+    assert set(bucket.objects) == {"b.jpg"}
+    assert upload.status == MultipartStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_copies_that_keep_failing_are_marked_failed(session, owner):
+    bucket = MultipartBucket()
+    client = AsyncR2Client(bucket, max_workers=2)
+
+    def copy_object(**kwargs):
+        raise ConnectionError("copy failed")
+
+    bucket.copy_object = copy_object
+
+    class Factory:
+        async def __aenter__(self):
+            return session
+
+        async def __aexit__(self, *exc):
+            return False
+
+    copier = MultipartCopier(client, "test", Factory, batch_size=10, poll_interval=0.1, max_attempts=2)
+    upload = await create_upload(
+        client, "test", owner, "s1", "staging/u/x/s1/files/abc-c.jpg", "c.jpg", session
+    )
+    await complete_upload(client, "test", upload, [], session, copier=copier)
+    gave_up = _copy_stats["gave_up"]
+
+    assert await copier.copy_once() == 0
+    assert upload.status == MultipartStatus.COPYING
+    assert await copier.copy_once() == 0
+    assert upload.status == MultipartStatus.FAILED
+    assert upload.error == "copy failed"
+    assert _copy_stats["gave_up"] == gave_up + 1
+    # Nothing is left for the copier to retry
+    assert await copier.copy_once() == 0
+    assert "staging/u/x/s1/files/abc-c.jpg" in bucket.objects
+
+
+@pytest.mark.asyncio
+async def test_failed_inline_copy_frees_the_key(session, owner):
+    bucket = MultipartBucket()
+    client = AsyncR2Client(bucket, max_workers=2)
+
+    def copy_object(**kwargs):
+        raise ConnectionError("copy failed")
+
+    bucket.copy_object = copy_object
+    upload = await create_upload(
+        client, "test", owner, "s1", "staging/u/x/s1/files/abc-d.jpg", "d.jpg", session
+    )
+    with pytest.raises(HTTPException) as e:
+        await complete_upload(client, "test", upload, [], session)
+    assert e.value.status_code == 502
+    assert upload.status == MultipartStatus.FAILED
+    assert upload.error == "copy failed"
+    # The staged object is removed and the client can upload again
+    assert bucket.objects == {}
+    assert await final_key_is_free("d.jpg", session)
+
+
+@pytest.mark.asyncio
+async def test_stale_direct_uploads_are_aborted_from_their_records(session, owner):
+    bucket = MultipartBucket()
+    client = AsyncR2Client(bucket, max_workers=2)
+
+    class Factory:
+        def __call__(self):
+            return self
+
+        async def __aenter__(self):
+            return session
+
+        async def __aexit__(self, *exc):
+            return False
+
+    # A direct upload sits at its final key, outside staging/
+    stale = await create_upload(client, "test", owner, "s1", "e.jpg", "e.jpg", session)
+    stale.created_at -= timedelta(days=2)
+    fresh = await create_upload(client, "test", owner, "s1", "f.jpg", "f.jpg", session)
+    await session.commit()
+    assert not await final_key_is_free("e.jpg", session)
+
+    created_before = datetime.now(timezone.utc) - timedelta(hours=24)
+    job = start_job(
+        ABORT_STALE_MPUS,
+        client,
+        "test",
+        continuation={"created_before": created_before.isoformat()},
+        session_factory=Factory(),
+    )
+    await wait_for_job(job.id)
+
+    assert get_job(job.id).status == "completed"
+    assert get_job(job.id).objects_processed == 1
+    assert bucket.calls.count("abort_multipart_upload") == 1
+    await session.refresh(stale)
+    await session.refresh(fresh)
+    assert stale.status == MultipartStatus.ABORTED
+    assert fresh.status == MultipartStatus.PENDING
+    assert await final_key_is_free("e.jpg", session)
@@ -0,0 +1,99 @@
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from models import all_models
+from models.object_inventory_model import ObjectInventory
+from services.object_inventory_service import (
+    inventory_entry,
+    list_objects_page,
+    reconcile_inventory,
+    record_objects,
+    remove_objects,
+)
+from services.r2_client import AsyncR2Client
+from settings import get_settings
+
+
+class ListingBucket:
+    """In-process S3 stand-in that only supports paginated listing"""
+
+    def __init__(self, keys):
+        self.keys = sorted(keys)
+
+    def get_paginator(self, operation):
+        bucket = self
+
+        class Paginator:
+            def paginate(self, Bucket, PageSize=1000):
+                for start in range(0, len(bucket.keys), PageSize):
+                    yield {
+                        "Contents": [
+                            {
+                                "Key": key,
+                                "Size": 10,
+                                "ETag": '"abc"',
+                                "LastModified": datetime.now(timezone.utc),
+                            }
+                            for key in bucket.keys[start : start + PageSize]
+                        ]
+                    }
+
+        return Paginator()
+
+
+@pytest_asyncio.fixture
+async def session():
+    engine = create_async_engine(get_settings().connection_string)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        # Commits inside the services become savepoints of this outer transaction
+        async with AsyncSession(
+            bind=connection, join_transaction_mode="create_savepoint"
+        ) as session:
+            await session.execute(delete(ObjectInventory))
+            yield session
+        await transaction.rollback()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_with_prefix_and_search(session):
+    await record_objects(
+        [inventory_entry(f"images/CFD-{i:03d}.jpg", 10) for i in range(55)]
+        + [inventory_entry("documents/consent.pdf", 10)],
+        session,
+    )
+
+    keys, token = [], None
+    while True:
+        page = await list_objects_page(session, 20, token, prefix="images/")
+        keys += [file.filename for file in page.files]
+        if not (token := page.next_token):
+            break
+    assert keys == [f"images/CFD-{i:03d}.jpg" for i in range(55)]
+
+    page = await list_objects_page(session, 20, search="cfd-01")
+    assert [file.filename for file in page.files] == [
+        f"images/CFD-{i:03d}.jpg" for i in range(10, 20)
+    ]
+    assert page.next_token is None
+
+    await remove_objects(["documents/consent.pdf"], session)
+    assert (await list_objects_page(session, 20, prefix="documents/")).files == []
+
+
+@pytest.mark.asyncio
+async def test_reconcile_adds_missing_and_drops_stale_rows(session):
+    await record_objects([inventory_entry("images/deleted-outside-api.jpg", 10)], session)
+    await session.commit()
+
+    bucket = ListingBucket([f"images/{i:04d}.jpg" for i in range(2500)])
+    result = await reconcile_inventory(AsyncR2Client(bucket, max_workers=2), "test", session)
+
+    assert result == {"scanned": 2500, "removed": 1}
+    page = await list_objects_page(session, 1000, search="deleted")
+    assert page.files == []
@@ -0,0 +1,99 @@
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from auth.password_pool import PasswordHashPool
+from auth.user_manager import UserManager
+from models import all_models
+from models.enums import UserRole
+from models.user_model import User
+
+
+class InMemoryUserDatabase:
+    """Stands in for SQLAlchemyUserDatabase, keyed by email"""
+
+    def __init__(self, *users):
+        self.users = {user.email: user for user in users}
+
+    async def get_by_email(self, email):
+        return self.users.get(email)
+
+    async def update(self, user, update_dict):
+        for key, value in update_dict.items():
+            setattr(user, key, value)
+        return user
+
+
+def _percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+
+async def _participant_latencies(stop: asyncio.Event, interval: float = 0.01) -> list[float]:
+    """Times a cheap request handler by how late the loop runs it"""
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        latencies.append((time.perf_counter() - start - interval) * 1000)
+    return latencies
+
+
+async def _p99_during(storm) -> float:
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_participant_latencies(stop))
+    await asyncio.sleep(0.2)
+    await storm()
+    stop.set()
+    return _percentile(await probe, 0.99)
+
+
+@pytest.mark.asyncio
+async def test_login_storm_keeps_participant_p99_flat():
+    pool = PasswordHashPool(max_workers=2)
+    user = User(
+        id=uuid.uuid4(),
+        email="researcher@example.com",
+        hashed_password=await pool.hash("correct horse"),
+        is_active=True,
+        is_superuser=False,
+        is_verified=True,
+        role=[UserRole.RESEARCHER],
+    )
+    manager = UserManager(InMemoryUserDatabase(user), pool)
+
+    async def idle():
+        await asyncio.sleep(0.5)
+
+    async def storm():
+        attempts = [
+            SimpleNamespace(username=user.email, password="correct horse"),
+            SimpleNamespace(username=user.email, password="wrong"),
+            SimpleNamespace(username="unknown@example.com", password="wrong"),
+        ] * 4
+        results = await asyncio.gather(*[manager.authenticate(a) for a in attempts])
+        assert [r is not None for r in results] == [True, False, False] * 4
+
+    async def inline_storm():
+        for _ in range(4):
+            pool.password_helper.verify_and_update("correct horse", user.hashed_password)
+            await asyncio.sleep(0)
+
+    baseline = await _p99_during(idle)
+    pooled = await _p99_during(storm)
+    blocking = await _p99_during(inline_storm)
+
+    # One hash on the loop stalls participants for its whole duration
+    hash_ms = pool.hash_duration.summary()["p50_ms"]
+    assert blocking > hash_ms / 2
+    assert pooled < max(baseline * 5, 50) < blocking
+
+    stats = pool.stats()
+    assert stats["hash"]["count"] == 13
+    assert stats["queue_wait"]["count"] == 13
+    # Twelve logins on two workers, most of them queued
+    assert stats["queue_wait"]["max_ms"] > hash_ms
+    assert stats["pending"] == 0
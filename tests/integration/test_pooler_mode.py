@@ -0,0 +1,153 @@
+import asyncio
+
+import asyncpg.connection
+import pytest
+import pytest_asyncio
+from sqlalchemy import literal, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from db.client import engine_options
+from settings import get_settings
+
+SSL_REQUEST = 80877103
+GSSENC_REQUEST = 80877104
+# Authentication requests the client has to answer: cleartext, MD5, SASL, SASL continue
+AUTH_CHALLENGES = {3, 5, 10, 11}
+
+
+async def _read_message(reader: asyncio.StreamReader) -> tuple[bytes, bytes]:
+    kind = await reader.readexactly(1)
+    length = int.from_bytes(await reader.readexactly(4), "big")
+    return kind, length.to_bytes(4, "big") + await reader.readexactly(length - 4)
+
+
+class TransactionPoolerStandIn:
+    """PgBouncer-like proxy that hands one server connection to client after client
+
+    Like PgBouncer in transaction mode, the server connection is not reset
+    between clients, so prepared statements outlive the client that made them.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.lock = asyncio.Lock()
+        self.server = None
+        # AuthenticationOk up to ReadyForQuery, replayed to every later client
+        self.handshake = b""
+        self.clients = 0
+
+    async def start(self) -> int:
+        self._listener = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._listener.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self._listener.close()
+        if self.server:
+            self.server[1].close()
+
+    async def _startup(self, reader, writer) -> bytes:
+        while True:
+            length = int.from_bytes(await reader.readexactly(4), "big")
+            body = await reader.readexactly(length - 4)
+            if int.from_bytes(body[:4], "big") in (SSL_REQUEST, GSSENC_REQUEST):
+                writer.write(b"N")
+                await writer.drain()
+                continue
+            return length.to_bytes(4, "big") + body
+
+    async def _connect_server(self, startup: bytes, reader, writer):
+        server_reader, server_writer = await asyncio.open_connection(self.host, self.port)
+        server_writer.write(startup)
+        recording = False
+        while True:
+            kind, body = await _read_message(server_reader)
+            writer.write(kind + body)
+            await writer.drain()
+            code = int.from_bytes(body[4:8], "big") if kind == b"R" else None
+            if code == 0:
+                recording = True
+            if recording:
+                self.handshake += kind + body
+            if code in AUTH_CHALLENGES:
+                server_writer.write(b"".join(await _read_message(reader)))
+            if kind == b"E":
+                raise ConnectionError("server rejected the startup")
+            if kind == b"Z":
+                self.server = (server_reader, server_writer)
+                return
+
+    async def _handle(self, reader, writer):
+        # One client at a time owns the single server connection
+        async with self.lock:
+            self.clients += 1
+            try:
+                startup = await self._startup(reader, writer)
+                if self.server is None:
+                    await self._connect_server(startup, reader, writer)
+                else:
+                    writer.write(self.handshake)
+                    await writer.drain()
+                await self._relay(reader, writer)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+
+    async def _relay(self, reader, writer):
+        server_reader, server_writer = self.server
+
+        async def to_client():
+            while data := await server_reader.read(65536):
+                writer.write(data)
+                await writer.drain()
+
+        pump = asyncio.create_task(to_client())
+        try:
+            while True:
+                kind, body = await _read_message(reader)
+                # Terminate ends the client, the server connection stays open for the next one
+                if kind == b"X":
+                    break
+                server_writer.write(kind + body)
+                await server_writer.drain()
+        finally:
+            pump.cancel()
+            await asyncio.gather(pump, return_exceptions=True)
+
+
+@pytest_asyncio.fixture
+async def pooler_url():
+    url = make_url(get_settings().connection_string)
+    stand_in = TransactionPoolerStandIn(url.host or "localhost", url.port or 5432)
+    port = await stand_in.start()
+    yield url.set(host="127.0.0.1", port=port).render_as_string(hide_password=False)
+    await stand_in.close()
+
+
+async def _worker(url: str, settings, queries: int = 5):
+    """One uvicorn worker, a separate process with its own statement numbering"""
+    asyncpg.connection._uid = 0
+    engine = create_async_engine(url, **engine_options(settings, url))
+    try:
+        for i in range(queries):
+            async with engine.connect() as conn:
+                assert await conn.scalar(select(literal(i) + 1)) == i + 1
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pooler_mode_survives_shared_server_connections(pooler_url):
+    settings = get_settings().model_copy(update={"db_pooler_mode": True})
+    for _ in range(3):
+        await _worker(pooler_url, settings)
+
+
+@pytest.mark.asyncio
+async def test_default_mode_collides_behind_the_pooler(pooler_url):
+    settings = get_settings().model_copy(update={"db_pooler_mode": False})
+    await _worker(pooler_url, settings)
+    with pytest.raises(Exception, match="already exists"):
+        await _worker(pooler_url, settings)
@@ -0,0 +1,59 @@
+import pytest
+from pydantic import ValidationError
+
+import services.r2_service as r2_service
+from services.r2_service import generate_url_list, presigned_url_cache
+from services.r2_signer import PresignedUrlSigner
+from settings import Settings
+
+ENDPOINT = "https://account.r2.cloudflarestorage.com"
+BUCKET = "test-bucket"
+
+
+class CountingSigner(PresignedUrlSigner):
+    def __init__(self):
+        super().__init__(ENDPOINT, "read-key", "read-secret")
+        self.signed = 0
+
+    def presign_get_many(self, bucket, keys, expires_in=3600, now=None):
+        self.signed += len(keys)
+        return super().presign_get_many(bucket, keys, expires_in, now)
+
+
+@pytest.fixture
+def signer():
+    presigned_url_cache.clear()
+    return CountingSigner()
+
+
+@pytest.mark.asyncio
+async def test_urls_reused_within_window(signer, monkeypatch):
+    monkeypatch.setattr(r2_service.time, "time", lambda: 1_000_000.0)
+    keys = ["a.jpg", "b.jpg", "a.jpg"]
+
+    first = await generate_url_list(signer, BUCKET, keys)
+    second = await generate_url_list(signer, BUCKET, keys)
+
+    assert first == second
+    assert first[0] == first[2]
+    assert signer.signed == 2
+
+
+@pytest.mark.asyncio
+async def test_urls_rotate_after_window(signer, monkeypatch):
+    now = 1_000_000.0
+    monkeypatch.setattr(r2_service.time, "time", lambda: now)
+    first = await generate_url_list(signer, BUCKET, ["a.jpg"], expiration=3600)
+
+    now += 3600 * r2_service.settings.presign_rotate_fraction
+    rotated = await generate_url_list(signer, BUCKET, ["a.jpg"], expiration=3600)
+
+    assert first != rotated
+    assert signer.signed == 2
+
+
+@pytest.mark.parametrize("fraction", [0, 1, 1.5])
+def test_rotate_fraction_must_leave_urls_valid(fraction):
+    # A window as long as the URL's lifetime would hand out URLs that already expired
+    with pytest.raises(ValidationError):
+        Settings(presign_rotate_fraction=fraction)
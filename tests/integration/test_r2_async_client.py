@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+
+from services.r2_client import AsyncR2Client
+
+LATENCY = 0.2
+
+
+class SlowStorage:
+    """Local stand-in for an S3 client with a fixed round-trip latency"""
+
+    def __init__(self):
+        self.objects = {f"images/{i}.jpg": b"x" * i for i in range(10)}
+
+    def head_object(self, Bucket, Key):
+        time.sleep(LATENCY)
+        return {"ContentLength": len(self.objects[Key])}
+
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn=3600, HttpMethod=None):
+        return f"https://storage.test/{Params['Bucket']}/{Params['Key']}"
+
+    def get_paginator(self, operation):
+        storage = self
+
+        class Paginator:
+            def paginate(self, Bucket, PageSize=4):
+                keys = sorted(storage.objects)
+                for start in range(0, len(keys), PageSize):
+                    time.sleep(LATENCY)
+                    yield {"Contents": [{"Key": key} for key in keys[start : start + PageSize]]}
+
+        return Paginator()
+
+
+async def _max_loop_lag(until: asyncio.Future, interval=0.01) -> float:
+    lag = 0.0
+    while not until.done():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(lag, time.perf_counter() - start - interval)
+    return lag
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive_during_slow_calls():
+    client = AsyncR2Client(SlowStorage(), max_workers=10)
+    start = time.perf_counter()
+    calls = asyncio.gather(
+        *[client.head_object(Bucket="test", Key=f"images/{i}.jpg") for i in range(10)]
+    )
+    lag = await _max_loop_lag(calls)
+    heads = await calls
+    elapsed = time.perf_counter() - start
+
+    assert [head["ContentLength"] for head in heads] == list(range(10))
+    # Ten calls overlap on the pool instead of running back to back
+    assert elapsed < LATENCY * 3
+    assert lag < LATENCY / 2
+    print(f"10 slow calls in {elapsed * 1e3:.0f} ms, max loop lag {lag * 1e3:.1f} ms")
+
+
+@pytest.mark.asyncio
+async def test_pool_bounds_concurrency():
+    client = AsyncR2Client(SlowStorage(), max_workers=2)
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[client.head_object(Bucket="test", Key=f"images/{i}.jpg") for i in range(4)]
+    )
+    assert time.perf_counter() - start >= LATENCY * 2
+
+
+@pytest.mark.asyncio
+async def test_paginate_and_local_methods():
+    client = AsyncR2Client(SlowStorage(), max_workers=2)
+    keys = [
+        item["Key"]
+        async for page in client.paginate("list_objects_v2", Bucket="test")
+        for item in page["Contents"]
+    ]
+    assert len(keys) == 10
+
+    url = client.generate_presigned_url(
+        ClientMethod="get_object", Params={"Bucket": "test", "Key": "a.jpg"}
+    )
+    assert url == "https://storage.test/test/a.jpg"
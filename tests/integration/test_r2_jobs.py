@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+from services.r2_client import AsyncR2Client
+from services.r2_jobs import (
+    ABORT_MPUS,
+    CLEAR_BUCKET,
+    get_job,
+    resume_job,
+    start_job,
+    wait_for_job,
+)
+
+LATENCY = 0.01
+
+
+class LocalBucket:
+    """In-process S3 stand-in for listing, batch deletes and multipart uploads"""
+
+    def __init__(self, objects=0, uploads=0, fail_deletes=0):
+        self.objects = {f"images/{i:06d}.jpg" for i in range(objects)}
+        self.uploads = {(f"staging/u/1/s/files/{i:06d}", f"id-{i}") for i in range(uploads)}
+        self.fail_deletes = fail_deletes
+        self.lock = threading.Lock()
+
+    def list_objects_v2(self, Bucket, Prefix="", MaxKeys=1000, ContinuationToken=None):
+        time.sleep(LATENCY)
+        with self.lock:
+            keys = sorted(k for k in self.objects if k.startswith(Prefix) and k > (ContinuationToken or ""))
+        page = keys[:MaxKeys]
+        resp = {"Contents": [{"Key": key} for key in page], "IsTruncated": len(keys) > MaxKeys}
+        if resp["IsTruncated"]:
+            resp["NextContinuationToken"] = page[-1]
+        return resp
+
+    def delete_objects(self, Bucket, Delete):
+        time.sleep(LATENCY)
+        with self.lock:
+            if self.fail_deletes:
+                self.fail_deletes -= 1
+                raise ConnectionError("storage unavailable")
+            for item in Delete["Objects"]:
+                self.objects.discard(item["Key"])
+        return {"Deleted": Delete["Objects"]}
+
+    def list_multipart_uploads(self, Bucket, Prefix, KeyMarker=None, UploadIdMarker=None):
+        with self.lock:
+            uploads = sorted(u for u in self.uploads if u[0] > (KeyMarker or ""))
+        page = uploads[:1000]
+        resp = {
+            "Uploads": [{"Key": key, "UploadId": upload_id} for key, upload_id in page],
+            "IsTruncated": len(uploads) > 1000,
+        }
+        if resp["IsTruncated"]:
+            resp["NextKeyMarker"], resp["NextUploadIdMarker"] = page[-1]
+        return resp
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        with self.lock:
+            self.uploads.discard((Key, UploadId))
+
+
+@pytest.mark.asyncio
+async def test_clear_bucket_job_deletes_everything():
+    bucket = LocalBucket(objects=5500)
+    job = start_job(CLEAR_BUCKET, AsyncR2Client(bucket, max_workers=8), "test", parallelism=4)
+    await wait_for_job(job.id)
+
+    job = get_job(job.id)
+    assert job.status == "completed"
+    assert job.pages_scanned == 6
+    assert job.objects_processed == 5500
+    assert job.continuation is None
+    assert bucket.objects == set()
+
+
+@pytest.mark.asyncio
+async def test_failed_job_resumes_from_checkpoint():
+    bucket = LocalBucket(objects=3500, fail_deletes=1)
+    client = AsyncR2Client(bucket, max_workers=4)
+    job = start_job(CLEAR_BUCKET, client, "test", parallelism=1)
+    await wait_for_job(job.id)
+    assert get_job(job.id).status == "failed"
+    assert bucket.objects
+
+    resume_job(job.id, client, parallelism=2)
+    await wait_for_job(job.id)
+    assert get_job(job.id).status == "completed"
+    assert bucket.objects == set()
+
+
+@pytest.mark.asyncio
+async def test_abort_mpus_job():
+    bucket = LocalBucket(uploads=2500)
+    job = start_job(ABORT_MPUS, AsyncR2Client(bucket, max_workers=8), "test", prefix="staging/")
+    await wait_for_job(job.id)
+
+    job = get_job(job.id)
+    assert job.status == "completed"
+    assert job.objects_processed == 2500
+    assert bucket.uploads == set()
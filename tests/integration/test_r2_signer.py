@@ -0,0 +1,72 @@
+import time
+from datetime import datetime, timezone
+from unittest import mock
+
+import boto3
+import pytest
+from botocore.client import Config
+
+from services.r2_signer import PresignedUrlSigner
+
+ENDPOINT = "https://account.r2.cloudflarestorage.com"
+BUCKET = "test-bucket"
+KEYS = [
+    "CFD-WM-032-001-N.jpg",
+    "folder/CFD WM 033+025~N.jpg",
+    "unicode/é-ß-日本.jpg",
+    "odd/(1)!*'?#&=.jpg",
+]
+
+
+@pytest.fixture
+def boto_client():
+    return boto3.client(
+        "s3",
+        endpoint_url=ENDPOINT,
+        aws_access_key_id="read-key",
+        aws_secret_access_key="read-secret",
+        config=Config(signature_version="s3v4"),
+        region_name="auto",
+    )
+
+
+@pytest.fixture
+def signer():
+    return PresignedUrlSigner(ENDPOINT, "read-key", "read-secret", region="auto")
+
+
+def test_signer_matches_boto3(boto_client, signer):
+    now = datetime(2025, 10, 1, 12, 30, 15, tzinfo=timezone.utc)
+    with mock.patch("botocore.auth.get_current_datetime", return_value=now.replace(tzinfo=None)):
+        expected = [
+            boto_client.generate_presigned_url(
+                "get_object", Params={"Bucket": BUCKET, "Key": key}, ExpiresIn=3600
+            )
+            for key in KEYS
+        ]
+    assert signer.presign_get_many(BUCKET, KEYS, 3600, now=now) == expected
+
+
+@pytest.mark.asyncio
+async def test_signer_off_event_loop(signer):
+    now = datetime(2025, 10, 1, 12, 30, 15, tzinfo=timezone.utc)
+    urls = await signer.apresign_get_many(BUCKET, KEYS, 900, now=now)
+    assert urls == signer.presign_get_many(BUCKET, KEYS, 900, now=now)
+
+
+def test_signing_benchmark(boto_client, signer):
+    keys = [f"CFD-WM-{i:04d}-N.jpg" for i in range(1000)]
+
+    start = time.perf_counter()
+    for key in keys:
+        boto_client.generate_presigned_url(
+            "get_object", Params={"Bucket": BUCKET, "Key": key}, ExpiresIn=3600
+        )
+    boto_per_key = (time.perf_counter() - start) / len(keys)
+
+    start = time.perf_counter()
+    signer.presign_get_many(BUCKET, keys, 3600)
+    signer_per_key = (time.perf_counter() - start) / len(keys)
+
+    print(f"per-key signing: boto3 {boto_per_key * 1e6:.1f} us, signer {signer_per_key * 1e6:.1f} us")
+    assert signer_per_key < boto_per_key
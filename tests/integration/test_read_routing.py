@@ -0,0 +1,71 @@
+import uuid
+from functools import partial
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from db import client
+from services.results_export_service import export_rows_stmt, stream_export_rows
+from settings import get_settings
+
+
+def _factory(url, read_only=False):
+    settings = get_settings()
+    engine = create_async_engine(url, **client.engine_options(settings, url, read_only=read_only))
+    return sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def test_recent_writers_read_from_primary(monkeypatch):
+    replica = _factory(get_settings().connection_string, read_only=True)
+    monkeypatch.setattr(client, "ReadSessionLocal", replica)
+    monkeypatch.setattr(client, "_replica_down_until", 0.0)
+
+    researcher = uuid.uuid4()
+    assert client.read_session_factory() is replica
+    assert client.read_session_factory(researcher) is replica
+
+    client.mark_recent_write(researcher)
+    assert client.read_session_factory(researcher) is client.AsyncSessionLocal
+    # Other users keep reading from the replica
+    assert client.read_session_factory(uuid.uuid4()) is replica
+
+
+def test_no_replica_configured_uses_primary(monkeypatch):
+    monkeypatch.setattr(client, "ReadSessionLocal", None)
+    assert client.read_session_factory(uuid.uuid4()) is client.AsyncSessionLocal
+
+
+@pytest.mark.asyncio
+async def test_replica_sessions_are_read_only_and_fall_back(monkeypatch):
+    """Uses the same database for both roles, the replica connects read-only"""
+    replica = _factory(get_settings().connection_string, read_only=True)
+    monkeypatch.setattr(client, "ReadSessionLocal", replica)
+    monkeypatch.setattr(client, "_replica_down_until", 0.0)
+
+    async with client.open_read_session() as session:
+        mode = await session.scalar(text("SHOW default_transaction_read_only"))
+    assert mode == "on"
+
+    # Nothing listens on port 1, reads fall back to the primary
+    unreachable = _factory("postgresql+asyncpg://u:p@127.0.0.1:1/db", read_only=True)
+    monkeypatch.setattr(client, "ReadSessionLocal", unreachable)
+    async with client.open_read_session() as session:
+        mode = await session.scalar(text("SHOW default_transaction_read_only"))
+    assert mode == "off"
+    assert client.read_session_factory() is client.AsyncSessionLocal
+
+
+@pytest.mark.asyncio
+async def test_exports_fall_back_when_the_replica_is_down(monkeypatch):
+    unreachable = _factory("postgresql+asyncpg://u:p@127.0.0.1:1/db", read_only=True)
+    monkeypatch.setattr(client, "ReadSessionLocal", unreachable)
+    monkeypatch.setattr(client, "_replica_down_until", 0.0)
+
+    researcher = uuid.uuid4()
+    rows = stream_export_rows(
+        export_rows_stmt(researcher), partial(client.open_read_session, researcher)
+    )
+    assert [row async for partition in rows for row in partition] == []
+    assert client._replica_down_until > 0
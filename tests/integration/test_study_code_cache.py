@@ -0,0 +1,51 @@
+import uuid
+
+import pytest
+
+from services.study_retrieval_service import (
+    cache_study_config,
+    get_study_id,
+    get_study_id_from_config,
+    invalidate_study_config,
+    study_code_cache,
+)
+from utils.metrics import collect_metrics
+from utils.ttl_cache import TTLCache
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_skips_database():
+    config_id = uuid.uuid4()
+    study_id = uuid.uuid4()
+    study_code = config_id.hex[-6:]
+    cache_study_config(study_code, config_id, study_id)
+
+    hits = study_code_cache.hits
+    # No connection is provided, so any database access would fail
+    assert await get_study_id(study_code, conn=None) == config_id
+    assert await get_study_id_from_config(config_id, conn=None) == study_id
+    assert study_code_cache.hits == hits + 1
+
+    invalidate_study_config(config_id, study_code)
+    assert study_code_cache.get(study_code) is None
+
+
+def test_cache_counters():
+    cache = TTLCache("test_counters", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # Evicts "b", the least recently used
+    assert cache.get("b") is None
+
+    stats = collect_metrics()["cache.test_counters"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+
+
+def test_cache_expiry():
+    cache = TTLCache("test_expiry", maxsize=2, ttl=60)
+    cache.set("a", 1, ttl=0)
+    assert cache.get("a") is None
@@ -0,0 +1,81 @@
+import statistics
+import time
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import all_models
+from models.study_config_model import StudyConfiguration
+from models.study_model import Study
+from schemas.const import TAIL_LEN
+from services.study_retrieval_service import get_study_id
+from settings import get_settings
+
+
+@pytest_asyncio.fixture
+async def session():
+    settings = get_settings()
+    engine = create_async_engine(settings.connection_string)
+    AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with AsyncSessionLocal() as session:
+        yield session
+        # Nothing inserted by the benchmark is ever committed
+        await session.rollback()
+    await engine.dispose()
+
+
+async def _insert_configs(session, study_id, count, taken: set[str]):
+    """Inserts configs with codes not already in `taken`, which is updated in place"""
+    codes = []
+    rows = []
+    while len(codes) < count:
+        config_id = uuid.uuid4()
+        code = config_id.hex[-TAIL_LEN:]
+        if code in taken:
+            continue
+        taken.add(code)
+        codes.append(code)
+        rows.append({"id": config_id, "study_id": study_id, "study_code": code})
+    await session.execute(insert(StudyConfiguration), rows)
+    return codes
+
+
+async def _median_lookup(session, codes, rounds=300):
+    timings = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        await get_study_id(codes[i % len(codes)], session)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+@pytest.mark.asyncio
+async def test_study_code_lookup_latency_is_flat(session):
+    study_id = uuid.uuid4()
+    await session.execute(insert(Study).values(id=study_id, researcher=uuid.uuid4()))
+
+    # Study codes are unique across the table, including configs that already exist
+    taken = set((await session.execute(select(StudyConfiguration.study_code))).scalars())
+    small_codes = await _insert_configs(session, study_id, 100, taken)
+    await session.execute(text("ANALYZE study_config"))
+    small = await _median_lookup(session, small_codes)
+
+    large_codes = small_codes + await _insert_configs(session, study_id, 10_000, taken)
+    await session.execute(text("ANALYZE study_config"))
+    large = await _median_lookup(session, large_codes)
+
+    print(f"median lookup: 100 configs {small * 1e3:.3f} ms, 10k configs {large * 1e3:.3f} ms")
+    assert large < small * 3 + 0.001
+
+    plan = await session.execute(
+        text("EXPLAIN SELECT id FROM study_config WHERE study_code = :code"),
+        {"code": large_codes[-1]},
+    )
+    plan_text = "\n".join(row[0] for row in plan)
+    assert "ix_study_config_study_code" in plan_text
+    assert "Seq Scan" not in plan_text
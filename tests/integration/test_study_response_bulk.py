@@ -0,0 +1,118 @@
+import time
+import uuid
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import all_models
+from models.study_response_model import StudyResponse
+from models.study_result_model import StudyResults
+from schemas.study_results_schema import StudyResponseSchema
+from services.study_response_service import insert_study_responses
+from services.study_retrieval_service import get_study_id_list
+from settings import get_settings
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = create_async_engine(get_settings().connection_string)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session(engine):
+    AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with AsyncSessionLocal() as session:
+        yield session
+        # Nothing inserted by the benchmark is ever committed
+        await session.rollback()
+
+
+def _responses(count):
+    return [
+        StudyResponseSchema(image_id=f"CFD-WM-{i:04d}-N.jpg", answer=i % 2, response_time=0.5)
+        for i in range(count)
+    ]
+
+
+async def _add_result(session, config_id):
+    study_id = (await session.execute(
+        select(StudyResults.study_id).where(StudyResults.config_id == config_id).limit(1)
+    )).scalar_one_or_none()
+    result = StudyResults(
+        id=uuid.uuid4(),
+        study_id=study_id,
+        config_id=config_id,
+        subject_id=uuid.uuid4(),
+        submitted=datetime.now(),
+    )
+    session.add(result)
+    return result.id
+
+
+async def _orm_insert(session, result_id, responses):
+    for i, response in enumerate(responses):
+        session.add(
+            StudyResponse(
+                id=i + 1,
+                study_results_id=result_id,
+                image_id=response.image_id,
+                response_time=response.response_time,
+                answer=response.answer,
+            )
+        )
+    await session.flush()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("count", [50, 200, 1000])
+async def test_bulk_response_insert_benchmark(engine, session, count):
+    config_id = (await session.execute(select(StudyResults.config_id).limit(1))).scalar_one()
+    responses = _responses(count)
+
+    inserts = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO study_response"):
+            inserts.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        result_id = await _add_result(session, config_id)
+        start = time.perf_counter()
+        await insert_study_responses(result_id, responses, session)
+        bulk = time.perf_counter() - start
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    stored = (await session.execute(
+        select(func.count()).where(StudyResponse.study_results_id == result_id)
+    )).scalar_one()
+    assert stored == count
+    assert len(inserts) == 1
+
+    result_id = await _add_result(session, config_id)
+    await session.flush()
+    start = time.perf_counter()
+    await _orm_insert(session, result_id, responses)
+    orm = time.perf_counter() - start
+
+    print(f"{count} responses: bulk {bulk * 1e3:.2f} ms, per-object ORM {orm * 1e3:.2f} ms")
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_shares_result_transaction(session):
+    study_ids = await get_study_id_list(session)
+    result_id = await _add_result(session, study_ids[0])
+    await insert_study_responses(result_id, _responses(5), session)
+    await session.rollback()
+
+    stored = (await session.execute(
+        select(func.count()).where(StudyResponse.study_results_id == result_id)
+    )).scalar_one()
+    assert stored == 0
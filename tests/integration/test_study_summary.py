@@ -0,0 +1,142 @@
+import uuid
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, event, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import all_models
+from models.study_config_model import StudyConfiguration
+from models.study_model import Study
+from models.study_result_model import StudyResults
+from schemas.study_results_schema import StudyResponseSchema
+from services.study_response_service import insert_study_responses
+from services.study_summary_service import (
+    _shard,
+    get_study_list,
+    get_study_summary,
+    record_submission,
+    retract_submission,
+)
+from settings import get_settings
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = create_async_engine(get_settings().connection_string)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session(engine):
+    AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with AsyncSessionLocal() as session:
+        yield session
+        # Nothing submitted by these tests is ever committed
+        await session.rollback()
+
+
+async def _submit(session, study_id, config_id, answers, subject_id=None):
+    responses = [
+        StudyResponseSchema(image_id=f"CFD-WM-{i:04d}-N.jpg", answer=answer, response_time=100.0)
+        for i, answer in enumerate(answers)
+    ]
+    result = StudyResults(
+        id=uuid.uuid4(),
+        study_id=study_id,
+        config_id=config_id,
+        subject_id=subject_id or uuid.uuid4(),
+        submitted=datetime.now(),
+    )
+    session.add(result)
+    await insert_study_responses(result.id, responses, session)
+    await record_submission(result.id, responses, session)
+    return result.id
+
+
+@pytest.mark.asyncio
+async def test_summary_tracks_submissions(session):
+    study_id, config_id, researcher_id = (await session.execute(
+        select(Study.id, StudyConfiguration.id, Study.researcher)
+        .join(StudyConfiguration)
+        .limit(1)
+    )).one()
+    before = await get_study_summary(study_id, researcher_id, session)
+
+    result_id = await _submit(session, study_id, config_id, [1, 1, 0])
+    after = await get_study_summary(study_id, researcher_id, session)
+    assert after.total_submissions == before.total_submissions + 1
+    assert after.answer_histogram.get(1, 0) == before.answer_histogram.get(1, 0) + 2
+    assert after.answer_histogram.get(0, 0) == before.answer_histogram.get(0, 0) + 1
+
+    listed = await get_study_list(researcher_id, session)
+    item = next(item for item in listed.items if item.configuration_id == config_id)
+    assert item.total_submissions >= 1
+    assert item.last_submission_at is not None
+
+    await retract_submission(result_id, session)
+    await session.execute(delete(StudyResults).where(StudyResults.id == result_id))
+    retracted = await get_study_summary(study_id, researcher_id, session)
+    assert retracted.total_submissions == before.total_submissions
+    assert retracted.answer_histogram == before.answer_histogram
+
+
+@pytest.mark.asyncio
+async def test_summary_never_reads_responses(engine, session):
+    study_id, researcher_id = (await session.execute(
+        select(Study.id, Study.researcher).join(StudyConfiguration).limit(1)
+    )).one()
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        await get_study_summary(study_id, researcher_id, session)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    assert len(statements) == 2
+    assert not any("study_response" in statement for statement in statements)
+
+
+async def _subject_in_other_shard(session, subject_id):
+    shard = (await session.execute(select(_shard(literal(str(subject_id)))))).scalar_one()
+    while True:
+        other = uuid.uuid4()
+        if (await session.execute(select(_shard(literal(str(other)))))).scalar_one() != shard:
+            return other
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submissions_do_not_wait_on_one_row(engine, session):
+    if get_settings().study_summary_shards < 2:
+        pytest.skip("needs more than one summary shard")
+    study_id, config_id, researcher_id = (await session.execute(
+        select(Study.id, StudyConfiguration.id, Study.researcher)
+        .join(StudyConfiguration)
+        .limit(1)
+    )).one()
+    before = await get_study_summary(study_id, researcher_id, session)
+
+    first_subject = uuid.uuid4()
+    await _submit(session, study_id, config_id, [1, 0], subject_id=first_subject)
+
+    # A second participant of the same configuration, while the first transaction is still open
+    AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with AsyncSessionLocal() as other:
+        try:
+            await other.execute(text("SET LOCAL lock_timeout = '1s'"))
+            second_subject = await _subject_in_other_shard(other, first_subject)
+            await _submit(other, study_id, config_id, [1, 1], subject_id=second_subject)
+        finally:
+            await other.rollback()
+
+    after = await get_study_summary(study_id, researcher_id, session)
+    assert after.total_submissions == before.total_submissions + 1
+    assert after.answer_histogram.get(1, 0) == before.answer_histogram.get(1, 0) + 1
@@ -0,0 +1,85 @@
+import io
+import threading
+import time
+import zipfile
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from services.r2_client import AsyncR2Client
+from services.r2_service import upload_zip_file
+
+LATENCY = 0.02
+
+
+class LocalBucket:
+    """In-process S3 stand-in with a fixed per-request latency"""
+
+    def __init__(self, fail_on=None):
+        self.objects = {}
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        time.sleep(LATENCY)
+        if Key == self.fail_on:
+            raise ConnectionError("storage unavailable")
+        with self.lock:
+            self.objects[Key] = Body
+
+    def delete_objects(self, Bucket, Delete):
+        with self.lock:
+            for item in Delete["Objects"]:
+                self.objects.pop(item["Key"], None)
+        return {"Deleted": Delete["Objects"]}
+
+
+def _zip(count=80):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i in range(count):
+            zf.writestr(f"CFD/CFD-WM-{i:04d}-N.jpg", bytes([i % 256]) * 4096)
+        zf.writestr("CFD/readme.txt", b"not an image")
+        zf.writestr("__MACOSX/CFD/._CFD-WM-0000-N.jpg", b"")
+    buffer.seek(0)
+    return UploadFile(file=buffer, filename="stimuli.zip")
+
+
+@pytest.mark.asyncio
+async def test_parallel_zip_ingest_benchmark():
+    serial_bucket = LocalBucket()
+    serial = await upload_zip_file(
+        AsyncR2Client(serial_bucket, max_workers=1), "test", _zip(), "images", workers=1
+    )
+
+    bucket = LocalBucket()
+    progress = []
+    parallel = await upload_zip_file(
+        AsyncR2Client(bucket, max_workers=8),
+        "test",
+        _zip(),
+        "images",
+        workers=8,
+        progress=lambda done, total: progress.append((done, total)),
+    )
+
+    assert parallel["files"] == serial["files"] == 80
+    assert sorted(bucket.objects) == sorted(serial_bucket.objects)
+    assert progress[-1] == (80, 80)
+    assert parallel["elapsed_seconds"] * 3 < serial["elapsed_seconds"]
+    print(
+        f"serial {serial['elapsed_seconds']:.2f}s, parallel {parallel['elapsed_seconds']:.2f}s, "
+        f"{parallel['files_per_second']} files/s, {parallel['avg_file_seconds']}s per file"
+    )
+
+
+@pytest.mark.asyncio
+async def test_failed_zip_ingest_rolls_back():
+    bucket = LocalBucket(fail_on="images/CFD-WM-0040-N.jpg")
+    with pytest.raises(HTTPException) as e:
+        await upload_zip_file(
+            AsyncR2Client(bucket, max_workers=4), "test", _zip(), "images", workers=4
+        )
+    assert e.value.status_code == 500
+    assert "CFD-WM-0040-N.jpg" in e.value.detail
+    assert bucket.objects == {}
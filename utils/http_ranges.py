@@ -0,0 +1,83 @@
+import re
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+ByteRange = tuple[Optional[int], Optional[int]]
+
+
+def parse_byte_range(header: Optional[str]) -> Optional[ByteRange]:
+    """Parses a single `bytes=start-end` Range header
+
+    Returns (start, end) where either side may be None for open-ended and
+    suffix ranges. Missing, malformed and multi-part ranges return None and
+    are served as a full response, as RFC 9110 allows.
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    start = int(match.group(1)) if match.group(1) else None
+    end = int(match.group(2)) if match.group(2) else None
+    if start is not None and end is not None and end < start:
+        return None
+    return start, end
+
+
+def resolve_byte_range(byte_range: ByteRange, size: int) -> Optional[tuple[int, int]]:
+    """Resolves a parsed range against the content size
+
+    Returns inclusive (first, last) byte positions, or None when unsatisfiable.
+    """
+    start, end = byte_range
+    if start is None:
+        if end == 0 or size == 0:
+            return None
+        return max(size - end, 0), size - 1
+    if start >= size:
+        return None
+    return start, min(end if end is not None else size - 1, size - 1)
+
+
+def format_byte_range(byte_range: ByteRange) -> str:
+    start, end = byte_range
+    return f"bytes={'' if start is None else start}-{'' if end is None else end}"
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag.removeprefix("W/") in tags
+
+
+def if_range_matches(
+    header: Optional[str], etag: Optional[str], last_modified: Optional[datetime]
+) -> bool:
+    """Evaluates an If-Range header, True when the Range may be honoured
+
+    Entity tags use strong comparison, so weak validators never match
+    (RFC 9110 13.1.5). An HTTP-date must equal Last-Modified exactly.
+    """
+    if not header:
+        return True
+    header = header.strip()
+    if header.startswith(('"', "W/")):
+        return (
+            etag is not None
+            and not header.startswith("W/")
+            and not etag.startswith("W/")
+            and header == etag
+        )
+    if last_modified is None:
+        return False
+    try:
+        return last_modified.replace(microsecond=0) == parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
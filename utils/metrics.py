@@ -0,0 +1,43 @@
+from collections import deque
+from typing import Callable
+
+# In-process metric providers, keyed by name
+# Each provider returns a snapshot dict when metrics are collected
+_providers: dict[str, Callable[[], dict]] = {}
+
+
+def register_metrics(name: str, provider: Callable[[], dict]):
+    """Registers a metrics provider under a unique name"""
+    _providers[name] = provider
+
+
+def collect_metrics() -> dict[str, dict]:
+    """Returns a snapshot from every registered provider"""
+    return {name: provider() for name, provider in _providers.items()}
+
+
+class LatencyWindow:
+    """Keeps the most recent latency samples and summarizes them as percentiles"""
+
+    def __init__(self, size: int = 1000):
+        self._samples: deque[float] = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, ms: float):
+        self._samples.append(ms)
+        self.count += 1
+
+    def summary(self) -> dict:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"count": self.count}
+
+        def percentile(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 2)
+
+        return {
+            "count": self.count,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(samples[-1], 2),
+        }